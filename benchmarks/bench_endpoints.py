@@ -0,0 +1,117 @@
+"""Measures the latency and memory of WowApi's endpoints and auction processing.
+
+Responses are served by a local StandInServer, so no credentials or network
+are needed. Each benchmark is timed --repeat times and the best time is kept,
+then run once more under tracemalloc for its peak memory.
+
+Usage:
+    python benchmarks/bench_endpoints.py [--auctions 200000] [--only auctions]
+        [--save results.json] [--compare baseline.json]
+
+Save the results of one release and compare the next one against them to see
+regressions. Ratios above 1 are slower than the baseline.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from payloads import auctions_body, auctions_json, item_search_json, profession_tier_json
+from server import StandInServer, patch_urls, path
+from getwowdata import WowApi, AuctionSnapshot, diff_snapshots, summarize_auctions
+
+def measure(function, repeat: int) -> dict:
+    """Returns {'seconds': best time, 'peak_mb': peak memory} of calling function."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'seconds': best, 'peak_mb': peak / 1e6}
+
+def benchmarks(api: WowApi, auction_count: int, directory: str) -> dict:
+    """Returns {name: function} of everything measured."""
+    old = AuctionSnapshot.from_json(auctions_json(auction_count, seed=0))
+    new_json = auctions_json(auction_count, seed=0)
+    # About an hour of churn: some auctions sold, some new, some outbid.
+    new_json['auctions'] = new_json['auctions'][auction_count // 10:]
+    new_json['auctions'] += auctions_json(auction_count // 10, seed=1)['auctions']
+    for auction in new_json['auctions'][::50]:
+        auction['bid'] = auction.get('bid', 0) + 1
+    new = AuctionSnapshot.from_json(new_json)
+    snapshot_path = os.path.join(directory, 'auctions.snapshot')
+    mapped_path = os.path.join(directory, 'auctions_mapped.snapshot')
+    old.save(snapshot_path)
+    old.save(mapped_path, compress=False)
+    body = auctions_body(auction_count)
+    # Remembers Last-Modified so later conditional requests are answered 304.
+    api.get_auctions(4)
+
+    return {
+        'request: get_auctions': lambda: api.get_auctions(4),
+        'request: get_auctions conditional 304': lambda: api.get_auctions(4, conditional=True),
+        'request: iter_auctions to snapshot': lambda: AuctionSnapshot.from_stream(api.iter_auctions(4), 4),
+        'request: get_commodities as_snapshot': lambda: api.get_commodities(as_snapshot=True),
+        'request: item_search page': lambda: api.item_search(),
+        'request: get_profession_tier_categories': lambda: api.get_profession_tier_categories(164, 2751),
+        'decode: auctions json_loads': lambda: api.json_loads(body),
+        'aggregate: AuctionSnapshot.from_json': lambda: AuctionSnapshot.from_json(api.json_loads(body)),
+        'aggregate: summarize_auctions': lambda: summarize_auctions(old, (50, 90)),
+        'aggregate: diff_snapshots': lambda: diff_snapshots(old, new),
+        'aggregate: save compressed snapshot': lambda: old.save(snapshot_path),
+        'aggregate: load compressed snapshot': lambda: AuctionSnapshot.load(snapshot_path),
+        'aggregate: load mapped snapshot and summarize':
+            lambda: summarize_auctions(AuctionSnapshot.load(mapped_path)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--auctions', type=int, default=200_000, help='Auctions in each auction house.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--decoder', help="json_decoder passed to WowApi. Default: fastest installed.")
+    parser.add_argument('--only', help='Only run benchmarks whose name contains this.')
+    parser.add_argument('--save', help='Write the results to this json file.')
+    parser.add_argument('--compare', help='A json file saved by --save to compare against.')
+    args = parser.parse_args()
+
+    routes = {
+        path('auction', connected_realm_id=4): auctions_body(args.auctions),
+        path('commodities'): auctions_body(args.auctions, seed=2),
+        path('search_item'): json.dumps(item_search_json()).encode(),
+        path('profession_tier_detail', profession_id=164, skill_tier_id=2751):
+            json.dumps(profession_tier_json()).encode(),
+    }
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+
+    with StandInServer(routes) as server, patch_urls(server.url), tempfile.TemporaryDirectory() as directory:
+        api = WowApi('us', 'en_US', wow_api_id='benchmark', wow_api_secret='benchmark', json_decoder=args.decoder)
+        results = {}
+        for name, function in benchmarks(api, args.auctions, directory).items():
+            if args.only and args.only not in name:
+                continue
+            results[name] = measure(function, args.repeat)
+            line = f"{name:<48} {results[name]['seconds'] * 1000:9.1f} ms {results[name]['peak_mb']:9.1f} MB"
+            if name in baseline:
+                line += f"  {results[name]['seconds'] / baseline[name]['seconds']:5.2f}x"
+            print(line, flush=True)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump({'auctions': args.auctions, 'results': results}, file, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Compares the json decoders WowApi can use on an auctions response.
+
+Usage:
+    python benchmarks/bench_json.py [--auctions 100000] [--payload saved_auctions.json]
+
+Prints the best time of each installed decoder and its speedup over the json
+module.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import argparse
+import timeit
+from payloads import auctions_body
+from getwowdata.decoders import JSON_DECODERS, get_json_decoder
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--auctions', type=int, default=100_000, help='Auctions in the synthetic payload.')
+    parser.add_argument('--payload', help='A saved auctions response to decode instead.')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    body = auctions_body(args.auctions, path=args.payload)
+    print(f"payload: {len(body) / 1e6:.1f} MB")
+    baseline = None
+    for name in reversed(JSON_DECODERS):
+        try:
+            loads = get_json_decoder(name)
+        except ImportError:
+            print(f"{name:>10}: not installed")
+            continue
+        best = min(timeit.repeat(lambda: loads(body), number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print(f"{name:>10}: {best * 1000:8.1f} ms  {baseline / best:4.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Synthetic API responses for the benchmarks.
+
+The payloads look like Blizzard's: the same keys, nesting and value ranges, so
+decoding and parsing them costs about as much as the real ones. Pass a saved
+response with --payload to benchmark that instead.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import json
+import random
+
+TIME_LEFT = ('SHORT', 'MEDIUM', 'LONG', 'VERY_LONG')
+
+def auctions_json(count: int = 100_000, seed: int = 0) -> dict:
+    """Returns a dict like get_auctions() returns, with count auctions."""
+    rng = random.Random(seed)
+    auctions = []
+    for auction_id in range(1_800_000_000, 1_800_000_000 + count):
+        item = {'id': rng.randint(2_000, 200_000)}
+        auction = {'id': auction_id, 'item': item, 'quantity': rng.choice((1, 1, 1, 5, 20, 200))}
+        if rng.random() < 0.3:
+            item['context'] = rng.randint(1, 60)
+            item['bonus_lists'] = [rng.randint(1_000, 9_000) for _ in range(rng.randint(1, 4))]
+            item['modifiers'] = [{'type': 9, 'value': rng.randint(1, 70)}]
+            auction['buyout'] = rng.randint(10_000, 100_000_000)
+            if rng.random() < 0.2:
+                auction['bid'] = auction['buyout'] // 2
+        else:
+            auction['unit_price'] = rng.randint(100, 10_000_000)
+        auction['time_left'] = rng.choice(TIME_LEFT)
+        auctions.append(auction)
+    return {
+        '_links': {'self': {'href': 'https://us.api.blizzard.com/data/wow/connected-realm/4/auctions?namespace=dynamic-us'}},
+        'connected_realm': {'href': 'https://us.api.blizzard.com/data/wow/connected-realm/4?namespace=dynamic-us'},
+        'auctions': auctions,
+    }
+
+def item_search_json(page_size: int = 1000, page: int = 1, seed: int = 0) -> dict:
+    """Returns a dict like item_search() returns, a full page of items."""
+    rng = random.Random(seed + page)
+    locales = ('en_US', 'es_MX', 'pt_BR', 'de_DE', 'en_GB', 'es_ES', 'fr_FR', 'it_IT', 'ru_RU', 'ko_KR', 'zh_TW', 'zh_CN')
+    results = []
+    for item_id in range((page - 1) * page_size + 1, page * page_size + 1):
+        name = f"Item {item_id}"
+        results.append({
+            'key': {'href': f'https://us.api.blizzard.com/data/wow/item/{item_id}?namespace=static-us'},
+            'data': {
+                'id': item_id,
+                'name': {locale: name for locale in locales},
+                'level': rng.randint(1, 300),
+                'required_level': rng.randint(1, 70),
+                'is_equippable': rng.random() < 0.5,
+                'is_stackable': rng.random() < 0.5,
+                'purchase_price': rng.randint(0, 1_000_000),
+                'sell_price': rng.randint(0, 200_000),
+                'max_count': 0,
+                'quality': {'type': 'COMMON', 'name': {locale: 'Common' for locale in locales}},
+                'item_class': {'id': 7, 'name': {locale: 'Tradeskill' for locale in locales}},
+                'item_subclass': {'id': 5, 'name': {locale: 'Cloth' for locale in locales}},
+                'inventory_type': {'type': 'NON_EQUIP', 'name': {locale: 'Non-equippable' for locale in locales}},
+                'media': {'id': item_id},
+            },
+        })
+    return {'page': page, 'pageSize': page_size, 'maxPageSize': 1000, 'pageCount': 10, 'results': results}
+
+def profession_tier_json(categories: int = 30, recipes_per_category: int = 25) -> dict:
+    """Returns a dict like get_profession_tier_categories() returns."""
+    recipe_ids = iter(range(40_000, 40_000 + categories * recipes_per_category))
+    return {
+        '_links': {'self': {'href': 'https://us.api.blizzard.com/data/wow/profession/164/skill-tier/2751?namespace=static-us'}},
+        'id': 2751,
+        'name': 'Shadowlands Blacksmithing',
+        'minimum_skill_level': 1,
+        'maximum_skill_level': 100,
+        'categories': [
+            {
+                'name': f'Category {category}',
+                'recipes': [
+                    {
+                        'key': {'href': f'https://us.api.blizzard.com/data/wow/recipe/{recipe_id}?namespace=static-us'},
+                        'name': f'Recipe {recipe_id}',
+                        'id': recipe_id,
+                    }
+                    for recipe_id in (next(recipe_ids) for _ in range(recipes_per_category))
+                ],
+            }
+            for category in range(categories)
+        ],
+    }
+
+def auctions_body(count: int = 100_000, seed: int = 0, path: str = None) -> bytes:
+    """Returns the body of an auctions response, read from path if given."""
+    if path is not None:
+        with open(path, 'rb') as file:
+            return file.read()
+    return json.dumps(auctions_json(count, seed)).encode()
@@ -0,0 +1,85 @@
+"""A local stand-in for Blizzard's API so the benchmarks run offline.
+
+StandInServer serves fixed response bodies on 127.0.0.1 over plain http.
+patch_urls() points getwowdata's urls at it for the duration of a with block.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import urlsplit
+from getwowdata.urls import urls
+
+LAST_MODIFIED = 'Mon, 27 Jun 2022 18:00:00 GMT'
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = self.server.routes.get(urlsplit(self.path).path)
+        if body is None:
+            self._send(404, b'{}')
+        elif self.headers.get('If-Modified-Since') == LAST_MODIFIED:
+            self._send(304, b'')
+        else:
+            self._send(200, body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._send(200, json.dumps({'access_token': 'benchmark', 'expires_in': 86399}).encode())
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Last-Modified', LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StandInServer:
+    """Serves {path: body} over http from a background thread.
+
+    Any POST returns an access token. A GET with If-Modified-Since equal to
+    LAST_MODIFIED returns 304.
+
+    Attributes:
+        routes (dict): {url path: response body bytes}.
+        url (str): Ex: 'http://127.0.0.1:8123'. Set once started.
+    """
+
+    def __init__(self, routes: dict):
+        self.routes = routes
+        self.url = None
+        self._server = None
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.routes = self.routes
+        self.url = 'http://{}:{}'.format(*self._server.server_address)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+def patch_urls(server_url: str):
+    """Returns a mock.patch.dict that sends every Blizzard url to server_url."""
+    patched = {
+        name: url.replace('https://{region}.api.blizzard.com', server_url)
+                 .replace('https://{region}.battle.net', server_url)
+        for name, url in urls.items()
+    }
+    return mock.patch.dict(urls, patched)
+
+def path(url_name: str, **url_fields) -> str:
+    """Returns the path of one of the urls, which the server routes on."""
+    return urlsplit(urls[url_name].format(region='us', **url_fields)).path
@@ -1,2 +1,58 @@
-from .getdata import *
-from .helpers import *
\ No newline at end of file
+"""Python wrappers for Blizzard's World of Warcraft APIs.
+
+The names below are imported from their submodules the first time they are
+used, so 'import getwowdata' doesn't import requests, sqlite3 or
+multiprocessing until something needs them.
+"""
+
+import importlib
+
+# {name: the submodule it is defined in}
+_exports = {
+    'WowApi': 'getdata',
+    'AsyncWowApi': 'asyncgetdata',
+    'TIME_LEFT': 'auctions',
+    'AuctionSnapshot': 'auctions',
+    'AuctionDiff': 'auctions',
+    'summarize_auctions': 'auctions',
+    'diff_snapshots': 'auctions',
+    'LRUCache': 'cache',
+    'SqliteCache': 'cache',
+    'RecipeCrawler': 'crawler',
+    'JSON_DECODERS': 'decoders',
+    'get_json_decoder': 'decoders',
+    'IconStore': 'media',
+    'RequestRecord': 'metrics',
+    'MetricsCollector': 'metrics',
+    'summarize_auction_body': 'pipeline',
+    'process_auctions': 'pipeline',
+    'WowApiPool': 'pool',
+    'TokenBucket': 'ratelimit',
+    'RollingWindow': 'ratelimit',
+    'RateLimiter': 'ratelimit',
+    'RealmIndex': 'realms',
+    'PollingScheduler': 'scheduler',
+    'iter_json_array': 'streaming',
+    'JSONArrayStream': 'streaming',
+    'TokenCache': 'tokens',
+    'as_gold': 'helpers',
+    'get_id_from_url': 'helpers',
+    'convert_to_datetime': 'helpers',
+    'atomic_write': 'helpers',
+}
+
+__all__ = list(_exports)
+
+def __getattr__(name: str):
+    """Imports name from its submodule, or the submodule itself, on first use."""
+    if name in _exports:
+        value = getattr(importlib.import_module(f'.{_exports[name]}', __name__), name)
+    elif name in {'exceptions', *_exports.values()}:
+        value = importlib.import_module(f'.{name}', __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,441 @@
+"""This module contains an asyncio version of WowApi.
+
+Requires aiohttp. Install it with: python -m pip install get-wow-data[async]
+
+Typical usage example:
+
+import asyncio
+from getwowdata import AsyncWowApi
+
+async def main():
+    async with AsyncWowApi('us', 'en_US') as us_api:
+        auctions = await asyncio.gather(
+            *(us_api.get_auctions(id) for id in (4, 5, 9))
+        )
+
+asyncio.run(main())
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import os
+import time
+from getwowdata import exceptions
+from getwowdata.decoders import get_json_decoder
+from getwowdata.urls import urls
+from getwowdata.helpers import get_id_from_url
+
+# aiohttp and asyncio are slow to import, so they are imported by the first AsyncWowApi.
+# Private names keep them out of 'from getwowdata import *'.
+_aiohttp = None
+_asyncio = None
+
+def _import_aiohttp():
+    global _aiohttp, _asyncio
+    if _aiohttp is None:
+        import asyncio
+        import aiohttp
+        _asyncio, _aiohttp = asyncio, aiohttp
+
+class AsyncWowApi:
+    """Creates an asyncio client with the same methods as WowApi.
+
+    Every method is a coroutine. The access token is requested on the first
+    request (or when entering 'async with') so creating the object is free.
+    Requests share one aiohttp.ClientSession whose connector keeps at most
+    limit connections open, so many requests can be awaited at once.
+
+    Attributes:
+        region (str): Ex: 'us'. The region where the data will come from.
+            See https://develop.battle.net/documentation/guides/regionality-and-apis
+        locale (str, optional): Ex: 'en_US'. The language data will be returned in.
+            See https://develop.battle.net/documentation/world-of-warcraft/guides/localization.
+            Default = None.
+        wow_api_id (str, optional): Required to recieve an access token to
+            query Blizzard APIs. Can be loaded from environment variables.
+            Default = None.
+        wow_api_secret (str, optional): Required to recieve an access token to
+            query Blizzard APIs. Can be loaded from environment variables.
+            Default = None.
+        limit (int): The max number of connections open at once. Default = 100.
+        access_token (str): The access token. None until the first request.
+        access_token_expires_at (float): When the access token expires as a unix timestamp.
+            None until the first request.
+        json_loads (callable): Decodes every json response. See decoders.get_json_decoder().
+    """
+
+    # How many seconds before the access token expires it is refreshed.
+    token_refresh_margin = 5 * 60
+    # Same statuses and backoff WowApi._get() retries with.
+    retry_statuses = (429, 500, 502, 503, 504)
+    retry_total = 5
+    backoff_factor = 0.1
+
+    def __init__(
+        self,
+        region: str,
+        locale: str = None,
+        wow_api_id: str = None,
+        wow_api_secret: str = None,
+        limit: int = 100,
+        json_decoder = None,
+    ):
+        """Sets the region, locale, credentials and connection limit.
+
+        Args:
+            region (str): Example: 'us'. Should be lowercase. Access tokens will
+                work for all other regions except 'cn' (China).
+            locale (str): Example: 'en_US'. The language that data will be returned in.
+                Default = None which returns the data in all supported languages.
+            wow_api_id (str, optional): Your client id from https://develop.battle.net/.
+                Ignore if id is set as environment variable.
+            wow_api_secret (str, optional): Your client secret from https://develop.battle.net/.
+                Ignore if secret is set as environment variable.
+            limit (int, optional): The max number of connections open at once.
+                Default = 100.
+            json_decoder (str or callable, optional): 'orjson', 'simdjson', 'ujson',
+                'json' or a function like json.loads. Default = None which uses the
+                fastest installed.
+
+        Raises:
+            ImportError: If aiohttp is not installed.
+        """
+        try:
+            _import_aiohttp()
+        except ImportError:
+            raise ImportError(
+                "AsyncWowApi requires aiohttp. "
+                "Install it with: python -m pip install get-wow-data[async]"
+            ) from None
+        self.region = region
+        self.locale = locale
+        self.wow_api_id = wow_api_id
+        self.wow_api_secret = wow_api_secret
+        self.limit = limit
+        self.json_loads = get_json_decoder(json_decoder)
+        self.access_token = None
+        self.access_token_expires_at = None
+        self.session = None
+        # Created by _get_session() because before Python 3.10 an asyncio.Lock
+        # belongs to the event loop running when it is created.
+        self._token_lock = None
+        # {(url, params): Last-Modified header} of responses from dynamic urls
+        self.last_modified = {}
+
+    async def __aenter__(self):
+        try:
+            await self._refresh_access_token()
+        except BaseException:
+            await self.close()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Closes the session and all of its connections."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _get_session(self):
+        """Returns the session, creating it inside the running event loop if needed."""
+        if self._token_lock is None:
+            self._token_lock = _asyncio.Lock()
+        if self.session is None:
+            connector = _aiohttp.TCPConnector(limit=self.limit)
+            self.session = _aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def _get_access_token(
+        self,
+        timeout: int = 30,
+    ) -> str:
+        """Returns an access token.
+
+        Requires wow_api_id and wow_api_secret to be set as environment variables or
+        passed in. Each token expires after a day. Sets access_token_expires_at
+        from the response's expires_in.
+
+        Args:
+            timeout (int): How long (in seconds) until the request to the API timesout
+                Default = 30 seconds.
+
+        Returns:
+            The access token as a string.
+
+        Raises:
+            NameError: If wow_api_id and/or wow_api_secret is not set as
+                environment variable or passed in.
+            aiohttp.ClientResponseError: If status code 4XX or 5XX.
+            exceptions.JSONChangedError: If 'access_token' was not found in
+                the response.
+        """
+        try:
+            auth = (os.environ["wow_api_id"], os.environ["wow_api_secret"])
+        #if os.environ is not found
+        except KeyError:
+            if self.wow_api_id is None or self.wow_api_secret is None:
+                raise NameError(
+                    "No wow_api_id or wow_api_secret was found. "
+                    "Set them as environment variables or "
+                    "pass into AsyncWowApi."
+                ) from NameError
+            auth = (self.wow_api_id, self.wow_api_secret)
+
+        session = await self._get_session()
+        async with session.post(
+            urls["access_token"].format(region=self.region),
+            data={"grant_type": "client_credentials"},
+            auth=_aiohttp.BasicAuth(*auth),
+            timeout=_aiohttp.ClientTimeout(total=timeout),
+        ) as access_token_response:
+            access_token_response.raise_for_status()
+            json = await access_token_response.json(content_type=None)
+        try:
+            access_token = json["access_token"]
+        except KeyError:
+            raise exceptions.JSONChangedError(
+                "access_token not found in access_token_response."
+                "The Api's repsonse format may have changed."
+            ) from KeyError
+        self.access_token_expires_at = time.time() + json.get("expires_in", 24 * 60 * 60)
+        return access_token
+
+    def _token_expiring(self) -> bool:
+        """Returns True if there is no access token or it expires within token_refresh_margin."""
+        return self.access_token is None or (
+            time.time() >= self.access_token_expires_at - self.token_refresh_margin
+        )
+
+    async def _refresh_access_token(self):
+        """Requests a new access token if there is none or it is about to expire.
+
+        Tasks waiting for the same refresh reuse the token the first one gets.
+        """
+        await self._get_session()
+        async with self._token_lock:
+            # Another task may have refreshed it while this one waited.
+            if self._token_expiring():
+                self.access_token = await self._get_access_token()
+
+    async def _request(self, url: str, params: dict, timeout: int, headers: dict = None):
+        """Makes a GET request and returns (status, body, headers).
+
+        Retries on the same statuses and with the same backoff as WowApi.
+        A Retry-After header (sent with 429 Too Many Requests) is waited out instead.
+
+        Raises:
+            aiohttp.ClientResponseError: Raised on bad status code.
+        """
+        session = await self._get_session()
+        for attempt in range(self.retry_total + 1):
+            async with session.get(
+                url,
+                params={key: value for key, value in params.items() if value is not None},
+                timeout=_aiohttp.ClientTimeout(total=timeout),
+                headers=headers,
+            ) as response:
+                if response.status in self.retry_statuses and attempt < self.retry_total:
+                    retry_after = response.headers.get('Retry-After', '')
+                    if retry_after.isdigit():
+                        await _asyncio.sleep(int(retry_after))
+                    else:
+                        await _asyncio.sleep(self.backoff_factor * (2 ** attempt))
+                    continue
+                response.raise_for_status()
+                return response.status, await response.read(), response.headers
+
+    async def _get_json(
+        self,
+        url_name: str,
+        namespace: str,
+        timeout: int,
+        params: dict = None,
+        conditional: bool = False,
+        **url_fields,
+    ) -> dict:
+        """Requests one of the urls and returns its json with the 'Date' header added.
+
+        Conditional requests work the same as in WowApi._get_json().
+
+        Args:
+            url_name (str): The key of the url in urls.urls.
+            namespace (str): Either 'static' or 'dynamic'.
+            timeout (int): How long until the request to the API timesout in seconds.
+            params (dict, optional): Extra query parameters.
+            conditional (bool): Send If-Modified-Since if the url was requested
+                before. Default: False.
+            **url_fields: Values used to format the url. Ex: connected_realm_id=4.
+        """
+        if self._token_expiring():
+            await self._refresh_access_token()
+        url = urls[url_name].format(region=self.region, **url_fields)
+        params = {"namespace": f"{namespace}-{self.region}", **(params or {})}
+        key = (url, tuple(sorted(params.items())))
+        request_headers = None
+        if conditional and key in self.last_modified:
+            request_headers = {"If-Modified-Since": self.last_modified[key]}
+
+        status, body, headers = await self._request(
+            url,
+            {"locale": self.locale, "access_token": self.access_token, **params},
+            timeout,
+            request_headers,
+        )
+        if status == 304:
+            return {
+                'not_modified': True,
+                'Date': headers['Date'],
+                'Last-Modified': self.last_modified[key],
+            }
+        json = self.json_loads(body)
+        json['Date'] = headers['Date']
+        if 'Last-Modified' in headers:
+            json['Last-Modified'] = headers['Last-Modified']
+            if namespace == "dynamic":
+                self.last_modified[key] = headers['Last-Modified']
+        return json
+
+    async def _get_icon(self, url_name: str, timeout: int, **url_fields) -> bytes:
+        """Requests a media url then returns the bytes of its first asset."""
+        media = await self._get_json(url_name, "static", timeout, **url_fields)
+        _, body, _ = await self._request(media["assets"][0]["value"], {}, timeout)
+        return body
+
+    async def connected_realm_search(self, **extra_params: dict) -> dict:
+        """Uses the connected realms API's search functionaly for more specific queries.
+
+        See WowApi.connected_realm_search().
+
+        Args:
+            **extra_params (int/str, optional): Search filters and _page, _pageSize,
+                orderby. Ex: {'data.realms.slug':'illidan'}
+            **timeout (int, optional): How long (in seconds) until the request to the API timesout
+                Default = 30 seconds. Ex: {'timeout': 10}
+
+        Returns:
+            A json looking dict with nested dicts and/or lists containing data from the API.
+        """
+        timeout = extra_params.pop("timeout", 30)
+        conditional = extra_params.pop("conditional", False)
+        return await self._get_json("search_realm", "dynamic", timeout, extra_params, conditional)
+
+    async def item_search(self, **extra_params: dict) -> dict:
+        """Uses the items API's search functionality to make more specific queries.
+
+        See WowApi.item_search().
+
+        Args:
+            **extra_params (int/str, optional): Search filters and _page, _pageSize,
+                orderby. Ex: {'data.required_level':35}
+            **timeout (int, optional): How long (in seconds) until the request to the API timesout
+                Default = 30 seconds. Ex: {'timeout': 10}
+
+        Returns:
+            A json looking dict with nested dicts and/or lists containing data from the API.
+        """
+        timeout = extra_params.pop("timeout", 30)
+        return await self._get_json("search_item", "static", timeout, extra_params)
+
+    async def get_connected_realms_by_id(
+        self, connected_realm_id: int, timeout: int = 30, conditional: bool = False
+    ) -> dict:
+        """Gets all the realms that share a connected_realm id."""
+        return await self._get_json(
+            "realm", "dynamic", timeout, conditional=conditional,
+            connected_realm_id=connected_realm_id,
+        )
+
+    async def get_auctions(self, connected_realm_id, timeout=30, conditional=False) -> dict:
+        """Gets all auctions from a realm by its connected_realm_id."""
+        return await self._get_json(
+            "auction", "dynamic", timeout, conditional=conditional,
+            connected_realm_id=connected_realm_id,
+        )
+
+    async def get_commodities(self, timeout=30, conditional=False) -> dict:
+        """Gets all commodity auctions in the region."""
+        return await self._get_json("commodities", "dynamic", timeout, conditional=conditional)
+
+    async def get_profession_index(self, timeout=30) -> dict:
+        """Gets all professions including their names and ids."""
+        return await self._get_json("profession_index", "static", timeout)
+
+    async def get_profession_tiers(self, profession_id, timeout=30) -> dict:
+        """Returns all profession teirs from a profession."""
+        return await self._get_json("profession_skill_tier", "static", timeout, profession_id=profession_id)
+
+    async def get_profession_icon(self, profession_id, timeout=30) -> bytes:
+        """Returns a profession's icon in bytes."""
+        return await self._get_icon("profession_icon", timeout, profession_id=profession_id)
+
+    async def get_profession_tier_categories(self, profession_id, skill_tier_id, timeout=30) -> dict:
+        """Returns all crafts from a skill teir."""
+        return await self._get_json(
+            "profession_tier_detail",
+            "static",
+            timeout,
+            profession_id=profession_id,
+            skill_tier_id=skill_tier_id,
+        )
+
+    async def get_recipe(self, recipe_id, timeout=30) -> dict:
+        """Returns a recipes details by its id."""
+        return await self._get_json("recipe_detail", "static", timeout, recipe_id=recipe_id)
+
+    async def get_recipe_icon(self, recipe_id, timeout=30) -> bytes:
+        """Returns a recipes icon in bytes."""
+        return await self._get_icon("repice_icon", timeout, recipe_id=recipe_id)
+
+    async def get_item_classes(self, timeout=30) -> dict:
+        """Returns all item classes (consumable, container, weapon, ...)."""
+        return await self._get_json("item_classes", "static", timeout)
+
+    async def get_item_subclasses(self, item_class_id, timeout=30) -> dict:
+        """Returns all item subclasses (class: consumable, subclass: potion, elixir, ...)."""
+        return await self._get_json("item_subclass", "static", timeout, item_class_id=item_class_id)
+
+    async def get_item_set_index(self, timeout=30) -> dict:
+        """Returns all item sets. Ex: teir sets"""
+        return await self._get_json("item_set_index", "static", timeout)
+
+    async def get_item_icon(self, item_id, timeout=30) -> bytes:
+        """Returns the icon for an item in bytes."""
+        return await self._get_icon("item_icon", timeout, item_id=item_id)
+
+    async def get_wow_token(self, timeout=30, conditional=False) -> dict:
+        """Returns the price of the wow token and the timestamp of its last update."""
+        return await self._get_json("wow_token", "dynamic", timeout, conditional=conditional)
+
+    async def _search_results(self, search, **filters) -> list:
+        """Returns every result of a search, requesting the pages after the first at once.
+
+        Like WowApi._iter_search, pages hold 1000 results ordered by id unless
+        filters say otherwise.
+        """
+        filters = {"_pageSize": 1000, "orderby": "id", **filters}
+        first = await search(**filters, _page=1)
+        pages = await _asyncio.gather(
+            *(search(**filters, _page=page) for page in range(2, first.get("pageCount", 1) + 1))
+        )
+        return [result for page in (first, *pages) for result in page["results"]]
+
+    async def get_connected_realm_index(self, timeout=30) -> dict:
+        """Returns a dict where {key = Realm name: value = connected realm id, ...}
+
+        Covers every page of the connected realm search, like WowApi's.
+        """
+        index = {}
+        for connected_realms in await self._search_results(self.connected_realm_search, timeout=timeout):
+            connected_realm_id = get_id_from_url(connected_realms["key"]["href"])
+            for realm in connected_realms["data"]["realms"]:
+                index[realm["slug"]] = connected_realm_id
+        return index
+
+    async def get_item_bonuses(self, timeout=30) -> dict:
+        """Returns a dict containing the item bonuses from raidbots.com."""
+        _, body, _ = await self._request(urls['item_bonuses'], {}, timeout)
+        return self.json_loads(body)
@@ -0,0 +1,573 @@
+"""This module contains a compact, column based representation of auction data.
+
+A list of auction dicts costs hundreds of bytes per auction. AuctionSnapshot
+stores the fields used for pricing in typed arrays instead, 8 bytes per field.
+Snapshots can be saved to a compressed binary file and loaded back without
+decoding any json.
+
+Typical usage example:
+
+from getwowdata import WowApi
+
+us_api = WowApi('us', 'en_US')
+snapshot = us_api.get_auctions(4, as_snapshot=True)
+# Or, to never hold the whole response in memory:
+snapshot = AuctionSnapshot.from_stream(us_api.iter_auctions(4), connected_realm_id=4)
+
+for item_id, price in zip(snapshot.item_id, snapshot.prices()):
+    ...
+
+prices = summarize_auctions(snapshot)
+prices[171276] # {'min': 1200, 'p50': 1350, 'mean': 1402.5, 'volume': 8211}
+
+snapshot.save('auctions/4/2022-06-27T18.snapshot')
+snapshot = AuctionSnapshot.load('auctions/4/2022-06-27T18.snapshot')
+
+# An hour later
+diff = diff_snapshots(snapshot, us_api.get_auctions(4, as_snapshot=True))
+len(diff.removed) # Auctions sold or expired in the last hour
+diff.save('auctions/4/2022-06-27T19.diff')
+newer = AuctionDiff.load('auctions/4/2022-06-27T19.diff').apply(snapshot)
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import functools
+import json
+import math
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from getwowdata.helpers import atomic_write, get_id_from_url
+
+TIME_LEFT = ('SHORT', 'MEDIUM', 'LONG', 'VERY_LONG')
+_TIME_LEFT_CODES = {time_left: code for code, time_left in enumerate(TIME_LEFT)}
+
+@functools.lru_cache(maxsize=None)
+def _import_numpy():
+    """Returns numpy or None if it isn't installed. It is slow to import, so only when needed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+# Snapshot files start with _MAGIC, then the length of a json header, the
+# header, and each column's bytes starting at a multiple of 8. Everything is
+# little endian, whatever the byte order of the host that saved it.
+_MAGIC = b'GWDSNAP1'
+_HEADER_LENGTH = struct.Struct('<I')
+
+def _shuffle(data: bytes, itemsize: int) -> bytes:
+    """Groups the i-th byte of every item together so zlib finds the runs of zeros."""
+    return b''.join(data[i::itemsize] for i in range(itemsize))
+
+def _little_endian(column, typecode: str):
+    """Returns column as an array of typecode in little endian byte order."""
+    column = array(typecode, column)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+def _unshuffle(data: bytes, itemsize: int) -> bytearray:
+    """Undoes _shuffle(), putting each item's bytes back together."""
+    length = len(data) // itemsize
+    unshuffled = bytearray(len(data))
+    for i in range(itemsize):
+        unshuffled[i::itemsize] = data[i * length:(i + 1) * length]
+    return unshuffled
+
+class AuctionSnapshot:
+    """The auctions from one response stored as typed arrays, one per field.
+
+    Row i of every column is the i-th auction. Prices an auction doesn't have
+    (unit_price for gear, buyout and bid for commodities) are stored as 0.
+    time_left is stored as its index in TIME_LEFT or -1 if missing. Fields
+    other than the columns below (bonus_lists, modifiers, ...) are not kept.
+
+    Attributes:
+        id (array): Auction ids.
+        item_id (array): Item ids.
+        quantity (array): How many items are in each auction.
+        unit_price (array): Price per item of commodities.
+        buyout (array): Buyout price of non commodities.
+        bid (array): Current bid of non commodities.
+        time_left (array): Index in TIME_LEFT.
+            Snapshots loaded from an uncompressed file have read only
+            memoryviews instead of arrays.
+        date (str): The response's Date header.
+        last_modified (str): The response's Last-Modified header or None.
+        connected_realm_id (int): The connected realm the auctions are from or None.
+    """
+
+    # {column: array typecode}
+    columns = {
+        'id': 'q',
+        'item_id': 'q',
+        'quantity': 'q',
+        'unit_price': 'q',
+        'buyout': 'q',
+        'bid': 'q',
+        'time_left': 'b',
+    }
+
+    def __init__(self, date: str = None, connected_realm_id: int = None, last_modified: str = None, **columns):
+        """Creates a snapshot from existing columns or an empty one.
+
+        Args:
+            date (str, optional): The response's Date header.
+            connected_realm_id (int, optional): The connected realm the auctions are from.
+            last_modified (str, optional): The response's Last-Modified header.
+            **columns (optional): A sequence for each column name. Missing
+                columns are created empty. Ex: item_id=array('q', [...])
+        """
+        self.date = date
+        self.last_modified = last_modified
+        self.connected_realm_id = connected_realm_id
+        for name, typecode in self.columns.items():
+            setattr(self, name, columns.get(name, array(typecode)))
+
+    @classmethod
+    def from_auctions(cls, auctions, **metadata):
+        """Returns a snapshot of an iterable of auction dicts.
+
+        Args:
+            auctions (iterable): Auction dicts like the ones in get_auctions()['auctions'].
+            **metadata (optional): date, connected_realm_id and last_modified.
+        """
+        snapshot = cls(**metadata)
+        for auction in auctions:
+            snapshot.append(auction)
+        return snapshot
+
+    @classmethod
+    def from_json(cls, json: dict):
+        """Returns a snapshot of the dict returned by get_auctions()."""
+        connected_realm_id = None
+        if 'connected_realm' in json:
+            connected_realm_id = int(get_id_from_url(json['connected_realm']['href']))
+        return cls.from_auctions(
+            json.get('auctions', ()),
+            date=json.get('Date'),
+            last_modified=json.get('Last-Modified'),
+            connected_realm_id=connected_realm_id,
+        )
+
+    @classmethod
+    def from_stream(cls, stream, connected_realm_id: int = None):
+        """Returns a snapshot of the JSONArrayStream returned by iter_auctions()."""
+        return cls.from_auctions(
+            stream,
+            date=stream.date,
+            last_modified=stream.last_modified,
+            connected_realm_id=connected_realm_id,
+        )
+
+    def append(self, auction: dict):
+        """Adds an auction dict as the last row."""
+        self.id.append(auction['id'])
+        self.item_id.append(auction['item']['id'])
+        self.quantity.append(auction.get('quantity', 1))
+        self.unit_price.append(auction.get('unit_price', 0))
+        self.buyout.append(auction.get('buyout', 0))
+        self.bid.append(auction.get('bid', 0))
+        self.time_left.append(_TIME_LEFT_CODES.get(auction.get('time_left'), -1))
+
+    def __len__(self):
+        return len(self.id)
+
+    def __iter__(self):
+        """Yields each row as a dict of its columns."""
+        names = tuple(self.columns)
+        for row in zip(*(getattr(self, name) for name in names)):
+            yield dict(zip(names, row))
+
+    def prices(self) -> array:
+        """Returns each auction's price per item.
+
+        Uses unit_price, then buyout, then bid, whichever is set first, like
+        the auction example. buyout and bid are divided by quantity.
+        Auctions with no price or a quantity of 0 are 0.
+        """
+        prices = array('q')
+        for quantity, unit_price, buyout, bid in zip(self.quantity, self.unit_price, self.buyout, self.bid):
+            if quantity <= 0:
+                prices.append(0)
+            elif unit_price:
+                prices.append(unit_price)
+            elif buyout:
+                prices.append(buyout // quantity)
+            else:
+                prices.append(bid // quantity)
+        return prices
+
+    def iter_items(self):
+        """Yields (item_id, quantity, price per item) for each auction."""
+        return zip(self.item_id, self.quantity, self.prices())
+
+    def take(self, rows):
+        """Returns a new snapshot of the given rows, in that order, with the same metadata."""
+        rows = list(rows)
+        return AuctionSnapshot(
+            date=self.date,
+            connected_realm_id=self.connected_realm_id,
+            last_modified=self.last_modified,
+            **{
+                name: array(typecode, (getattr(self, name)[row] for row in rows))
+                for name, typecode in self.columns.items()
+            },
+        )
+
+    def extend(self, other):
+        """Adds the rows of another snapshot after this one's."""
+        for name in self.columns:
+            getattr(self, name).extend(getattr(other, name))
+
+    def save(self, path: str, compress: bool = True):
+        """Writes the snapshot to a binary file.
+
+        Each column is stored as its little endian bytes. Compressed columns have their
+        bytes regrouped by significance then zlib compressed, which shrinks
+        auction data several times. The file is replaced in one step, see
+        helpers.atomic_write().
+
+        Args:
+            path (str): The file to write.
+            compress (bool, optional): Whether to compress the columns.
+                Uncompressed files are larger but load() memory maps them.
+                Default = True.
+        """
+        atomic_write(path, self._encode(compress))
+
+    def _encode(self, compress: bool, **header) -> list:
+        """Returns the chunks of bytes save() writes, with header's items added to the file's header."""
+        blocks = []
+        for name, typecode in self.columns.items():
+            column = getattr(self, name)
+            if sys.byteorder == 'big':
+                column = _little_endian(column, typecode)
+            data = bytes(column)
+            if compress:
+                data = zlib.compress(_shuffle(data, array(typecode).itemsize))
+            blocks.append((name, typecode, data))
+
+        header = {
+            **header,
+            'date': self.date,
+            'last_modified': self.last_modified,
+            'connected_realm_id': self.connected_realm_id,
+            'rows': len(self),
+            'byteorder': 'little',
+            'compression': 'zlib' if compress else None,
+            'columns': [],
+        }
+        # Offsets are from the end of the header, which is padded to a multiple of 8.
+        offset = 0
+        for name, typecode, data in blocks:
+            offset += -offset % 8
+            header['columns'].append([name, typecode, offset, len(data)])
+            offset += len(data)
+        encoded_header = json.dumps(header).encode()
+        encoded_header += b' ' * (-(len(_MAGIC) + _HEADER_LENGTH.size + len(encoded_header)) % 8)
+
+        chunks = [_MAGIC, _HEADER_LENGTH.pack(len(encoded_header)), encoded_header]
+        end = 0
+        for (name, typecode, data), (_, _, offset, _) in zip(blocks, header['columns']):
+            chunks.append(b'\0' * (offset - end))
+            chunks.append(data)
+            end = offset + len(data)
+        return chunks
+
+    @classmethod
+    def load(cls, path: str):
+        """Returns the snapshot saved at path by save().
+
+        Uncompressed files are memory mapped: the columns are read only views
+        of the file and rows are only read from disk when used. On big endian
+        hosts the columns are copied into arrays instead, since the file is
+        little endian.
+
+        Raises:
+            ValueError: If the file isn't a saved snapshot.
+        """
+        header, columns = cls._read(path)
+        if 'diff' in header:
+            raise ValueError(f"{path} is a saved AuctionDiff, see AuctionDiff.load().")
+        return cls(
+            date=header['date'],
+            last_modified=header['last_modified'],
+            connected_realm_id=header['connected_realm_id'],
+            **columns,
+        )
+
+    @staticmethod
+    def _read(path: str):
+        """Returns the header and {column: array or memoryview} of a file written by save()."""
+        with open(path, 'rb') as file:
+            if file.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a saved AuctionSnapshot.")
+            (header_length,) = _HEADER_LENGTH.unpack(file.read(_HEADER_LENGTH.size))
+            header = json.loads(file.read(header_length))
+            if header.get('byteorder', 'little') != 'little':
+                raise ValueError(f"{path} has an unsupported byte order {header['byteorder']!r}.")
+            start = file.tell()
+            columns = {}
+            if header['compression'] is None:
+                view = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+                for name, typecode, offset, size in header['columns']:
+                    columns[name] = view[start + offset:start + offset + size].cast(typecode)
+                    if sys.byteorder == 'big':
+                        columns[name] = _little_endian(columns[name], typecode)
+            else:
+                for name, typecode, offset, size in header['columns']:
+                    file.seek(start + offset)
+                    data = zlib.decompress(file.read(size))
+                    columns[name] = array(typecode, _unshuffle(data, array(typecode).itemsize))
+                    if sys.byteorder == 'big':
+                        columns[name].byteswap()
+        return header, columns
+
+    def to_numpy(self) -> dict:
+        """Returns {column: numpy array}. The arrays share memory with this snapshot.
+
+        While the numpy arrays exist append() raises BufferError.
+
+        Raises:
+            ImportError: If numpy is not installed.
+        """
+        numpy = _import_numpy()
+        if numpy is None:
+            raise ImportError("to_numpy() requires numpy.")
+        return {
+            name: numpy.frombuffer(getattr(self, name), dtype=numpy.dtype(typecode))
+            for name, typecode in self.columns.items()
+        }
+
+def summarize_auctions(snapshot, percentiles=(50,)) -> dict:
+    """Returns price statistics for each item in the auctions.
+
+    The price of an auction is its price per item from AuctionSnapshot.prices().
+    Auctions without a price or with a quantity of 0 are skipped. Statistics
+    are weighted by quantity, so 200 flasks at 10g count 200 times. Uses numpy if it is installed,
+    otherwise sorts in python.
+
+    Args:
+        snapshot (AuctionSnapshot or dict): The auctions. A dict returned by
+            get_auctions() is converted to an AuctionSnapshot.
+        percentiles (iterable, optional): Which percentiles (0-100) of price to
+            return. Default = (50,) which is the median.
+
+    Returns:
+        A dict like {item_id: {'min': int, 'p50': int, 'mean': float, 'volume': int}}
+        with a 'p{percentile}' key for each percentile. The percentile is the
+        lowest price at which that percent of the item's quantity is for sale.
+    """
+    if isinstance(snapshot, dict):
+        snapshot = AuctionSnapshot.from_json(snapshot)
+    if _import_numpy() is not None:
+        return _summarize_numpy(snapshot, percentiles)
+    return _summarize_python(snapshot, percentiles)
+
+def _summarize_numpy(snapshot, percentiles) -> dict:
+    numpy = _import_numpy()
+    columns = snapshot.to_numpy()
+    quantity = columns['quantity']
+    with numpy.errstate(divide='ignore'):
+        price = numpy.where(
+            columns['unit_price'] > 0,
+            columns['unit_price'],
+            numpy.where(
+                columns['buyout'] > 0,
+                columns['buyout'] // quantity,
+                columns['bid'] // quantity,
+            ),
+        )
+    priced = (price > 0) & (quantity > 0)
+    item_id, price, quantity = columns['item_id'][priced], price[priced], quantity[priced]
+    if not len(item_id):
+        return {}
+
+    order = numpy.lexsort((price, item_id))
+    item_id, price, quantity = item_id[order], price[order], quantity[order]
+    starts = numpy.flatnonzero(numpy.r_[True, item_id[1:] != item_id[:-1]])
+    volume = numpy.add.reduceat(quantity, starts)
+    total = numpy.add.reduceat(price * quantity, starts)
+    cumulative = numpy.cumsum(quantity)
+    before = cumulative[starts] - quantity[starts]
+
+    stats = {
+        'min': price[starts].tolist(),
+        'mean': (total / volume).tolist(),
+        'volume': volume.tolist(),
+    }
+    for percentile in percentiles:
+        needed = numpy.maximum(numpy.ceil(volume * (percentile / 100)), 1).astype(numpy.int64)
+        stats[f'p{percentile}'] = price[numpy.searchsorted(cumulative, before + needed)].tolist()
+
+    return {
+        item: {name: values[i] for name, values in stats.items()}
+        for i, item in enumerate(item_id[starts].tolist())
+    }
+
+def _summarize_python(snapshot, percentiles) -> dict:
+    rows = sorted(
+        (item_id, price, quantity)
+        for item_id, quantity, price in snapshot.iter_items()
+        if price > 0 and quantity > 0
+    )
+    summary = {}
+    start = 0
+    while start < len(rows):
+        item_id = rows[start][0]
+        end = start
+        volume = total = 0
+        while end < len(rows) and rows[end][0] == item_id:
+            volume += rows[end][2]
+            total += rows[end][1] * rows[end][2]
+            end += 1
+        stats = {'min': rows[start][1], 'mean': total / volume, 'volume': volume}
+        for percentile in percentiles:
+            needed = max(math.ceil(volume * (percentile / 100)), 1)
+            cumulative = 0
+            for _, price, quantity in rows[start:end]:
+                cumulative += quantity
+                if cumulative >= needed:
+                    stats[f'p{percentile}'] = price
+                    break
+        summary[item_id] = stats
+        start = end
+    return summary
+
+class AuctionDiff:
+    """The changes between two snapshots of the same auction house.
+
+    Auctions are matched by id. Saving a diff instead of a whole snapshot
+    keeps only the auctions that changed; apply() rebuilds the newer snapshot.
+
+    Attributes:
+        added (AuctionSnapshot): Auctions only in the newer snapshot.
+        removed (AuctionSnapshot): Auctions only in the older snapshot. These
+            were bought, expired or cancelled. Their time_left hints which:
+            auctions removed before SHORT were not expired.
+        changed (AuctionSnapshot): The new rows of auctions in both snapshots
+            whose columns changed, like a new bid or less time_left.
+        old_date (str): The older snapshot's date.
+        new_date (str): The newer snapshot's date.
+        new_last_modified (str): The newer snapshot's last_modified.
+    """
+
+    def __init__(
+        self, added, removed, changed, old_date: str = None, new_date: str = None, new_last_modified: str = None
+    ):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.old_date = old_date
+        self.new_date = new_date
+        self.new_last_modified = new_last_modified
+
+    def apply(self, old):
+        """Returns the newer snapshot rebuilt from the older one and this diff.
+
+        The rows are the same as the newer snapshot's but not in the same order.
+        """
+        gone = set(self.removed.id)
+        gone.update(self.changed.id)
+        new = old.take(row for row, auction_id in enumerate(old.id) if auction_id not in gone)
+        new.extend(self.changed)
+        new.extend(self.added)
+        new.date = self.new_date
+        new.last_modified = self.new_last_modified
+        return new
+
+    def save(self, path: str, compress: bool = True):
+        """Writes the diff to a binary file in the format of AuctionSnapshot.save().
+
+        The added, removed and changed rows are saved as one snapshot, in that
+        order, with how many there are of each in the header. A diff is usually
+        much smaller than the newer snapshot, so a history can keep one whole
+        snapshot and the diffs after it.
+
+        Args:
+            path (str): The file to write.
+            compress (bool, optional): Whether to compress the columns. Default = True.
+        """
+        parts = (self.added, self.removed, self.changed)
+        rows = AuctionSnapshot(connected_realm_id=self.added.connected_realm_id)
+        for part in parts:
+            rows.extend(part)
+        diff = {
+            'parts': [[len(part), part.date, part.last_modified] for part in parts],
+            'old_date': self.old_date,
+            'new_date': self.new_date,
+            'new_last_modified': self.new_last_modified,
+        }
+        atomic_write(path, rows._encode(compress, diff=diff))
+
+    @classmethod
+    def load(cls, path: str):
+        """Returns the diff saved at path by save().
+
+        Like AuctionSnapshot.load(), the columns of uncompressed files are
+        read only views of the memory mapped file.
+
+        Raises:
+            ValueError: If the file isn't a saved diff.
+        """
+        header, columns = AuctionSnapshot._read(path)
+        if 'diff' not in header:
+            raise ValueError(f"{path} is not a saved AuctionDiff.")
+        diff = header['diff']
+        parts = []
+        start = 0
+        for rows, date, last_modified in diff['parts']:
+            parts.append(AuctionSnapshot(
+                date=date,
+                connected_realm_id=header['connected_realm_id'],
+                last_modified=last_modified,
+                **{name: column[start:start + rows] for name, column in columns.items()},
+            ))
+            start += rows
+        return cls(*parts, diff['old_date'], diff['new_date'], diff['new_last_modified'])
+
+def diff_snapshots(old, new) -> AuctionDiff:
+    """Returns the auctions added, removed and changed between two snapshots.
+
+    Takes time proportional to the number of auctions in both.
+
+    Args:
+        old (AuctionSnapshot or dict): The older auctions. A dict returned by
+            get_auctions() is converted to an AuctionSnapshot.
+        new (AuctionSnapshot or dict): The newer auctions from the same connected realm.
+
+    Returns:
+        An AuctionDiff.
+    """
+    if isinstance(old, dict):
+        old = AuctionSnapshot.from_json(old)
+    if isinstance(new, dict):
+        new = AuctionSnapshot.from_json(new)
+
+    names = tuple(AuctionSnapshot.columns)
+    old_rows = {row[0]: row for row in zip(*(getattr(old, name) for name in names))}
+    added, changed = [], []
+    for row_number, row in enumerate(zip(*(getattr(new, name) for name in names))):
+        old_row = old_rows.pop(row[0], None)
+        if old_row is None:
+            added.append(row_number)
+        elif old_row != row:
+            changed.append(row_number)
+    removed_ids = set(old_rows)
+    removed = [row_number for row_number, auction_id in enumerate(old.id) if auction_id in removed_ids]
+
+    return AuctionDiff(
+        added=new.take(added),
+        removed=old.take(removed),
+        changed=new.take(changed),
+        old_date=old.date,
+        new_date=new.date,
+        new_last_modified=new.last_modified,
+    )
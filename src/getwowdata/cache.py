@@ -0,0 +1,202 @@
+"""This module contains caches WowApi can store static data in.
+
+Data from static-{region} namespaces only changes with game patches, so it can
+be kept and reused instead of requested again. LRUCache keeps decoded responses
+in memory for repeated lookups in one process. SqliteCache keeps them on disk
+between runs.
+
+Typical usage example:
+
+from getwowdata import WowApi, SqliteCache
+
+us_api = WowApi('us', 'en_US', cache=SqliteCache('wow_cache.sqlite'), memory_cache_size=1024)
+recipe = us_api.get_recipe(1631) # Requested from the API and saved
+recipe = us_api.get_recipe(1631) # Returned from memory
+us_api.clear_cache()
+recipe = us_api.get_recipe(1631) # Loaded from wow_cache.sqlite
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+class LRUCache:
+    """A bounded in memory cache that forgets the least recently used entries.
+
+    Values are stored and returned as is, without copying, so callers should not
+    modify them. Safe to use from many threads.
+
+    Attributes:
+        maxsize (int): The max number of entries.
+        hits (int): How many get() calls found their key.
+        misses (int): How many get() calls didn't find their key.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """Creates an empty cache.
+
+        Args:
+            maxsize (int, optional): The max number of entries. Default = 1024.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Returns the value saved under key or None if missing."""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Saves value under key, forgetting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _after_fork(self):
+        """Replaces the lock in a forked child, where it may have been copied while held."""
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+
+    def clear(self):
+        """Deletes every entry and resets hits and misses."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+class SqliteCache:
+    """A persistent cache of json text stored in a SQLite database.
+
+    Entries expire ttl seconds after being saved. When more than max_entries
+    are saved the least recently read entries are deleted. The cache can be
+    shared by threads and by WowApi objects in the same process.
+
+    Attributes:
+        path (str): The database file. ':memory:' keeps the cache in memory.
+        ttl (int): Seconds until an entry expires. None means never.
+        max_entries (int): The max number of entries. None means no limit.
+    """
+
+    def __init__(self, path: str, ttl: int = 7 * 24 * 60 * 60, max_entries: int = 100_000):
+        """Opens (or creates) the database at path.
+
+        Args:
+            path (str): The database file. Ex: 'wow_cache.sqlite'
+            ttl (int, optional): Seconds until an entry expires. None means never.
+                Default = 1 week.
+            max_entries (int, optional): The max number of entries. None means no limit.
+                Default = 100,000.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._connect()
+
+    def _connect(self):
+        """Opens the database and creates its table if needed."""
+        # Imported here so importing getwowdata doesn't import sqlite3.
+        import sqlite3
+
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "saved_at REAL NOT NULL, read_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS cache_read_at ON cache (read_at)"
+            )
+        self._size = self._connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def __len__(self):
+        return self._size
+
+    def _after_fork(self):
+        """Reopens the database and replaces the lock in a forked child.
+
+        SQLite connections must not be used by two processes. The parent's
+        connection is left open, since closing it from the child could release
+        locks the parent holds. A ':memory:' database starts empty in the child.
+        """
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+            self._connect()
+
+    def get(self, key: str):
+        """Returns the value saved under key or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, saved_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, saved_at = row
+            with self._connection:
+                if self.ttl is not None and now - saved_at >= self.ttl:
+                    self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    self._size -= 1
+                    return None
+                self._connection.execute(
+                    "UPDATE cache SET read_at = ? WHERE key = ?", (now, key)
+                )
+            return value
+
+    def set(self, key: str, value: str):
+        """Saves value under key, evicting the least recently read entries if full."""
+        now = time.time()
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "UPDATE cache SET value = ?, saved_at = ?, read_at = ? WHERE key = ?",
+                (value, now, now, key),
+            )
+            if cursor.rowcount == 0:
+                self._connection.execute(
+                    "INSERT INTO cache (key, value, saved_at, read_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                self._size += 1
+            if self.max_entries is not None and self._size > self.max_entries:
+                # Evict down to 90% so inserts into a full cache don't evict one at a time.
+                keep = int(self.max_entries * 0.9)
+                self._connection.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache ORDER BY read_at LIMIT ?)",
+                    (self._size - keep,),
+                )
+                self._size = keep
+
+    def clear(self):
+        """Deletes every entry."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM cache")
+            self._size = 0
+
+    def close(self):
+        """Closes the database connection."""
+        self._connection.close()
@@ -0,0 +1,248 @@
+"""This module contains a crawler that downloads every recipe of every profession.
+
+Professions are a hierarchy: profession index -> profession -> skill tier ->
+recipe. RecipeCrawler requests each level of it concurrently, requests each
+recipe only once even if it is in many skill tiers, and builds a graph of
+recipes, their reagents and the items they craft. Progress can be saved to a
+checkpoint file so an interrupted crawl continues where it stopped.
+
+Typical usage example:
+
+from getwowdata import WowApi, RecipeCrawler
+
+us_api = WowApi('us', 'en_US')
+crawler = RecipeCrawler(us_api, checkpoint_path='recipes_checkpoint.json')
+graph = crawler.crawl()
+graph['recipes'][1631]
+# {'name': 'Crimson Combatant's Cloth Bracers', 'skill_tier_ids': [2750], ...}
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from getwowdata.helpers import atomic_write
+
+class RecipeCrawler:
+    """Crawls the profession hierarchy breadth first and returns a recipe graph.
+
+    Attributes:
+        api (WowApi): Makes the requests.
+        profession_ids (set): Only these professions are crawled or None for all.
+        max_workers (int): The max number of requests in flight at once.
+        checkpoint_path (str): Where progress is saved or None.
+        checkpoint_every (int): Progress is saved after this many responses.
+        timeout (int): How long until each request to the API timesout in seconds.
+        responses (dict): The responses received so far for each level.
+        errors (dict): {(level, key): exception} of requests that failed. They
+            are retried by the next crawl().
+    """
+
+    levels = ('professions', 'skill_tiers', 'recipes')
+
+    def __init__(
+        self,
+        api,
+        profession_ids=None,
+        max_workers: int = 8,
+        checkpoint_path: str = None,
+        checkpoint_every: int = 500,
+        timeout: int = 30,
+    ):
+        """Creates a crawler, loading progress from checkpoint_path if it exists.
+
+        Args:
+            api (WowApi): Makes the requests.
+            profession_ids (iterable, optional): Only crawl these professions.
+                Default = None which crawls all of them.
+            max_workers (int, optional): The max number of requests in flight at once.
+                Default = 8.
+            checkpoint_path (str, optional): A json file progress is saved to.
+                Default = None which doesn't save progress.
+            checkpoint_every (int, optional): Progress is saved after this many
+                responses. Default = 500.
+            timeout (int, optional): How long until each request to the API timesout
+                in seconds. Default = 30.
+        """
+        self.api = api
+        self.profession_ids = set(profession_ids) if profession_ids is not None else None
+        self.max_workers = max_workers
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.timeout = timeout
+        self.responses = {'profession_index': None, **{level: {} for level in self.levels}}
+        self.errors = {}
+        if checkpoint_path is not None and os.path.exists(checkpoint_path):
+            self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        with open(self.checkpoint_path, encoding='utf-8') as file:
+            saved = json.load(file)
+        self.responses['profession_index'] = saved['profession_index']
+        for level in self.levels:
+            self.responses[level] = {
+                tuple(map(int, key.split(','))): response
+                for key, response in saved[level].items()
+            }
+
+    def save_checkpoint(self):
+        """Writes the responses received so far to checkpoint_path."""
+        if self.checkpoint_path is None:
+            return
+        saved = {'profession_index': self.responses['profession_index']}
+        for level in self.levels:
+            saved[level] = {
+                ','.join(map(str, key)): response
+                for key, response in self.responses[level].items()
+            }
+        atomic_write(self.checkpoint_path, json.dumps(saved).encode('utf-8'))
+
+    def _fetch_level(self, level: str, keys, request):
+        """Requests every key of a level that hasn't been received yet.
+
+        Args:
+            level (str): One of levels.
+            keys (iterable): Tuples of ids. Duplicates are requested once.
+            request (callable): Called with *key, returns the response.
+        """
+        received = self.responses[level]
+        missing = [key for key in dict.fromkeys(keys) if key not in received]
+        if not missing:
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(request, *key): key for key in missing}
+            for count, future in enumerate(as_completed(futures), 1):
+                key = futures[future]
+                try:
+                    response = future.result()
+                except Exception as error:
+                    self.errors[(level, key)] = error
+                    continue
+                # Copy instead of pop so cached responses aren't modified.
+                received[key] = {name: value for name, value in response.items() if name != '_links'}
+                self.errors.pop((level, key), None)
+                if count % self.checkpoint_every == 0:
+                    self.save_checkpoint()
+        self.save_checkpoint()
+
+    def crawl(self) -> dict:
+        """Requests everything not received yet then returns the graph.
+
+        Returns:
+            The dict returned by build_graph().
+
+        Raises:
+            requests.exceptions.HTTPError: If the profession index request fails.
+                Failures of other requests are saved in errors instead.
+        """
+        if self.responses['profession_index'] is None:
+            self.responses['profession_index'] = self.api.get_profession_index(timeout=self.timeout)
+            self.save_checkpoint()
+
+        profession_ids = [
+            profession['id']
+            for profession in self.responses['profession_index']['professions']
+            if self.profession_ids is None or profession['id'] in self.profession_ids
+        ]
+        self._fetch_level(
+            'professions',
+            ((profession_id,) for profession_id in profession_ids),
+            lambda profession_id: self.api.get_profession_tiers(profession_id, timeout=self.timeout),
+        )
+
+        self._fetch_level(
+            'skill_tiers',
+            (
+                (profession_id, skill_tier['id'])
+                for (profession_id,), profession in self.responses['professions'].items()
+                for skill_tier in profession.get('skill_tiers', ())
+            ),
+            lambda profession_id, skill_tier_id: self.api.get_profession_tier_categories(
+                profession_id, skill_tier_id, timeout=self.timeout
+            ),
+        )
+
+        self._fetch_level(
+            'recipes',
+            (
+                (recipe['id'],)
+                for skill_tier in self.responses['skill_tiers'].values()
+                for category in skill_tier.get('categories', ())
+                for recipe in category.get('recipes', ())
+            ),
+            lambda recipe_id: self.api.get_recipe(recipe_id, timeout=self.timeout),
+        )
+        return self.build_graph()
+
+    def build_graph(self) -> dict:
+        """Returns the responses received so far as a normalized graph.
+
+        Returns:
+            A dict like
+            {
+                'professions': {profession_id: {'name': ..., 'skill_tier_ids': [...]}},
+                'skill_tiers': {skill_tier_id: {'name': ..., 'profession_id': ..., 'recipe_ids': [...]}},
+                'recipes': {recipe_id: {'name': ..., 'skill_tier_ids': [...], 'category': ...,
+                    'crafted_item_id': ..., 'crafted_quantity': ...}},
+                'items': {item_id: {'name': ...}},
+                'reagents': [{'recipe_id': ..., 'item_id': ..., 'quantity': ...}, ...],
+            }
+            crafted_item_id and crafted_quantity are None if the recipe doesn't
+            craft an item (enchants) or wasn't received.
+        """
+        graph = {'professions': {}, 'skill_tiers': {}, 'recipes': {}, 'items': {}, 'reagents': []}
+
+        for (profession_id,), profession in self.responses['professions'].items():
+            graph['professions'][profession_id] = {
+                'name': profession.get('name'),
+                'skill_tier_ids': [skill_tier['id'] for skill_tier in profession.get('skill_tiers', ())],
+            }
+
+        for (profession_id, skill_tier_id), skill_tier in self.responses['skill_tiers'].items():
+            recipe_ids = []
+            for category in skill_tier.get('categories', ()):
+                for recipe in category.get('recipes', ()):
+                    recipe_ids.append(recipe['id'])
+                    node = graph['recipes'].setdefault(recipe['id'], {
+                        'name': recipe.get('name'),
+                        'skill_tier_ids': [],
+                        'category': category.get('name'),
+                        'crafted_item_id': None,
+                        'crafted_quantity': None,
+                    })
+                    node['skill_tier_ids'].append(skill_tier_id)
+            graph['skill_tiers'][skill_tier_id] = {
+                'name': skill_tier.get('name'),
+                'profession_id': profession_id,
+                'recipe_ids': recipe_ids,
+            }
+
+        for (recipe_id,), recipe in self.responses['recipes'].items():
+            node = graph['recipes'].setdefault(recipe_id, {
+                'name': recipe.get('name'),
+                'skill_tier_ids': [],
+                'category': None,
+            })
+            crafted_item = (
+                recipe.get('crafted_item')
+                or recipe.get('alliance_crafted_item')
+                or recipe.get('horde_crafted_item')
+            )
+            node['crafted_item_id'] = crafted_item['id'] if crafted_item else None
+            crafted_quantity = recipe.get('crafted_quantity', {})
+            node['crafted_quantity'] = crafted_quantity.get(
+                'value', crafted_quantity.get('minimum')
+            )
+            if crafted_item:
+                graph['items'][crafted_item['id']] = {'name': crafted_item.get('name')}
+            for reagent in recipe.get('reagents', ()):
+                item = reagent['reagent']
+                graph['items'][item['id']] = {'name': item.get('name')}
+                graph['reagents'].append({
+                    'recipe_id': recipe_id,
+                    'item_id': item['id'],
+                    'quantity': reagent['quantity'],
+                })
+        return graph
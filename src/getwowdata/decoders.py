@@ -0,0 +1,49 @@
+"""This module picks the function WowApi decodes json responses with.
+
+Auction responses are tens of megabytes and decoding them takes longer than
+anything else WowApi does with them. orjson, simdjson (pysimdjson) and ujson
+decode them faster than the json module. By default the fastest
+one installed is used.
+
+Typical usage example:
+
+from getwowdata import WowApi
+
+us_api = WowApi('us', 'en_US') # Uses orjson if it is installed
+us_api = WowApi('us', 'en_US', json_decoder='json') # Always the json module
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import importlib
+import json
+
+# Fastest first. get_json_decoder() uses the first one installed.
+JSON_DECODERS = ('orjson', 'simdjson', 'ujson', 'json')
+
+def get_json_decoder(decoder=None):
+    """Returns a function that decodes json bytes or str into python objects.
+
+    Args:
+        decoder (str or callable, optional): One of JSON_DECODERS, or a function
+            like json.loads which is returned as is. Default = None which
+            returns the fastest decoder that is installed.
+
+    Raises:
+        ValueError: If decoder is not in JSON_DECODERS.
+        ImportError: If decoder is not installed.
+    """
+    if callable(decoder):
+        return decoder
+    if decoder is None:
+        for name in JSON_DECODERS:
+            try:
+                return get_json_decoder(name)
+            except ImportError:
+                continue
+    if decoder not in JSON_DECODERS:
+        raise ValueError(f"Unknown json decoder {decoder!r}. Use one of {JSON_DECODERS}.")
+    if decoder == 'json':
+        return json.loads
+    return importlib.import_module(decoder).loads
@@ -15,12 +15,18 @@ MIT License see LICENSE for more details
 """
 
 import os
-from urllib import response
-from dotenv import load_dotenv
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry 
+import json as jsonlib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from getwowdata import exceptions
+from getwowdata.auctions import AuctionSnapshot
+from getwowdata.cache import LRUCache
+from getwowdata.decoders import get_json_decoder
+from getwowdata.metrics import RequestRecord
+from getwowdata.streaming import JSONArrayStream
 from getwowdata.urls import urls
 from getwowdata.helpers import get_id_from_url
 
@@ -43,14 +49,59 @@ class WowApi:
             environment variables. See Setup in readme or
             visit https://develop.battle.net/ and click get started now.
             Default = None.
+        cache (SqliteCache, optional): Where responses from static urls are saved
+            and reused from. Default = None which doesn't cache.
+        memory_cache (LRUCache): Decoded responses from static urls kept in memory.
+            None if memory_cache_size is 0. Has hits and misses counters.
+        rate_limiter (RateLimiter, optional): Consulted before each request to
+            Blizzard's API. Default = None which doesn't limit.
+        token_cache (TokenCache, optional): Where access tokens are reused from.
+            Default = None.
+        token_region (str): The region access tokens are requested from.
+        session (requests.Session): Makes every request. Created on first use.
+        pool_maxsize (int): How many connections to a host the session keeps open.
+        json_loads (callable): Decodes every json response. See decoders.get_json_decoder().
+        observers (list): Functions called with a RequestRecord after each call
+            to an endpoint. Append to it to add one.
+        access_token_expires_at (float): When the access token expires as a unix timestamp.
+            None until the first request if lazy.
     """
 
+    # How many seconds before the access token expires it is refreshed.
+    token_refresh_margin = 5 * 60
+    # Statuses retried by _get(), up to retry_total times, waiting
+    # backoff_factor * 2 ** attempt seconds if there is no Retry-After header.
+    retry_statuses = (429, 500, 502, 503, 504)
+    retry_total = 5
+    backoff_factor = 0.1
+    # The search APIs don't return pages past this.
+    search_page_limit = 1000
+    # {kind: (media url name, id argument)} used by download_icons()
+    icon_urls = {
+        'item': ('item_icon', 'item_id'),
+        'recipe': ('repice_icon', 'recipe_id'),
+        'profession': ('profession_icon', 'profession_id'),
+    }
+
     def __init__(
         self,
         region: str,
         locale: str = None,
         wow_api_id: str = None,
         wow_api_secret: str = None,
+        pool_maxsize: int = 10,
+        cache = None,
+        memory_cache_size: int = 0,
+        rate_limiter = None,
+        token_cache = None,
+        background_token_refresh: bool = False,
+        json_decoder = None,
+        observers = (),
+        adapter = None,
+        token_region: str = None,
+        lazy: bool = False,
+        access_token: str = None,
+        access_token_expires_at: float = None,
     ):
         """Sets the access_token and region attributes.
 
@@ -64,18 +115,149 @@ class WowApi:
                 Ignore if id is set as environment variable.
             wow_api_secret (str, optional): Your client secret from https://develop.battle.net/.
                 Ignore if secret is set as environment variable.
+            pool_maxsize (int, optional): How many connections to a host the session
+                keeps open. Should be at least as large as the max_workers used with
+                get_auctions_many(). Default = 10.
+            cache (SqliteCache, optional): Saves responses from static-{region}
+                urls so they are loaded from disk instead of requested again.
+                Default = None which doesn't cache.
+            memory_cache_size (int, optional): How many responses from static-{region}
+                urls to keep in memory. Cached dicts are returned as is, not copied,
+                so don't modify them. Default = 0 which doesn't cache.
+            rate_limiter (RateLimiter, optional): Each request to Blizzard's API waits
+                until it fits in this limiter's quota. Share one between WowApi objects
+                that use the same client id. Default = None which doesn't limit.
+            token_cache (TokenCache, optional): Reuse access tokens saved here, by any
+                WowApi with the same client id and region, until they are about to
+                expire. Default = None which requests a new token.
+            background_token_refresh (bool, optional): Refresh the access token in a
+                background thread token_refresh_margin seconds before it expires.
+                Otherwise it is refreshed by the first request after that.
+                Default = False.
+            json_decoder (str or callable, optional): 'orjson', 'simdjson', 'ujson',
+                'json' or a function like json.loads. Used to decode every response
+                except streamed ones. Default = None which uses the fastest installed.
+            observers (iterable, optional): Functions called with a RequestRecord
+                after each call to an endpoint, like a MetricsCollector. They are
+                called in the requesting thread, so keep them fast. Default = ().
+            adapter (HTTPAdapter, optional): Mounted for https instead of a new one
+                from create_adapter(). WowApi objects sharing an adapter share its
+                connection pools. pool_maxsize is then ignored. Default = None.
+            token_region (str, optional): The region access tokens are requested
+                from and saved in token_cache under. A token from any region except
+                'cn' works in the others, so WowApi objects with the same
+                token_region and token_cache share one token. Default = region.
+            lazy (bool, optional): Don't request the access token until the first
+                request, so creating the object doesn't use the network. Errors
+                from missing credentials are raised by that request. Default = False.
+            access_token (str, optional): Use this access token instead of
+                requesting one. Default = None.
+            access_token_expires_at (float, optional): When access_token expires as
+                a unix timestamp. Default = None which assumes a day from now, how
+                long Blizzard's tokens last.
         """
-        retry = Retry(total=5, backoff_factor=0.1, status_forcelist=[ 500, 502, 503, 504 ])
-        adapter = HTTPAdapter(max_retries=retry)
-        session = requests.Session()
-        session.mount('https://', adapter)
-        session.params = {'locale':locale}
-        self.session = session
+        self.pool_maxsize = pool_maxsize
+        # The session is created by its first use, see the session property.
+        self._adapter = adapter
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._params = {'locale':locale}
+        self._pid = os.getpid()
         self.region = region
+        self.token_region = token_region or region
         self.wow_api_id = wow_api_id
         self.wow_api_secret = wow_api_secret
-        access_token = self._get_access_token()
-        session.params['access_token'] = access_token
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.memory_cache = LRUCache(memory_cache_size) if memory_cache_size else None
+        self.token_cache = token_cache
+        self.background_token_refresh = background_token_refresh
+        self.json_loads = get_json_decoder(json_decoder)
+        self.observers = list(observers)
+        self.access_token_expires_at = None
+        self._token_lock = threading.RLock()
+        self._token_timer = None
+        if access_token is not None:
+            self._params['access_token'] = access_token
+            self.access_token_expires_at = access_token_expires_at or time.time() + 24 * 60 * 60
+        elif not lazy:
+            self._refresh_access_token()
+        # {(url, params): Last-Modified header} of responses from dynamic urls
+        self.last_modified = {}
+
+    @property
+    def session(self):
+        """The requests.Session every request is made with.
+
+        It is created on first use, so creating a WowApi doesn't import requests.
+        Its params (locale and access token) are shared with this object.
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = self._create_session(self._adapter or self.create_adapter(self.pool_maxsize))
+                    session.params = self._params
+                    self._session = session
+        return self._session
+
+    @staticmethod
+    def _create_session(adapter):
+        """Returns a requests.Session with adapter mounted for https."""
+        # requests and urllib3 are imported here instead of at the top so
+        # importing getwowdata stays fast.
+        import requests
+        from urllib3.util import make_headers
+
+        session = requests.Session()
+        session.mount('https://', adapter)
+        # gzip and deflate, plus br and zstd if brotli and zstandard are installed.
+        session.headers['Accept-Encoding'] = make_headers(accept_encoding=True)['accept-encoding']
+        return session
+
+    def _after_fork(self):
+        """Replaces what a forked child can't share with its parent.
+
+        The parent's connections and locks are copied by fork, and using them
+        from two processes corrupts requests or deadlocks. The child creates a
+        new session and adapter on first use, keeping the params (locale and
+        access token), and gets a new token lock. cache reopens its database and memory_cache,
+        rate_limiter and token_cache replace their locks. The background token
+        refresh timer isn't copied by fork, so the child refreshes the token
+        when it is used instead.
+
+        A rate_limiter or token_cache without a path is copied, not shared,
+        so the child's requests aren't counted by the parent. A cache or
+        rate_limiter that isn't one of this package's classes is used as is.
+        """
+        self._adapter = None
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._params = dict(self._params)
+        self._token_lock = threading.RLock()
+        self._token_timer = None
+        for component in (self.cache, self.memory_cache, self.rate_limiter, self.token_cache):
+            after_fork = getattr(component, '_after_fork', None)
+            if after_fork is not None:
+                after_fork()
+        self._pid = os.getpid()
+
+    @staticmethod
+    def create_adapter(pool_maxsize: int = 10):
+        """Returns the HTTPAdapter WowApi mounts: retries and a connection pool per host.
+
+        Only connection errors are retried by the adapter. Bad statuses are
+        retried by _get() so that every retry waits for the rate_limiter.
+
+        Args:
+            pool_maxsize (int, optional): How many connections to a host are kept open.
+                Default = 10.
+        """
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        # urllib3 retries 413, 429 and 503 with a Retry-After header unless told not to.
+        retry = Retry(total=5, backoff_factor=0.1, status_forcelist=(), respect_retry_after_header=False)
+        return HTTPAdapter(max_retries=retry, pool_maxsize=pool_maxsize)
 
     def _get_access_token(
         self,
@@ -86,7 +268,7 @@ class WowApi:
         Requires wow_api_id and wow_api_secret to be set as environment variables or
         passed in. Remember not to expose your secret publicly. Each token expires
         after a day. Subsequent get_access_token calls returns the same token until
-        it expires.
+        it expires. Sets access_token_expires_at from the response's expires_in.
 
         Args:
             timeout (int): How long (in seconds) until the request to the API timesout
@@ -105,23 +287,33 @@ class WowApi:
 
         token_data = {"grant_type": "client_credentials"}
 
+        access_token_response = self.session.post(
+            urls["access_token"].format(region=self.token_region),
+            data=token_data,
+            auth=self._get_credentials(),
+            timeout=timeout,
+        )
+        access_token_response.raise_for_status()
+        json = access_token_response.json()
         try:
-            auth = (os.environ["wow_api_id"], os.environ["wow_api_secret"])
-            access_token_response = self.session.post(
-                urls["access_token"].format(region=self.region),
-                data=token_data,
-                auth=auth,
-                timeout=timeout,
-            )
-            access_token_response.raise_for_status()
-            try:
-                return access_token_response.json()["access_token"]
-            except KeyError:
-                raise exceptions.JSONChangedError(
-                    "access_token not found in access_token_response."
-                    "The Api's repsonse format may have changed."
-                ) from KeyError
+            access_token = json["access_token"]
+        except KeyError:
+            raise exceptions.JSONChangedError(
+                "access_token not found in access_token_response."
+                "The Api's repsonse format may have changed."
+            ) from KeyError
+        self.access_token_expires_at = time.time() + json.get("expires_in", 24 * 60 * 60)
+        return access_token
 
+    def _get_credentials(self) -> tuple:
+        """Returns (wow_api_id, wow_api_secret) from the environment or the arguments.
+
+        Raises:
+            NameError: If wow_api_id and/or wow_api_secret is not set as
+                environment variable or passed in.
+        """
+        try:
+            return (os.environ["wow_api_id"], os.environ["wow_api_secret"])
         #if os.environ is not found
         except KeyError:
             if self.wow_api_id is None or self.wow_api_secret is None:
@@ -130,22 +322,305 @@ class WowApi:
                     "Set them as environment variables or "
                     "pass into get_access_token."
                 ) from NameError
+            return (self.wow_api_id, self.wow_api_secret)
 
-            auth = (self.wow_api_id, self.wow_api_secret)
-            access_token_response = self.session.post(
-                urls["access_token"].format(region=self.region),
-                data=token_data,
-                auth=auth,
-                timeout=timeout,
+    def _refresh_access_token(self, force: bool = False):
+        """Sets the session's access token, reusing one from token_cache if possible.
+
+        Schedules the next background refresh if background_token_refresh is set.
+        WowApi objects sharing a token_cache refresh a token one at a time, so
+        the first one requests it and the others reuse it.
+
+        Args:
+            force (bool): Refresh even if this object's token is still good. A token
+                in token_cache that isn't about to expire is still reused.
+                Default: False.
+        """
+        with self._token_lock:
+            # Another thread may have refreshed it while this one waited.
+            if not force and self.access_token_expires_at is not None and (
+                time.time() < self.access_token_expires_at - self.token_refresh_margin
+            ):
+                return
+            client_id = self._get_credentials()[0]
+            refresh_lock = (
+                nullcontext() if self.token_cache is None
+                else self.token_cache.refresh_lock(client_id, self.token_region)
             )
-            access_token_response.raise_for_status()
+            with refresh_lock:
+                cached = None
+                if self.token_cache is not None:
+                    cached = self.token_cache.get(client_id, self.token_region, self.token_refresh_margin)
+                if cached is None:
+                    access_token = self._get_access_token()
+                    if self.token_cache is not None:
+                        self.token_cache.set(
+                            client_id, self.token_region, access_token, self.access_token_expires_at
+                        )
+                else:
+                    access_token, self.access_token_expires_at = cached
+            self._params['access_token'] = access_token
+
+            if self.background_token_refresh:
+                if self._token_timer is not None:
+                    self._token_timer.cancel()
+                delay = self.access_token_expires_at - self.token_refresh_margin - time.time()
+                self._token_timer = threading.Timer(max(delay, 0), self._refresh_access_token, (True,))
+                self._token_timer.daemon = True
+                self._token_timer.start()
+
+    def _get(
+        self,
+        url: str,
+        params: dict = None,
+        timeout: int = 30,
+        headers: dict = None,
+        stream: bool = False,
+        record: RequestRecord = None,
+    ):
+        """Makes a GET request with the session and returns the response.
+
+        Every request this object makes goes through here. In a forked child
+        process the session, locks and cache connection are replaced first, see
+        _after_fork(). The access token is refreshed if it is about to expire.
+        Requests to Blizzard's API wait for the rate_limiter.
+
+        Responses with a status in retry_statuses are retried here, after the
+        Retry-After header or an exponential backoff, so each retry also waits
+        for the rate_limiter. urllib3 only retries connection errors.
+
+        Args:
+            url (str): The full url.
+            params (dict, optional): Query parameters added to the session's params.
+            timeout (int): How long until the request to the API timesout in seconds.
+                Default: 30 seconds.
+            headers (dict, optional): Extra request headers.
+            stream (bool): If True the body is not downloaded until it is read.
+                Default: False.
+            record (RequestRecord, optional): Gets the time waited for the
+                rate_limiter, the time until the response's headers arrived, the
+                status and the number of retries.
+
+        Returns:
+            The requests.Response.
+        """
+        if self._pid != os.getpid():
+            self._after_fork()
+        if (
+            self.access_token_expires_at is None
+            or time.time() >= self.access_token_expires_at - self.token_refresh_margin
+        ):
+            self._refresh_access_token()
+        limited = self.rate_limiter is not None and ".api.blizzard.com/" in url
+        started = time.perf_counter()
+        waited = 0
+        for attempt in range(self.retry_total + 1):
+            if limited:
+                wait_started = time.perf_counter()
+                self.rate_limiter.acquire()
+                waited += time.perf_counter() - wait_started
+            response = self.session.get(
+                url, params=params, timeout=timeout, headers=headers, stream=stream
+            )
+            if response.status_code not in self.retry_statuses or attempt == self.retry_total:
+                break
+            response.close()
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                time.sleep(int(retry_after))
+            else:
+                time.sleep(self.backoff_factor * (2 ** attempt))
+        if record is not None:
+            if limited:
+                record.wait_seconds = waited
+            record.response_seconds = time.perf_counter() - started - waited
+            record.status = response.status_code
+            record.retries = attempt + RequestRecord.count_retries(response)
+        return response
+
+    def _get_json(
+        self,
+        url_name: str,
+        namespace: str,
+        timeout: int,
+        params: dict = None,
+        conditional: bool = False,
+        **url_fields,
+    ) -> dict:
+        """Requests one of the urls and returns its json with the Date header added.
+
+        The Last-Modified header of each dynamic url (and its params) is remembered.
+        With conditional=True the remembered value is sent as If-Modified-Since and
+        when Blizzard answers 304 Not Modified no body is downloaded. Instead a
+        small dict is returned:
+        {'not_modified': True, 'Date': ..., 'Last-Modified': ...}
+
+        Args:
+            url_name (str): The key of the url in urls.urls.
+            namespace (str): Either 'static' or 'dynamic'.
+            timeout (int): How long until the request to the API timesout in seconds.
+            params (dict, optional): Extra query parameters.
+            conditional (bool): Send If-Modified-Since if the url was requested
+                before. Default: False.
+            **url_fields: Values used to format the url. Ex: connected_realm_id=4.
+
+        Static urls are loaded from and saved to self.memory_cache then self.cache
+        if they are set.
+
+        Returns:
+            A json looking dict with 'Date' (and 'Last-Modified' if sent) added.
+
+        Raises:
+            requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
+        """
+        with self._recording(url_name) as record:
+            url = urls[url_name].format(region=self.region, **url_fields)
+            params = {"namespace": f"{namespace}-{self.region}", **(params or {})}
+            key = (url, tuple(sorted(params.items())))
+            cached = namespace == "static" and (
+                self.cache is not None or self.memory_cache is not None
+            )
+            if cached:
+                if self._pid != os.getpid():
+                    self._after_fork()
+                cache_key = self._cache_key(url, params)
+                if self.memory_cache is not None:
+                    json = self.memory_cache.get(cache_key)
+                    if json is not None:
+                        record.cache = 'memory'
+                        return json
+                if self.cache is not None:
+                    text = self.cache.get(cache_key)
+                    if text is not None:
+                        record.cache = 'disk'
+                        json = self.json_loads(text)
+                        if self.memory_cache is not None:
+                            self.memory_cache.set(cache_key, json)
+                        return json
+
+            headers = None
+            if conditional and key in self.last_modified:
+                headers = {"If-Modified-Since": self.last_modified[key]}
+
+            response = self._get(url, params=params, timeout=timeout, headers=headers, stream=True, record=record)
+            if response.status_code == 304:
+                response.close()
+                return {
+                    'not_modified': True,
+                    'Date': response.headers['Date'],
+                    'Last-Modified': self.last_modified[key],
+                }
+            try:
+                response.raise_for_status()
+            except Exception:
+                response.close()
+                raise
+            started = time.perf_counter()
+            content = response.content
+            record.download_seconds = time.perf_counter() - started
+            record.bytes = len(content)
+            record.compressed_bytes = response.raw.tell()
+            record.content_encoding = response.headers.get('Content-Encoding')
+            started = time.perf_counter()
+            json = self.json_loads(content)
+            record.decode_seconds = time.perf_counter() - started
+            json['Date'] = response.headers['Date']
+            if 'Last-Modified' in response.headers:
+                json['Last-Modified'] = response.headers['Last-Modified']
+                if namespace == "dynamic":
+                    self.last_modified[key] = response.headers['Last-Modified']
+            if cached:
+                if self.cache is not None:
+                    self.cache.set(cache_key, jsonlib.dumps(json))
+                if self.memory_cache is not None:
+                    self.memory_cache.set(cache_key, json)
+            return json
+
+    @contextmanager
+    def _recording(self, url_name: str):
+        """Yields a RequestRecord for url_name then passes it to each observer.
+
+        The record's total_seconds covers the with block. If the block raises,
+        the exception is saved as the record's error and raised again.
+        """
+        record = RequestRecord(url_name, urls[url_name], self.region)
+        started = time.perf_counter()
+        try:
+            yield record
+        except Exception as error:
+            record.error = error
+            raise
+        finally:
+            record.total_seconds = time.perf_counter() - started
+            for observer in self.observers:
+                observer(record)
+
+    def clear_cache(self):
+        """Empties the memory cache. Use cache.clear() to empty the persistent cache."""
+        if self.memory_cache is not None:
+            self.memory_cache.clear()
+
+    def _cache_key(self, url: str, params: dict) -> str:
+        """Returns the url, params and locale as one string. The access token is left out."""
+        params = {**params, "locale": self._params.get("locale")}
+        return url + "?" + "&".join(f"{key}={value}" for key, value in sorted(params.items()))
+
+    def _stream_json_array(
+        self,
+        url_name: str,
+        key: str,
+        timeout: int,
+        chunk_size: int,
+        conditional: bool = False,
+        **url_fields,
+    ) -> JSONArrayStream:
+        """Requests one of the dynamic urls and returns a stream of the array under key.
+
+        Shares the remembered Last-Modified headers with _get_json().
+
+        Args:
+            url_name (str): The key of the url in urls.urls.
+            key (str): The name of the array in the response. Ex: 'auctions'
+            timeout (int): How long until the request to the API timesout in seconds.
+            chunk_size (int): How many bytes are read from the response at a time.
+            conditional (bool): Send If-Modified-Since if the url was requested
+                before. Default: False.
+            **url_fields: Values used to format the url. Ex: connected_realm_id=4.
+
+        Raises:
+            requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
+        """
+        with self._recording(url_name) as record:
+            url = urls[url_name].format(region=self.region, **url_fields)
+            params = {"namespace": f"dynamic-{self.region}"}
+            last_modified_key = (url, tuple(sorted(params.items())))
+            headers = None
+            if conditional and last_modified_key in self.last_modified:
+                headers = {"If-Modified-Since": self.last_modified[last_modified_key]}
+
+            response = self._get(url, params=params, timeout=timeout, headers=headers, stream=True, record=record)
             try:
-                return access_token_response.json()["access_token"]
-            except KeyError:
-                raise exceptions.JSONChangedError(
-                    "access_token not found in access_token_response."
-                    "The Api's repsonse format may have changed."
-                ) from KeyError
+                response.raise_for_status()
+            except Exception:
+                response.close()
+                raise
+        if response.status_code != 304 and 'Last-Modified' in response.headers:
+            self.last_modified[last_modified_key] = response.headers['Last-Modified']
+        return JSONArrayStream(response, key, chunk_size)
+
+    def _get_icon(self, url_name: str, timeout: int, **url_fields) -> bytes:
+        """Requests a media url then returns the bytes of its first asset."""
+        with self._recording(url_name) as record:
+            response = self._get(
+                urls[url_name].format(region=self.region, **url_fields),
+                params={"namespace": f"static-{self.region}"},
+                timeout=timeout,
+                record=record,
+            )
+            response.raise_for_status()
+            content = self._get(self.json_loads(response.content)["assets"][0]["value"], timeout=timeout).content
+            record.bytes = len(content)
+            return content
 
     def connected_realm_search(self, **extra_params: dict) -> dict:
         """Uses the connected realms API's search functionaly for more specific queries.
@@ -180,6 +655,8 @@ class WowApi:
                 values are str or int like {'_page': 1, 'realms.slug':'illidan', ...}
             **timeout (int, optional): How long (in seconds) until the request to the API timesout
                 Default = 30 seconds. Ex: {'timeout': 10}
+            **conditional (bool, optional): If True only return the results if they
+                changed since the last identical search. Default = False.
             **_pageSize (int, optional): Number of entries in a result page.
                 Default = 100, min = 1, max = 1000. Ex: {"_pageSize": 2}
             **_page (int, optional): The page number that will be returned.
@@ -197,28 +674,9 @@ class WowApi:
             requests.exceptions.HTTPError: Raised on bad status code. Shows the problem causing error and url.
             requests.exceptions.ConnectionError: Raised on network problem. 
         """
-        try:
-            timeout = extra_params.pop("timeout", 30)
-        except KeyError:
-            timeout = 30
-
-        conn_realm_search_params = {
-            **{
-                "namespace": f"dynamic-{self.region}",
-            },
-            **extra_params,
-        }
-
-        response = self.session.get(
-            urls["search_realm"].format(region=self.region),
-            params=conn_realm_search_params,
-            timeout=timeout,
-        )       
-        response.raise_for_status()
-        json = response.json()
-        print(response.headers)
-        json['Date'] = response.headers['Date']
-        return json
+        timeout = extra_params.pop("timeout", 30)
+        conditional = extra_params.pop("conditional", False)
+        return self._get_json("search_realm", "dynamic", timeout, extra_params, conditional)
 
     def item_search(self, **extra_params: dict) -> dict:
         """Uses the items API's search functionality to make more specific queries.
@@ -268,30 +726,89 @@ class WowApi:
         Raises:
             requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
         """
-        try:
-            timeout = extra_params.pop("timeout", 30)
-        except KeyError:
-            timeout = 30
+        timeout = extra_params.pop("timeout", 30)
+        return self._get_json("search_item", "static", timeout, extra_params)
 
-        search_params = {
-            **{
-                "namespace": f"static-{self.region}",
-            },
-            **extra_params
-        }
+    def _iter_search(self, search, filters: dict, max_workers: int):
+        """Yields every result of a search, fetching pages concurrently.
 
-        response = self.session.get(
-            urls["search_item"].format(region=self.region),
-            params=search_params,
-            timeout=timeout,
-        )
-        response.raise_for_status()
-        json = response.json()
-        json['Date'] = response.headers['Date']
-        return json
+        The first page is requested alone to read pageCount. Up to max_workers of
+        the remaining pages are then requested at a time and their results yielded
+        in page order. Searches are ordered by id unless filters has an orderby.
+        Then, if search_page_limit is reached, the search continues from the last
+        id seen with an id range until every result has been yielded.
+
+        Args:
+            search (method): connected_realm_search or item_search.
+            filters (dict): The search's **extra_params.
+            max_workers (int): The max number of pages requested at once.
+        """
+        filters = {"_pageSize": 1000, **filters}
+        by_id = filters.setdefault("orderby", "id") == "id"
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                first = search(**filters, _page=1)
+                results = first["results"]
+                yield from results
+                page_count = min(first.get("pageCount", 1), self.search_page_limit)
+
+                pages = deque()
+                next_page = 2
+                try:
+                    while next_page <= page_count or pages:
+                        while next_page <= page_count and len(pages) < max_workers:
+                            pages.append(executor.submit(search, **filters, _page=next_page))
+                            next_page += 1
+                        page_results = pages.popleft().result()["results"]
+                        yield from page_results
+                        results = page_results or results
+                finally:
+                    for page in pages:
+                        page.cancel()
+
+                if not by_id or first.get("pageCount", 1) <= self.search_page_limit or not results:
+                    return
+                filters["id"] = f"[{results[-1]['data']['id'] + 1},]"
+
+    def iter_connected_realm_search(self, max_workers: int = 8, **filters):
+        """Yields every connected realm search result from every page.
+
+        Args:
+            max_workers (int): The max number of pages requested at once. Default: 8.
+            **filters (optional): The same parameters as connected_realm_search()
+                except _page. _pageSize defaults to 1000 and orderby to 'id'.
+
+        Yields:
+            Each dict in the 'results' of every page, in order.
+
+        Raises:
+            requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
+        """
+        return self._iter_search(self.connected_realm_search, filters, max_workers)
+
+    def iter_item_search(self, max_workers: int = 8, **filters):
+        """Yields every item search result from every page.
+
+        Pages are requested concurrently but yielded in order. Searches with more
+        than 1000 pages are split into id ranges automatically, which requires
+        results to be ordered by id (the default) and no id filter.
+
+        Args:
+            max_workers (int): The max number of pages requested at once. Default: 8.
+            **filters (optional): The same parameters as item_search() except _page.
+                _pageSize defaults to 1000 and orderby to 'id'.
+                Ex: {"name.en_US": "Thunderfury"}
+
+        Yields:
+            Each dict in the 'results' of every page, in order.
+
+        Raises:
+            requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
+        """
+        return self._iter_search(self.item_search, filters, max_workers)
 
     def get_connected_realms_by_id(
-        self, connected_realm_id: int, timeout: int = 30
+        self, connected_realm_id: int, timeout: int = 30, conditional: bool = False
     ) -> dict:
         """Gets all the realms that share a connected_realm id.
 
@@ -299,31 +816,23 @@ class WowApi:
             connected_realm_id (int): The connected realm id. Get from connected_realm_index().
             timeout (int): How long (in seconds) until the request to the API timesout
                 Default = 30 seconds.
+            conditional (bool): If True and this realm was requested before, only
+                return the data if it changed since then. Default = False.
 
         Returns:
             A json looking dict with nested dicts and/or lists containing data from the API.
+            If conditional and the data has not changed a not modified dict is returned.
+            See _get_json().
             
         Raises:
             requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
         """
-        realm_params = {
-            "namespace": f"dynamic-{self.region}",
-            
-            
-        }
-        response = self.session.get(
-            urls["realm"].format(
-                region=self.region, connected_realm_id=connected_realm_id
-            ),
-            params=realm_params,
-            timeout=timeout,
+        return self._get_json(
+            "realm", "dynamic", timeout, conditional=conditional,
+            connected_realm_id=connected_realm_id,
         )
-        response.raise_for_status()
-        json = response.json()
-        json['Date'] = response.headers['Date']
-        return json
 
-    def get_auctions(self, connected_realm_id, timeout=30) -> dict:
+    def get_auctions(self, connected_realm_id, timeout=30, conditional=False, as_snapshot=False) -> dict:
         """Gets all auctions from a realm by its connected_realm_id.
 
         Args:
@@ -331,30 +840,191 @@ class WowApi:
                 Get from connected_realm_index() or use connected_realm_search().
             timeout (int): How long until the request to the API timesout in seconds.
                 Default: 30 seconds.
+            conditional (bool): If True and this realm's auctions were requested before,
+                only download them if they changed since then. Auctions update about
+                once an hour so this makes frequent polling cheap. Default: False.
+            as_snapshot (bool): If True return an AuctionSnapshot, which stores the
+                auctions in compact arrays, instead of the dict. Default: False.
 
         Returns:
             A json looking dict with nested dicts and/or lists containing data from the API.
+            Or an AuctionSnapshot if as_snapshot.
+            If conditional and the auctions have not changed a not modified dict is returned.
+            See _get_json().
             
         Raises:
             requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
         """
-        auction_params = {
-            "namespace": f"dynamic-{self.region}",
-            
-            
-        }
-        response = self.session.get(
-            urls["auction"].format(
-                region=self.region, connected_realm_id=connected_realm_id
-            ),
-            params=auction_params,
-            timeout=timeout,
+        json = self._get_json(
+            "auction", "dynamic", timeout, conditional=conditional,
+            connected_realm_id=connected_realm_id,
         )
-        response.raise_for_status()
-        json = response.json()
-        json['Date'] = response.headers['Date']
+        if as_snapshot and not json.get('not_modified'):
+            return AuctionSnapshot.from_json(json)
         return json
 
+    def iter_auctions(self, connected_realm_id, timeout=30, chunk_size=65536, conditional=False) -> JSONArrayStream:
+        """Streams the auctions from a realm one auction at a time.
+
+        Unlike get_auctions() the response is decoded while it downloads and
+        only one auction dict is held in memory at a time.
+
+        Args:
+            connected_realm_id (int): The connected realm id.
+                Get from connected_realm_index() or use connected_realm_search().
+            timeout (int): How long until the request to the API timesout in seconds.
+                Default: 30 seconds.
+            chunk_size (int): How many bytes are read from the response at a time.
+                Default: 64 KiB.
+            conditional (bool): If True and this realm's auctions were requested before,
+                only download them if they changed since then. Default: False.
+
+        Returns:
+            A JSONArrayStream. Iterate over it to get each auction dict. Its date
+            and last_modified attributes hold the response's headers.
+            If conditional and the auctions have not changed its not_modified
+            attribute is True and it is empty.
+
+        Raises:
+            requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
+            exceptions.JSONChangedError: Raised while iterating if the response has no
+                auctions array or ends early.
+        """
+        return self._stream_json_array(
+            "auction", "auctions", timeout, chunk_size, conditional=conditional,
+            connected_realm_id=connected_realm_id,
+        )
+
+    def get_auctions_body(self, connected_realm_id, timeout=30) -> tuple:
+        """Downloads the auctions from a realm without decoding them.
+
+        Decoding is the slow part of get_auctions(). Getting the body instead
+        lets another process decode it, see pipeline.process_auctions().
+
+        Args:
+            connected_realm_id (int): The connected realm id.
+                Get from connected_realm_index() or use connected_realm_search().
+            timeout (int): How long until the request to the API timesout in seconds.
+                Default: 30 seconds.
+
+        Returns:
+            A tuple (body, date): the json bytes and the response's Date header.
+
+        Raises:
+            requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
+        """
+        with self._recording("auction") as record:
+            response = self._get(
+                urls["auction"].format(region=self.region, connected_realm_id=connected_realm_id),
+                params={"namespace": f"dynamic-{self.region}"},
+                timeout=timeout,
+                stream=True,
+                record=record,
+            )
+            try:
+                response.raise_for_status()
+            except Exception:
+                response.close()
+                raise
+            started = time.perf_counter()
+            content = response.content
+            record.download_seconds = time.perf_counter() - started
+            record.bytes = len(content)
+            record.compressed_bytes = response.raw.tell()
+            record.content_encoding = response.headers.get('Content-Encoding')
+            return content, response.headers.get('Date')
+
+    def get_commodities(self, timeout=30, conditional=False, as_snapshot=False) -> dict:
+        """Gets all commodity auctions in the region.
+
+        Since patch 9.2.7 commodities (herbs, ore, flasks, ...) are sold in one
+        auction house shared by every realm in the region instead of in each
+        realm's. It is the largest response in the API; see iter_commodities()
+        to avoid holding it all in memory.
+
+        Args:
+            timeout (int): How long until the request to the API timesout in seconds.
+                Default: 30 seconds.
+            conditional (bool): If True and the commodities were requested before,
+                only download them if they changed since then. Default: False.
+            as_snapshot (bool): If True return an AuctionSnapshot, which stores the
+                auctions in compact arrays, instead of the dict. Default: False.
+
+        Returns:
+            A json looking dict with nested dicts and/or lists containing data from the API.
+            Or an AuctionSnapshot if as_snapshot.
+            If conditional and the commodities have not changed a not modified dict is returned.
+            See _get_json().
+
+        Raises:
+            requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
+        """
+        json = self._get_json("commodities", "dynamic", timeout, conditional=conditional)
+        if as_snapshot and not json.get('not_modified'):
+            return AuctionSnapshot.from_json(json)
+        return json
+
+    def iter_commodities(self, timeout=30, chunk_size=65536, conditional=False) -> JSONArrayStream:
+        """Streams the commodity auctions in the region one auction at a time.
+
+        Args:
+            timeout (int): How long until the request to the API timesout in seconds.
+                Default: 30 seconds.
+            chunk_size (int): How many bytes are read from the response at a time.
+                Default: 64 KiB.
+            conditional (bool): If True and the commodities were requested before,
+                only download them if they changed since then. Default: False.
+
+        Returns:
+            A JSONArrayStream like iter_auctions().
+            Pass it to AuctionSnapshot.from_stream() to store it compactly.
+
+        Raises:
+            requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
+            exceptions.JSONChangedError: Raised while iterating if the response has no
+                auctions array or ends early.
+        """
+        return self._stream_json_array(
+            "commodities", "auctions", timeout, chunk_size, conditional=conditional,
+        )
+
+    def get_auctions_many(self, connected_realm_ids, max_workers=8, timeout=30):
+        """Gets the auctions from many connected realms concurrently.
+
+        Requests are spread over a pool of max_workers threads which share this
+        object's session (and its connection pool). Results are yielded as each
+        request completes, not in the order of connected_realm_ids. A failed
+        realm is yielded with its exception instead of stopping the other requests.
+
+        Args:
+            connected_realm_ids (iterable): The connected realm ids.
+                Get from connected_realm_index() or use connected_realm_search().
+            max_workers (int): The max number of requests in flight at once.
+                Default: 8.
+            timeout (int): How long until each request to the API timesout in seconds.
+                Default: 30 seconds.
+
+        Yields:
+            A tuple (connected_realm_id, auctions, error). auctions is the same dict
+            get_auctions() returns and error is None on success. On failure
+            auctions is None and error is the raised exception.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.get_auctions, connected_realm_id, timeout): connected_realm_id
+                for connected_realm_id in connected_realm_ids
+            }
+            try:
+                for future in as_completed(futures):
+                    connected_realm_id = futures[future]
+                    try:
+                        yield connected_realm_id, future.result(), None
+                    except Exception as error:
+                        yield connected_realm_id, None, error
+            finally:
+                # If the caller stops early don't start the remaining requests.
+                for future in futures:
+                    future.cancel()
 
     def get_profession_index(self, timeout=30) -> dict:
         """Gets all professions including their names and ids.
@@ -370,20 +1040,7 @@ class WowApi:
         Raises:
             requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
         """
-        prof_params = {
-            "namespace": f"static-{self.region}",
-            
-            
-        }
-        response = self.session.get(
-            urls["profession_index"].format(region=self.region),
-            params=prof_params,
-            timeout=timeout,
-        )
-        response.raise_for_status()
-        json = response.json()
-        json['Date'] = response.headers['Date']
-        return json
+        return self._get_json("profession_index", "static", timeout)
 
     # Includes skill tiers (classic, burning crusade, shadowlands, ...) id
     def get_profession_tiers(self, profession_id, timeout=30) -> dict:
@@ -403,24 +1060,10 @@ class WowApi:
         Raises:
             requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
         """
-        prof_tier_params = {
-            "namespace": f"static-{self.region}",
-            
-            
-        }
-        response = self.session.get(
-            urls["profession_skill_tier"].format(
-                region=self.region, profession_id=profession_id
-            ),
-            params=prof_tier_params,
-            timeout=timeout,
+        return self._get_json(
+            "profession_skill_tier", "static", timeout, profession_id=profession_id
         )
 
-        response.raise_for_status()
-        json = response.json()
-        json['Date'] = response.headers['Date']
-        return json
-
     def get_profession_icon(self, profession_id, timeout=30) -> bytes:
         """Returns a profession's icon in bytes.
 
@@ -435,20 +1078,7 @@ class WowApi:
         Raises:
             requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
         """
-        prof_icon_params = {
-            "namespace": f"static-{self.region}",
-            
-            
-        }
-        response = self.session.get(
-            urls["profession_icon"].format(
-                region=self.region, profession_id=profession_id
-            ),
-            params=prof_icon_params,
-            timeout=timeout,
-        )
-        response.raise_for_status()
-        return self.session.get(response.json()["assets"][0]["value"], timeout=timeout).content
+        return self._get_icon("profession_icon", timeout, profession_id=profession_id)
 
     # Includes the categories (weapon mods, belts, ...) and the recipes (id, name) in them
     def get_profession_tier_categories(
@@ -471,24 +1101,13 @@ class WowApi:
         Raises:
             requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
         """
-        prof_teir_recipe_params = {
-            "namespace": f"static-{self.region}",
-            
-            
-        }
-        response = self.session.get(
-            urls["profession_tier_detail"].format(
-                region=self.region,
-                profession_id=profession_id,
-                skill_tier_id=skill_tier_id,
-            ),
-            params=prof_teir_recipe_params,
-            timeout=timeout,
+        return self._get_json(
+            "profession_tier_detail",
+            "static",
+            timeout,
+            profession_id=profession_id,
+            skill_tier_id=skill_tier_id,
         )
-        response.raise_for_status()
-        json = response.json()
-        json['Date'] = response.headers['Date']
-        return json
 
     def get_recipe(self, recipe_id, timeout=30) -> dict:
         """Returns a recipes details by its id.
@@ -504,19 +1123,7 @@ class WowApi:
         Raises:
             requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
         """
-        response = self.session.get(
-            urls["recipe_detail"].format(region=self.region, recipe_id=recipe_id),
-            params={
-                "namespace": f"static-{self.region}",
-                
-                
-            },
-            timeout=timeout,
-        )
-        response.raise_for_status()
-        json = response.json()
-        json['Date'] = response.headers['Date']
-        return json
+        return self._get_json("recipe_detail", "static", timeout, recipe_id=recipe_id)
 
     def get_recipe_icon(self, recipe_id, timeout=30) -> bytes:
         """Returns a recipes icon in bytes.
@@ -532,18 +1139,7 @@ class WowApi:
         Raises:
             requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
         """
-        response = self.session.get(
-            urls["repice_icon"].format(region=self.region, recipe_id=recipe_id),
-            params={
-                "namespace": f"static-{self.region}",
-                
-                
-            },
-            timeout=timeout,
-        )
-        response.raise_for_status()
-        return self.session.get(response.json()["assets"][0]["value"], timeout=timeout).content
-
+        return self._get_icon("repice_icon", timeout, recipe_id=recipe_id)
 
     def get_item_classes(self, timeout=30) -> dict:
         """Returns all item classes (consumable, container, weapon, ...).
@@ -559,19 +1155,7 @@ class WowApi:
         Raises:
             requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
         """
-        response = self.session.get(
-            urls["item_classes"].format(region=self.region),
-            params={
-                "namespace": f"static-{self.region}",
-                
-                
-            },
-            timeout=timeout,
-        )
-        response.raise_for_status()
-        json = response.json()
-        json['Date'] = response.headers['Date']
-        return json
+        return self._get_json("item_classes", "static", timeout)
 
     # flasks, vantus runes, ...
     def get_item_subclasses(self, item_class_id, timeout=30) -> dict:
@@ -588,21 +1172,9 @@ class WowApi:
         Raises:
             requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
         """
-        response = self.session.get(
-            urls["item_subclass"].format(
-                region=self.region, item_class_id=item_class_id
-            ),
-            params={
-                "namespace": f"static-{self.region}",
-                
-                
-            },
-            timeout=timeout,
+        return self._get_json(
+            "item_subclass", "static", timeout, item_class_id=item_class_id
         )
-        response.raise_for_status()
-        json = response.json()
-        json['Date'] = response.headers['Date']
-        return json
 
     def get_item_set_index(self, timeout=30) -> dict:
         """Returns all item sets. Ex: teir sets
@@ -617,19 +1189,7 @@ class WowApi:
         Raises:
             requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
         """
-        response = self.session.get(
-            urls["item_set_index"].format(region=self.region),
-            params={
-                "namespace": f"static-{self.region}",
-                
-                
-            },
-            timeout=timeout,
-        )
-        response.raise_for_status()
-        json = response.json()
-        json['Date'] = response.headers['Date']
-        return json
+        return self._get_json("item_set_index", "static", timeout)
 
     def get_item_icon(self, item_id, timeout=30) -> bytes:
         """Returns the icon for an item in bytes.
@@ -645,48 +1205,104 @@ class WowApi:
         Raises:
             requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
         """
-        response = self.session.get(
-            urls["item_icon"].format(region=self.region, item_id=item_id),
-            params={
-                "namespace": f"static-{self.region}",
-                
-                
-            },
-            timeout=timeout,
-        )
-        response.raise_for_status()
-        return self.session.get(response.json()["assets"][0]["value"], timeout=timeout).content
+        return self._get_icon("item_icon", timeout, item_id=item_id)
+
+    def download_icons(self, kind: str, ids, store, max_workers: int = 8, timeout: int = 30):
+        """Downloads the icons of many items, recipes or professions into store.
+
+        Both requests for each icon (the media data, then the asset it links to)
+        run concurrently on up to max_workers threads. Assets already in store
+        are not downloaded, and an asset shared by many ids is downloaded once.
 
-    def get_wow_token(self, timeout=30) -> dict:
+        Args:
+            kind (str): 'item', 'recipe' or 'profession'.
+            ids (iterable): The item, recipe or profession ids.
+            store (IconStore): Where the assets are saved.
+            max_workers (int): The max number of requests in flight at once.
+                Default: 8.
+            timeout (int): How long until each request to the API timesout in seconds.
+                Default: 30 seconds.
+
+        Yields:
+            A tuple (id, path, error) as each icon finishes. path is where the icon
+            is saved and error is None on success. On failure path is None and error
+            is the raised exception.
+        """
+        url_name, id_argument = self.icon_urls[kind]
+
+        def download(url):
+            response = self._get(url, timeout=timeout)
+            response.raise_for_status()
+            return store.put(url, response.content)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            media_futures = {
+                executor.submit(
+                    self._get_json, url_name, "static", timeout, **{id_argument: icon_id}
+                ): icon_id
+                for icon_id in ids
+            }
+            # {asset url: future} so shared assets are downloaded once
+            asset_futures = {}
+            # {asset future: [ids waiting for it]}
+            waiting = {}
+            pending = set(media_futures)
+            try:
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future in media_futures:
+                            icon_id = media_futures[future]
+                            try:
+                                url = future.result()["assets"][0]["value"]
+                            except Exception as error:
+                                yield icon_id, None, error
+                                continue
+                            if url in store:
+                                yield icon_id, store.path(url), None
+                                continue
+                            if url not in asset_futures:
+                                asset_futures[url] = executor.submit(download, url)
+                                waiting[asset_futures[url]] = []
+                                pending.add(asset_futures[url])
+                            waiting[asset_futures[url]].append(icon_id)
+                        else:
+                            for icon_id in waiting.pop(future):
+                                try:
+                                    yield icon_id, future.result(), None
+                                except Exception as error:
+                                    yield icon_id, None, error
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def get_wow_token(self, timeout=30, conditional=False) -> dict:
         """Returns the price of the wow token and the timestamp of its last update.
 
         Args:
             timeout (int): How long until the request to the API timesout in seconds.
                 Default: 30 seconds.
+            conditional (bool): If True and the token was requested before, only
+                return the data if it changed since then. Default: False.
 
         Returns:
             A json looking dict with nested dicts and/or lists containing data from the API.
             The price is in the format g*sscc where g=gold, s=silver, and c=copper.
             Ex: 123456 = 12g 34s 56c
+            If conditional and the price has not changed a not modified dict is returned.
+            See _get_json().
             
         Raises:
             requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
         """
-        response = self.session.get(
-            urls["wow_token"].format(region=self.region),
-            params={
-                "namespace": f"dynamic-{self.region}",
-            },
-            timeout=timeout,
-        )
-        response.raise_for_status()
-        json = response.json()
-        json['Date'] = response.headers['Date']
-        return json
+        return self._get_json("wow_token", "dynamic", timeout, conditional=conditional)
 
     def get_connected_realm_index(self, timeout=30) -> dict:
         """Returns a dict where {key = Realm name: value = connected realm id, ...}
 
+        Covers every page of the connected realm search. For lookups by name
+        or realm id, and to save the index to disk, use RealmIndex.
+
         Args:
             timeout (int): How long until the request to the API timesout in seconds.
                 Default: 30 seconds.
@@ -700,9 +1316,7 @@ class WowApi:
 
         index = {}
 
-        response_index = self.connected_realm_search(timeout=timeout)
-        realms_list = response_index["results"]
-        for connected_realms in realms_list:
+        for connected_realms in self.iter_connected_realm_search(timeout=timeout):
             connected_realm_id = get_id_from_url(connected_realms["key"]["href"])
             for realm in connected_realms["data"]["realms"]:
                 index[realm["slug"]] = connected_realm_id
@@ -723,12 +1337,13 @@ class WowApi:
             requests.exceptions.HTTPError: Raised on bad status code.  Shows the problem causing error and url.
         """
 
-        response = self.session.get(urls['item_bonuses'], params={'access_token': None, 'locale': None})
+        response = self._get(urls['item_bonuses'], params={'access_token': None, 'locale': None}, timeout=timeout)
         response.raise_for_status()
-        json = response.json()
+        json = self.json_loads(response.content)
         return json
 
 if __name__ == '__main__':
+    from dotenv import load_dotenv
     load_dotenv()
 
     x = WowApi('us')
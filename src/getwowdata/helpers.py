@@ -1,6 +1,8 @@
 """This module contains functions that preform common tasks."""
+import os
 import re
 import datetime
+import tempfile
 
 def as_gold(amount: int) -> str:
     """Formats a integer as n*g nns nnc where n is some number, g = gold, s = silver, and c = copper.
@@ -49,3 +51,41 @@ def convert_to_datetime(last_modified:str):
     sec = int(nums[4])
 
     return datetime.datetime(year,month,day,hour=hour,minute=min,second=sec)
+
+def atomic_write(path: str, data, mode: int = None):
+    """Writes data to path through a temporary file, replacing path in one step.
+
+    Readers of path see the old file or the new one, never a partial write.
+
+    Args:
+        path (str): The file to write.
+        data (bytes or iterable of bytes): What to write, whole or in chunks.
+        mode (int, optional): The new file's permissions. Default = None which
+            is 0o666 minus the umask, like open() would create it.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if mode is None:
+        # Created like open() creates files, so the kernel applies the umask.
+        # Reading the umask would mean setting it, for every thread at once.
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+        while True:
+            temporary_path = os.path.join(directory, f'.tmp{os.urandom(8).hex()}')
+            try:
+                descriptor = os.open(temporary_path, flags, 0o666)
+                break
+            except FileExistsError:
+                continue
+    else:
+        descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                file.write(data)
+            else:
+                file.writelines(data)
+        if mode is not None:
+            os.chmod(temporary_path, mode)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
@@ -0,0 +1,71 @@
+"""This module contains a local store for icons and other media assets.
+
+Many items share the same icon, and icons rarely change, so each asset is
+saved once under a name made from its url. WowApi.download_icons() skips
+any asset that is already in the store.
+
+Typical usage example:
+
+from getwowdata import WowApi, IconStore
+
+us_api = WowApi('us', 'en_US')
+store = IconStore('icons')
+for item_id, path, error in us_api.download_icons('item', [19019, 35], store):
+    ...
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import hashlib
+import os
+import posixpath
+from urllib.parse import urlsplit
+from getwowdata.helpers import atomic_write
+
+class IconStore:
+    """A directory of assets, each saved under the sha256 of its url.
+
+    Assets are spread over 256 subdirectories named after the first two
+    characters of the hash. The url's file extension is kept.
+
+    Attributes:
+        directory (str): Where the assets are saved.
+    """
+
+    def __init__(self, directory: str):
+        """Creates directory if it doesn't exist.
+
+        Args:
+            directory (str): Where the assets are saved.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, url: str) -> str:
+        """Returns the path the asset at url is saved to."""
+        digest = hashlib.sha256(url.encode()).hexdigest()
+        extension = posixpath.splitext(urlsplit(url).path)[1]
+        return os.path.join(self.directory, digest[:2], digest + extension)
+
+    def __contains__(self, url: str) -> bool:
+        return os.path.exists(self.path(url))
+
+    def get(self, url: str):
+        """Returns the saved asset's bytes or None if it isn't saved."""
+        try:
+            with open(self.path(url), 'rb') as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, url: str, content: bytes) -> str:
+        """Saves content as the asset at url and returns its path.
+
+        Another process reading the store at the same time sees the whole
+        asset or none of it.
+        """
+        path = self.path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write(path, content)
+        return path
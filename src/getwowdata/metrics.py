@@ -0,0 +1,176 @@
+"""This module contains per request timing records and a metrics collector.
+
+WowApi calls each of its observers with a RequestRecord after every call to
+an endpoint. MetricsCollector is an observer that adds the records up into
+counters and histograms and renders them in the Prometheus text format.
+
+Typical usage example:
+
+from getwowdata import WowApi, MetricsCollector
+
+metrics = MetricsCollector()
+us_api = WowApi('us', 'en_US', observers=[metrics])
+us_api.get_auctions(4)
+print(metrics.render()) # Serve this at /metrics for Prometheus to scrape
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import bisect
+import threading
+
+class RequestRecord:
+    """The outcome and timings of one call to an endpoint.
+
+    Timings are in seconds and None if that phase didn't happen, like
+    download_seconds of a cache hit. Streamed responses are recorded once
+    their headers arrive, so their download and decode aren't included.
+
+    Attributes:
+        endpoint (str): The key of the url in urls.urls. Ex: 'auction'
+        url (str): The url template. Ex: 'https://{region}.api.blizzard.com/data/wow/token/index'
+        region (str): Ex: 'us'.
+        status (int): The response's status code or None if no response was received.
+        bytes (int): The size of the decompressed body or None.
+        compressed_bytes (int): The size of the body as received or None.
+            Equal to bytes if it wasn't compressed.
+        content_encoding (str): The response's Content-Encoding header or None.
+        retries (int): How many times the request was retried.
+        cache (str): 'memory' or 'disk' if the response came from a cache, otherwise None.
+        error (Exception): What the call raised or None.
+        wait_seconds (float): Time spent waiting for the rate limiter.
+        response_seconds (float): From sending the request until its headers
+            arrived, including connecting, retries and the server's time but
+            not waiting for the rate limiter.
+        download_seconds (float): Time reading the body.
+        decode_seconds (float): Time decoding the json.
+        total_seconds (float): The whole call.
+    """
+
+    def __init__(self, endpoint: str, url: str, region: str):
+        self.endpoint = endpoint
+        self.url = url
+        self.region = region
+        self.status = None
+        self.bytes = None
+        self.compressed_bytes = None
+        self.content_encoding = None
+        self.retries = 0
+        self.cache = None
+        self.error = None
+        self.wait_seconds = None
+        self.response_seconds = None
+        self.download_seconds = None
+        self.decode_seconds = None
+        self.total_seconds = None
+
+    @staticmethod
+    def count_retries(response) -> int:
+        """Returns how many times urllib3 retried a requests.Response after connection errors."""
+        retries = getattr(response.raw, 'retries', None)
+        return len(getattr(retries, 'history', None) or ())
+
+    def __repr__(self):
+        return (
+            f"RequestRecord(endpoint={self.endpoint!r}, status={self.status!r}, "
+            f"cache={self.cache!r}, total_seconds={self.total_seconds!r})"
+        )
+
+class MetricsCollector:
+    """Counts requests and their timings by endpoint. Thread safe.
+
+    Rendered metrics, with endpoint and region labels:
+        getwowdata_requests_total (counter): Also labeled with status, which is
+            'cache' for cache hits and 'error' if no response was received.
+        getwowdata_retries_total (counter): Retried requests.
+        getwowdata_response_bytes_total (counter): Bytes of response bodies
+            after decompressing them.
+        getwowdata_response_compressed_bytes_total (counter): Bytes of response
+            bodies as received.
+        getwowdata_rate_limit_wait_seconds_total (counter): Time waiting for quota.
+        getwowdata_request_seconds (histogram): Also labeled with phase, one of
+            phases.
+
+    Attributes:
+        buckets (tuple): The histogram's upper bounds in seconds.
+    """
+
+    phases = ('response', 'download', 'decode', 'total')
+    default_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self, buckets=default_buckets):
+        """Creates a collector with no observations.
+
+        Args:
+            buckets (iterable, optional): The histogram's upper bounds in seconds.
+                Default = default_buckets.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # {metric name: {labels tuple: value}}
+        self._counters = {
+            'getwowdata_requests_total': {},
+            'getwowdata_retries_total': {},
+            'getwowdata_response_bytes_total': {},
+            'getwowdata_response_compressed_bytes_total': {},
+            'getwowdata_rate_limit_wait_seconds_total': {},
+        }
+        # {labels tuple: [count per bucket..., count over the last bucket, sum]}
+        self._histogram = {}
+
+    def __call__(self, record: RequestRecord):
+        """Adds a RequestRecord. This is what makes the collector an observer."""
+        labels = (('endpoint', record.endpoint), ('region', record.region))
+        if record.cache is not None:
+            status = 'cache'
+        elif record.status is None:
+            status = 'error'
+        else:
+            status = str(record.status)
+        with self._lock:
+            self._add('getwowdata_requests_total', labels + (('status', status),), 1)
+            self._add('getwowdata_retries_total', labels, record.retries)
+            self._add('getwowdata_response_bytes_total', labels, record.bytes or 0)
+            self._add('getwowdata_response_compressed_bytes_total', labels, record.compressed_bytes or 0)
+            self._add('getwowdata_rate_limit_wait_seconds_total', labels, record.wait_seconds or 0)
+            for phase in self.phases:
+                seconds = getattr(record, f'{phase}_seconds')
+                if seconds is None:
+                    continue
+                values = self._histogram.setdefault(
+                    labels + (('phase', phase),), [0] * (len(self.buckets) + 2)
+                )
+                values[bisect.bisect_left(self.buckets, seconds)] += 1
+                values[-1] += seconds
+
+    def _add(self, name: str, labels: tuple, value: float):
+        counter = self._counters[name]
+        counter[labels] = counter.get(labels, 0) + value
+
+    def render(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, counter in self._counters.items():
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(counter.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+            name = 'getwowdata_request_seconds'
+            lines.append(f"# TYPE {name} histogram")
+            for labels, values in sorted(self._histogram.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), values):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {values[-1]}")
+        return "\n".join(lines) + "\n"
+
+def _format_labels(labels: tuple) -> str:
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
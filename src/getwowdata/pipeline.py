@@ -0,0 +1,123 @@
+"""This module contains a pipeline that processes auctions on every core.
+
+Downloading auctions waits on the network, which threads handle well, but
+decoding and summarizing them is CPU bound and threads share one core. The
+pipeline downloads bodies with threads and hands the raw bytes to a process
+pool, which decodes and summarizes them and returns the small results. Each
+worker process is started fresh (forkserver or spawn) instead of forked from
+this one, so it never inherits the session's connections or held locks.
+
+Typical usage example:
+
+from getwowdata import WowApi, process_auctions
+
+us_api = WowApi('us', 'en_US')
+realm_ids = set(us_api.get_connected_realm_index().values())
+for connected_realm_id, summary, error in process_auctions(us_api, realm_ids):
+    summary['items'][171276] # {'min': 1200, 'p50': 1350, 'mean': 1402.5, 'volume': 8211}
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from getwowdata.auctions import AuctionSnapshot, summarize_auctions
+from getwowdata.decoders import get_json_decoder
+
+def summarize_auction_body(body: bytes, connected_realm_id: int, date: str) -> dict:
+    """Decodes an auctions body and summarizes its prices by item.
+
+    The default function process_auctions() runs in its worker processes.
+
+    Returns:
+        {'connected_realm_id': ..., 'date': ..., 'auctions': number of auctions,
+        'items': summarize_auctions() of the auctions}
+    """
+    snapshot = AuctionSnapshot.from_json(get_json_decoder()(body))
+    return {
+        'connected_realm_id': connected_realm_id,
+        'date': date,
+        'auctions': len(snapshot),
+        'items': summarize_auctions(snapshot),
+    }
+
+def process_auctions(
+    api,
+    connected_realm_ids,
+    function=summarize_auction_body,
+    max_downloads: int = 8,
+    processes: int = None,
+    timeout: int = 30,
+    mp_context=None,
+):
+    """Downloads auctions with threads and processes them in a process pool.
+
+    Downloads stop getting ahead of the workers once a few bodies per worker
+    are waiting, so memory stays bounded however many realms there are.
+    Results are yielded as each realm finishes. A failed realm is yielded with
+    its exception instead of stopping the others.
+
+    Args:
+        api (WowApi): Downloads the auctions.
+        connected_realm_ids (iterable): The connected realm ids.
+        function (callable, optional): Called in a worker process with
+            (body bytes, connected_realm_id, Date header). Its result is sent
+            back, so keep it small. Must be importable by the worker: defined at
+            the top level of a module, not in __main__ of an interactive session.
+            Default = summarize_auction_body.
+        max_downloads (int, optional): The max number of downloads at once. Default = 8.
+        processes (int, optional): The number of worker processes.
+            Default = None which uses one per core.
+        timeout (int, optional): How long until each request to the API timesout
+            in seconds. Default = 30.
+        mp_context (optional): The multiprocessing context workers are started with.
+            Default = None which uses forkserver where available, otherwise spawn.
+
+    Yields:
+        A tuple (connected_realm_id, result, error). error is None on success.
+        On failure result is None and error is the raised exception.
+    """
+    # Imported here so importing getwowdata doesn't import multiprocessing.
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    processes = processes or os.cpu_count() or 1
+    if mp_context is None:
+        methods = multiprocessing.get_all_start_methods()
+        mp_context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    max_waiting = max_downloads + 2 * processes
+    connected_realm_ids = iter(connected_realm_ids)
+    downloads, workers = {}, {}
+    with ThreadPoolExecutor(max_workers=max_downloads) as downloader, \
+            ProcessPoolExecutor(max_workers=processes, mp_context=mp_context) as pool:
+        try:
+            while True:
+                while len(downloads) < max_downloads and len(downloads) + len(workers) < max_waiting:
+                    connected_realm_id = next(connected_realm_ids, None)
+                    if connected_realm_id is None:
+                        break
+                    future = downloader.submit(api.get_auctions_body, connected_realm_id, timeout)
+                    downloads[future] = connected_realm_id
+                if not downloads and not workers:
+                    return
+                done, _ = wait([*downloads, *workers], return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in downloads:
+                        connected_realm_id = downloads.pop(future)
+                        try:
+                            body, date = future.result()
+                        except Exception as error:
+                            yield connected_realm_id, None, error
+                            continue
+                        workers[pool.submit(function, body, connected_realm_id, date)] = connected_realm_id
+                    else:
+                        connected_realm_id = workers.pop(future)
+                        try:
+                            yield connected_realm_id, future.result(), None
+                        except Exception as error:
+                            yield connected_realm_id, None, error
+        finally:
+            # If the caller stops early don't start the remaining work.
+            for future in (*downloads, *workers):
+                future.cancel()
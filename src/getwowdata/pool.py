@@ -0,0 +1,176 @@
+"""This module contains a pool of WowApi clients, one per region.
+
+Separate WowApi objects each open their own connections, request their own
+access token and know nothing of each other's requests. WowApiPool's clients
+share one HTTPAdapter (and its connection pools), one access token (a token
+from any region except 'cn' works in the others) and one RateLimiter, since
+Blizzard's quota is per client id, not per region. sweep() spreads requests
+over the regions in turn so every region progresses while the quota is full.
+
+Typical usage example:
+
+from getwowdata import WowApiPool
+
+world = WowApiPool(('us', 'eu', 'kr', 'tw'), locale={'us': 'en_US', 'eu': 'en_GB'})
+for region, connected_realm_id, auctions, error in world.get_auctions_all():
+    ...
+world['eu'].get_wow_token()
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from getwowdata.getdata import WowApi
+from getwowdata.ratelimit import RateLimiter
+from getwowdata.tokens import TokenCache
+
+def _round_robin(arguments_by_region: dict):
+    """Yields (region, argument) taking one argument from each region in turn."""
+    iterators = deque((region, iter(arguments)) for region, arguments in arguments_by_region.items())
+    while iterators:
+        region, iterator = iterators.popleft()
+        for argument in iterator:
+            yield region, argument
+            iterators.append((region, iterator))
+            break
+
+class WowApiPool:
+    """WowApi clients for many regions sharing connections, a token and a quota.
+
+    Attributes:
+        clients (dict): {region: WowApi}. Also available as pool[region].
+        adapter (HTTPAdapter): Mounted by every client.
+        rate_limiter (RateLimiter): Shared by every client.
+        token_cache (TokenCache): Shared by every client.
+    """
+
+    def __init__(
+        self,
+        regions=('us', 'eu', 'kr', 'tw'),
+        locale=None,
+        wow_api_id: str = None,
+        wow_api_secret: str = None,
+        pool_maxsize: int = 32,
+        rate_limiter=None,
+        token_cache=None,
+        **client_kwargs,
+    ):
+        """Creates a client for each region. Only one access token is requested.
+
+        Args:
+            regions (iterable, optional): Ex: ('us', 'eu'). Default = ('us', 'eu', 'kr', 'tw').
+            locale (str or dict, optional): The locale of every client, or
+                {region: locale}. Regions missing from the dict get None which
+                returns all languages. Default = None.
+            wow_api_id (str, optional): Your client id. Can be an environment variable.
+            wow_api_secret (str, optional): Your client secret. Can be an environment variable.
+            pool_maxsize (int, optional): How many connections to each region's host
+                are kept open. Should be at least the max_workers used with sweep().
+                Default = 32.
+            rate_limiter (RateLimiter, optional): Default = None which creates one
+                with Blizzard's limits.
+            token_cache (TokenCache, optional): Default = None which creates one in memory.
+            **client_kwargs (optional): Passed to each WowApi. Ex: memory_cache_size=1000.
+                background_token_refresh is only given to one client per token, the
+                others reuse the token it refreshes through token_cache.
+        """
+        self.adapter = WowApi.create_adapter(pool_maxsize)
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.token_cache = token_cache if token_cache is not None else TokenCache()
+        regions = list(regions)
+        # Tokens from 'cn' and for 'cn' only work there.
+        shared_token_region = next((region for region in regions if region != 'cn'), None)
+        background_token_refresh = client_kwargs.pop('background_token_refresh', False)
+        refreshed_token_regions = set()
+        self.clients = {}
+        for region in regions:
+            token_region = 'cn' if region == 'cn' else shared_token_region
+            self.clients[region] = WowApi(
+                region,
+                locale.get(region) if isinstance(locale, dict) else locale,
+                wow_api_id,
+                wow_api_secret,
+                rate_limiter=self.rate_limiter,
+                token_cache=self.token_cache,
+                adapter=self.adapter,
+                token_region=token_region,
+                background_token_refresh=(
+                    background_token_refresh and token_region not in refreshed_token_regions
+                ),
+                **client_kwargs,
+            )
+            refreshed_token_regions.add(token_region)
+
+    def __getitem__(self, region: str) -> WowApi:
+        return self.clients[region]
+
+    def __iter__(self):
+        return iter(self.clients)
+
+    def sweep(self, method: str, arguments_by_region: dict, max_workers: int = 16, **kwargs):
+        """Calls a WowApi method for many arguments in many regions concurrently.
+
+        Calls are started one region at a time in turn, so while the rate
+        limiter holds requests back every region gets an equal share of the
+        quota. When a region runs out of arguments the others use its share.
+        Results are yielded as each call completes. A failed call is yielded
+        with its exception instead of stopping the others.
+
+        Args:
+            method (str): The name of the WowApi method. Ex: 'get_auctions'
+            arguments_by_region (dict): {region: iterable of first arguments}.
+                Ex: {'us': [4, 5], 'eu': [1080]}
+            max_workers (int, optional): The max number of calls in flight at once.
+                Default = 16.
+            **kwargs (optional): Passed to each call. Ex: timeout=60.
+
+        Yields:
+            A tuple (region, argument, result, error). error is None on success.
+            On failure result is None and error is the raised exception.
+        """
+        tasks = _round_robin(arguments_by_region)
+        pending = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                while True:
+                    for region, argument in islice(tasks, max_workers - len(pending)):
+                        future = executor.submit(getattr(self.clients[region], method), argument, **kwargs)
+                        pending[future] = (region, argument)
+                    if not pending:
+                        return
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        region, argument = pending.pop(future)
+                        try:
+                            yield region, argument, future.result(), None
+                        except Exception as error:
+                            yield region, argument, None, error
+            finally:
+                # If the caller stops early don't start the remaining calls.
+                for future in pending:
+                    future.cancel()
+
+    def get_auctions_all(self, connected_realm_ids: dict = None, max_workers: int = 16, timeout: int = 30):
+        """Gets the auctions of every connected realm in every region.
+
+        Args:
+            connected_realm_ids (dict, optional): {region: iterable of connected realm ids}.
+                Default = None which uses every connected realm in each client's
+                get_connected_realm_index().
+            max_workers (int, optional): The max number of requests in flight at once.
+                Default = 16.
+            timeout (int, optional): How long until each request to the API timesout
+                in seconds. Default = 30.
+
+        Yields:
+            A tuple (region, connected_realm_id, auctions, error) like sweep().
+        """
+        if connected_realm_ids is None:
+            connected_realm_ids = {
+                region: sorted(set(client.get_connected_realm_index(timeout=timeout).values()), key=int)
+                for region, client in self.clients.items()
+            }
+        return self.sweep('get_auctions', connected_realm_ids, max_workers, timeout=timeout)
@@ -0,0 +1,280 @@
+"""This module contains rate limiters to keep requests under Blizzard's quota.
+
+Blizzard allows each client 100 requests per second and 36,000 per hour. Going
+over returns 429 Too Many Requests. A RateLimiter passed to WowApi makes each
+request wait until it fits in the quota. Share one RateLimiter between WowApi
+objects and threads, or give it a path to share it between processes.
+
+Typical usage example:
+
+from getwowdata import WowApi, RateLimiter
+
+limiter = RateLimiter(path='/tmp/getwowdata.ratelimit')
+us_api = WowApi('us', 'en_US', rate_limiter=limiter)
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import math
+import os
+import struct
+import threading
+import time
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+_STATE = struct.Struct('dd')
+
+def _lock_file(file):
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+def _unlock_file(file):
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _update_file(path: str, state_struct: struct.Struct, default: tuple, update) -> float:
+    """Replaces the state saved at path with update(state), holding the file's lock.
+
+    Args:
+        path (str): The file. Created if missing.
+        state_struct (struct.Struct): How the state is packed.
+        default (tuple): The state if the file is new or holds something else.
+        update (callable): Returns (new state, seconds to wait) from the state.
+
+    Returns:
+        The seconds to wait update returned.
+    """
+    with open(path, 'a+b') as file:
+        _lock_file(file)
+        try:
+            file.seek(0)
+            data = file.read(state_struct.size)
+            state = state_struct.unpack(data) if len(data) == state_struct.size else default
+            state, wait = update(state)
+            file.seek(0)
+            file.truncate()
+            file.write(state_struct.pack(*state))
+            file.flush()
+        finally:
+            _unlock_file(file)
+    return wait
+
+class TokenBucket:
+    """A token bucket that refills rate tokens per second up to capacity.
+
+    Each acquire() takes tokens out, waiting for them to refill if needed.
+    Thread safe. With a path the bucket's state is kept in that file, locked
+    while in use, so every process using the same path shares one bucket.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        capacity (float): The max number of tokens. Also the largest burst.
+        path (str): The file the state is shared through or None.
+    """
+
+    def __init__(self, rate: float, capacity: float = None, path: str = None):
+        """Creates a full bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float, optional): The max number of tokens. Default = rate.
+            path (str, optional): A file to share the bucket between processes.
+                Default = None which only shares it in this process.
+        """
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._tokens = self.capacity
+        self._updated = time.time()
+
+    def _after_fork(self):
+        """Replaces the lock in a forked child, where it may have been copied while held.
+
+        Without a path the child's bucket is a copy, not shared with the parent.
+        """
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+
+    def _take(self, tokens: float, state: tuple):
+        """Returns (new state, seconds to wait) after trying to take tokens from state."""
+        available, updated = state
+        now = time.time()
+        available = min(self.capacity, available + max(now - updated, 0) * self.rate)
+        if available >= tokens:
+            return (available - tokens, now), 0
+        return (available, now), (tokens - available) / self.rate
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """Takes tokens if available.
+
+        Returns:
+            0 if the tokens were taken, otherwise how many seconds until they
+            will be available.
+        """
+        with self._lock:
+            if self.path is None:
+                (self._tokens, self._updated), wait = self._take(
+                    tokens, (self._tokens, self._updated)
+                )
+                return wait
+            return _update_file(
+                self.path,
+                _STATE,
+                (self.capacity, time.time()),
+                lambda state: self._take(tokens, state),
+            )
+
+    def acquire(self, tokens: float = 1):
+        """Takes tokens, sleeping until they are available."""
+        wait = self.try_acquire(tokens)
+        while wait:
+            time.sleep(wait)
+            wait = self.try_acquire(tokens)
+
+class RollingWindow:
+    """Allows at most limit acquisitions in any window seconds long.
+
+    A token bucket as large as its hourly refill lets a full bucket and an
+    hour of refills through in the same hour, twice the limit. Instead,
+    acquisitions are counted in slots of resolution seconds and one is only
+    allowed if the slots overlapping the last window seconds hold fewer than
+    limit. The oldest of those slots starts up to resolution seconds before
+    the window, so the limit is kept slightly early rather than exceeded.
+    Thread safe, and shared between processes through path like TokenBucket.
+
+    Attributes:
+        limit (float): The max acquisitions in any window.
+        window (float): The window's length in seconds.
+        resolution (float): The length of each slot in seconds.
+        path (str): The file the counts are shared through or None.
+    """
+
+    def __init__(self, limit: float, window: float = 3600, resolution: float = 60, path: str = None):
+        """Creates a window with nothing acquired.
+
+        Args:
+            limit (float): The max acquisitions in any window.
+            window (float, optional): The window's length in seconds. Default = 3600.
+            resolution (float, optional): The length of each slot in seconds.
+                Smaller slots waste less of the limit but make each
+                acquisition slower. Default = 60.
+            path (str, optional): A file to share the counts between processes.
+                Default = None which only shares them in this process.
+        """
+        self.limit = limit
+        self.window = window
+        self.resolution = resolution
+        self.path = path
+        self._slots = math.ceil(window / resolution) + 1
+        # (slot number, count) of each slot, at slot number % _slots.
+        self._struct = struct.Struct(f'{2 * self._slots}d')
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._counts = (0.0,) * (2 * self._slots)
+
+    def _after_fork(self):
+        """Replaces the lock in a forked child, where it may have been copied while held.
+
+        Without a path the child's counts are a copy, not shared with the parent.
+        """
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+
+    def _take(self, tokens: float, counts: tuple):
+        """Returns (new counts, seconds to wait) after trying to count tokens in counts."""
+        now = time.time()
+        current = now // self.resolution
+        oldest = current - self._slots + 1
+        used = 0
+        first = None
+        for position in range(self._slots):
+            slot, count = counts[2 * position], counts[2 * position + 1]
+            if slot >= oldest and count:
+                used += count
+                first = slot if first is None else min(first, slot)
+        if used + tokens > self.limit:
+            if first is None:
+                return counts, self.resolution
+            # The first slot stops being counted once _slots newer ones started.
+            return counts, (first + self._slots) * self.resolution - now
+        counts = list(counts)
+        position = int(current % self._slots)
+        if counts[2 * position] != current:
+            counts[2 * position:2 * position + 2] = [current, 0]
+        counts[2 * position + 1] += tokens
+        return tuple(counts), 0
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """Counts tokens if they fit in the limit.
+
+        Returns:
+            0 if the tokens were counted, otherwise how many seconds until the
+            oldest counted slot expires.
+        """
+        with self._lock:
+            if self.path is None:
+                self._counts, wait = self._take(tokens, self._counts)
+                return wait
+            return _update_file(
+                self.path,
+                self._struct,
+                (0.0,) * (2 * self._slots),
+                lambda counts: self._take(tokens, counts),
+            )
+
+    def acquire(self, tokens: float = 1):
+        """Counts tokens, sleeping until they fit in the limit."""
+        wait = self.try_acquire(tokens)
+        while wait:
+            time.sleep(wait)
+            wait = self.try_acquire(tokens)
+
+class RateLimiter:
+    """Keeps requests under both of Blizzard's limits: per second and per hour.
+
+    The hourly limit is a RollingWindow, so no hour long window has more than
+    per_hour requests. The per second limit is a TokenBucket.
+
+    Attributes:
+        buckets (list): The RollingWindow and TokenBucket of the limits.
+    """
+
+    def __init__(self, per_second: int = 100, per_hour: int = 36_000, path: str = None):
+        """Creates a limiter with a RollingWindow per hour and a TokenBucket per second.
+
+        Args:
+            per_second (int, optional): Requests allowed per second. Default = 100.
+            per_hour (int, optional): Requests allowed per hour. Default = 36,000.
+            path (str, optional): A file prefix to share the limits between processes.
+                The files path + '.second' and path + '.hour' are created.
+                Default = None which only shares them in this process.
+        """
+        self.buckets = [
+            RollingWindow(per_hour, 3600, path=path and os.fspath(path) + '.hour'),
+            TokenBucket(per_second, per_second, path and os.fspath(path) + '.second'),
+        ]
+
+    def _after_fork(self):
+        """Replaces the buckets' locks in a forked child."""
+        for bucket in self.buckets:
+            bucket._after_fork()
+
+    def acquire(self):
+        """Waits until one more request fits in every limit then counts it."""
+        for bucket in self.buckets:
+            bucket.acquire()
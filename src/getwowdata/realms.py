@@ -0,0 +1,151 @@
+"""This module contains an index of a region's realms.
+
+Most endpoints take a connected realm id but people know realms by name.
+RealmIndex is built once from every page of the connected realm search and
+looks realms up by slug, localized name, realm id or connected realm id with a
+dict lookup. It is saved to a json file and only rebuilt once it is stale.
+
+Typical usage example:
+
+from getwowdata import WowApi, RealmIndex
+
+us_api = WowApi('us')
+realms = RealmIndex.load_or_build(us_api, 'realms-us.json')
+realms.by_slug['illidan']['connected_realm_id'] # 57
+realms.by_name['mal\'ganis']['slug'] # 'malganis'
+[realm['slug'] for realm in realms.by_connected_realm_id[4]] # ['winterhoof', ...]
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import json
+import time
+from getwowdata.helpers import atomic_write
+
+class RealmIndex:
+    """Every realm in a region and dicts to look them up by.
+
+    Each realm is a dict like
+    {'id': 1, 'slug': 'lightbringer', 'name': 'Lightbringer', 'locale': 'enUS',
+     'timezone': 'America/Los_Angeles', 'type': 'NORMAL', 'category': 'United States',
+     'connected_realm_id': 3, 'population': 'MEDIUM', 'status': 'UP'}
+    name is a {locale: name} dict if the index was built by a WowApi without a
+    locale. population and status belong to the connected realm.
+
+    Attributes:
+        region (str): Ex: 'us'.
+        built_at (float): When the index was built as a unix timestamp.
+        realms (list): The realm dicts.
+        by_slug (dict): {slug: realm}
+        by_name (dict): {lowercase name in every locale: realm}
+        by_realm_id (dict): {realm id: realm}
+        by_connected_realm_id (dict): {connected realm id: [realm, ...]}
+    """
+
+    def __init__(self, region: str, realms: list, built_at: float = None):
+        """Indexes realm dicts.
+
+        Args:
+            region (str): Ex: 'us'.
+            realms (list): Realm dicts like the ones described above.
+            built_at (float, optional): When the realms were requested as a unix
+                timestamp. Default = None which is now.
+        """
+        self.region = region
+        self.realms = realms
+        self.built_at = time.time() if built_at is None else built_at
+        self.by_slug = {}
+        self.by_name = {}
+        self.by_realm_id = {}
+        self.by_connected_realm_id = {}
+        for realm in realms:
+            self.by_slug[realm['slug']] = realm
+            self.by_realm_id[realm['id']] = realm
+            self.by_connected_realm_id.setdefault(realm['connected_realm_id'], []).append(realm)
+            names = realm['name'].values() if isinstance(realm['name'], dict) else (realm['name'],)
+            for name in names:
+                if name:
+                    self.by_name[name.lower()] = realm
+
+    def __len__(self):
+        return len(self.realms)
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self.by_slug
+
+    @classmethod
+    def build(cls, api, max_workers: int = 8, timeout: int = 30):
+        """Returns the index of every realm in api's region.
+
+        Args:
+            api (WowApi): Requests every page of the connected realm search.
+            max_workers (int, optional): The max number of pages requested at once.
+                Default = 8.
+            timeout (int, optional): How long until each request times out in seconds.
+                Default = 30.
+
+        Raises:
+            requests.exceptions.HTTPError: Raised on bad status code.
+        """
+        realms = []
+        for connected_realm in api.iter_connected_realm_search(max_workers=max_workers, timeout=timeout):
+            data = connected_realm['data']
+            for realm in data['realms']:
+                realms.append({
+                    'id': realm['id'],
+                    'slug': realm['slug'],
+                    'name': realm.get('name'),
+                    'locale': realm.get('locale'),
+                    'timezone': realm.get('timezone'),
+                    'type': realm.get('type', {}).get('type'),
+                    'category': realm.get('category'),
+                    'connected_realm_id': data['id'],
+                    'population': data.get('population', {}).get('type'),
+                    'status': data.get('status', {}).get('type'),
+                })
+        return cls(api.region, realms)
+
+    def is_stale(self, max_age: float) -> bool:
+        """Returns True if the index was built more than max_age seconds ago."""
+        return time.time() - self.built_at > max_age
+
+    def save(self, path: str):
+        """Writes the index to a json file, replacing it in one step."""
+        saved = {'region': self.region, 'built_at': self.built_at, 'realms': self.realms}
+        atomic_write(path, json.dumps(saved).encode('utf-8'))
+
+    @classmethod
+    def load(cls, path: str):
+        """Returns the index saved at path by save()."""
+        with open(path, encoding='utf-8') as file:
+            saved = json.load(file)
+        return cls(saved['region'], saved['realms'], saved['built_at'])
+
+    @classmethod
+    def load_or_build(
+        cls, api, path: str, max_age: float = 7 * 24 * 60 * 60, max_workers: int = 8, timeout: int = 30
+    ):
+        """Returns the index saved at path, or builds and saves a new one if it is stale.
+
+        Realms are rarely added or merged, so a week old index is usually
+        still right. Population and status change more often.
+
+        Args:
+            api (WowApi): Used if the index has to be built.
+            path (str): The json file the index is saved to.
+            max_age (float, optional): How many seconds an index is used for.
+                Default = 7 days.
+            max_workers (int, optional): The max number of pages requested at once.
+                Default = 8.
+            timeout (int, optional): How long until each request times out in seconds.
+                Default = 30.
+        """
+        try:
+            index = cls.load(path)
+        except (OSError, ValueError, KeyError):
+            index = None
+        if index is None or index.region != api.region or index.is_stale(max_age):
+            index = cls.build(api, max_workers, timeout)
+            index.save(path)
+        return index
@@ -0,0 +1,243 @@
+"""This module contains a scheduler that polls dynamic endpoints when they change.
+
+Auctions update about once an hour, the WoW token about every 20 minutes and
+realms rarely. Polling them on a fixed interval mostly downloads unchanged
+data or finds changes late. PollingScheduler learns each endpoint's update
+period from its Last-Modified headers and polls shortly after the next
+update is due, using conditional requests so early polls are cheap. Callbacks
+are only called with changed data.
+
+Typical usage example:
+
+from getwowdata import WowApi, PollingScheduler
+
+us_api = WowApi('us', 'en_US')
+scheduler = PollingScheduler()
+scheduler.add('auctions-4', us_api.get_auctions, save_auctions, 4, as_snapshot=True)
+scheduler.add('wow-token', us_api.get_wow_token, print, period=20 * 60)
+scheduler.run() # Calls save_auctions('auctions-4', snapshot) on each update
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import calendar
+import heapq
+import itertools
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from getwowdata.helpers import convert_to_datetime
+
+logger = logging.getLogger(__name__)
+
+def _timestamp(header: str) -> float:
+    """Returns an HTTP date header as a unix timestamp."""
+    return calendar.timegm(convert_to_datetime(header).timetuple())
+
+class _Job:
+    """One endpoint being polled and what has been learned about it."""
+
+    def __init__(self, name, function, callback, args, kwargs, period, on_error):
+        self.name = name
+        self.function = function
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.period = period
+        self.on_error = on_error
+        # Seconds between the last few Last-Modified values.
+        self.periods = deque(maxlen=5)
+        self.last_modified = None
+        self.last_json = None
+        # Server time minus local time, from the Date header.
+        self.clock_offset = 0
+        self.misses = 0
+        self.error = None
+
+class PollingScheduler:
+    """Polls functions like WowApi.get_auctions and calls back when their data changes.
+
+    The period of each job is the median time between its recent
+    Last-Modified values. Until two changes have been seen it is the period
+    passed to add() or, without one, polls are min_interval apart. The next
+    poll is margin seconds after the last change plus the period. If the data
+    hasn't changed by then polls are repeated, min_interval apart at first
+    and doubling up to max_interval.
+
+    Attributes:
+        min_interval (float): The shortest time between polls of a job in seconds.
+        max_interval (float): The longest time between polls of a job in seconds.
+        margin (float): How long after an expected update to poll in seconds.
+        jobs (dict): {name: job} of the jobs added.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 60,
+        max_interval: float = 60 * 60,
+        margin: float = 15,
+        clock=time.time,
+    ):
+        """Creates a scheduler with no jobs.
+
+        Args:
+            min_interval (float, optional): The shortest time between polls of a job
+                in seconds. Default = 60.
+            max_interval (float, optional): The longest time between polls of a job
+                in seconds. Default = 3600.
+            margin (float, optional): How long after an expected update to poll in
+                seconds. Default = 15.
+            clock (callable, optional): Returns the current unix time. Default = time.time.
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.margin = margin
+        self.clock = clock
+        self.jobs = {}
+        # (due, tie breaker, job). Entries of removed or replaced jobs are skipped.
+        self._queue = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def add(self, name: str, function, callback, *args, period: float = None, on_error=None, **kwargs):
+        """Adds a job that is polled right away.
+
+        Args:
+            name (str): A unique name for the job.
+            function (callable): Called with (*args, conditional=True, **kwargs).
+                It must return a dict with the 'Date' and (if modified) 'Last-Modified'
+                headers, or an object with date and last_modified attributes, like
+                WowApi's get_auctions, get_commodities, get_wow_token and
+                get_connected_realms_by_id do.
+            callback (callable): Called with (name, result) when the result changed.
+            *args (optional): Passed to function. Ex: a connected realm id.
+            period (float, optional): A guess of how often the data updates in seconds,
+                used until it is learned. Default = None.
+            on_error (callable, optional): Called with (name, exception) when
+                function or callback raises. Default = None which logs the error.
+                The job keeps being polled either way.
+            **kwargs (optional): Passed to function. Ex: timeout=60.
+
+        Raises:
+            ValueError: If a job with the same name was already added.
+        """
+        with self._lock:
+            if name in self.jobs:
+                raise ValueError(f"A job named {name!r} was already added.")
+            job = _Job(name, function, callback, args, kwargs, period, on_error)
+            self.jobs[name] = job
+            heapq.heappush(self._queue, (self.clock(), next(self._counter), job))
+
+    def remove(self, name: str):
+        """Stops polling a job."""
+        with self._lock:
+            del self.jobs[name]
+
+    def _poll(self, job: _Job) -> float:
+        """Polls a job, calls back if it changed and returns when to poll it next."""
+        now = self.clock()
+        try:
+            result = job.function(*job.args, conditional=True, **job.kwargs)
+        except Exception as error:
+            job.misses += 1
+            self._report(job, error)
+            return now + self._retry_delay(job)
+        job.error = None
+
+        if isinstance(result, dict):
+            date = result.get('Date')
+            last_modified = result.get('Last-Modified')
+            not_modified = result.get('not_modified', False)
+        else:
+            date = getattr(result, 'date', None)
+            last_modified = getattr(result, 'last_modified', None)
+            not_modified = getattr(result, 'not_modified', False)
+        if date is not None:
+            job.clock_offset = _timestamp(date) - now
+
+        if last_modified is None:
+            # Without Last-Modified compare the data itself.
+            changed = not not_modified and (
+                not isinstance(result, dict)
+                or {key: value for key, value in result.items() if key != 'Date'} != job.last_json
+            )
+            if changed and isinstance(result, dict):
+                job.last_json = {key: value for key, value in result.items() if key != 'Date'}
+        else:
+            changed = not not_modified and last_modified != job.last_modified
+
+        if not changed:
+            job.misses += 1
+            return now + self._retry_delay(job)
+
+        job.misses = 0
+        if last_modified is not None:
+            modified_at = _timestamp(last_modified)
+            if job.last_modified is not None:
+                job.periods.append(modified_at - _timestamp(job.last_modified))
+            job.last_modified = last_modified
+        try:
+            job.callback(job.name, result)
+        except Exception as error:
+            self._report(job, error)
+
+        period = statistics.median(job.periods) if job.periods else job.period
+        if period is None or last_modified is None:
+            return now + max(self.min_interval, min(period or 0, self.max_interval))
+        # Local time of the next expected update.
+        expected = modified_at + period - job.clock_offset
+        return max(expected + self.margin, now + self.min_interval)
+
+    def _report(self, job: _Job, error: Exception):
+        """Passes an error of a job's function or callback to on_error, or logs it."""
+        job.error = error
+        if job.on_error is not None:
+            try:
+                job.on_error(job.name, error)
+                return
+            except Exception as on_error_error:
+                error = on_error_error
+        logger.error("Polling job %r raised an error.", job.name, exc_info=error)
+
+    def _retry_delay(self, job: _Job) -> float:
+        return min(self.min_interval * 2 ** max(job.misses - 1, 0), self.max_interval)
+
+    def run_pending(self) -> float:
+        """Polls every job that is due.
+
+        Returns:
+            Seconds until the next job is due, or None if there are no jobs.
+        """
+        while True:
+            with self._lock:
+                if not self._queue:
+                    return None
+                due, _, job = self._queue[0]
+                if self.jobs.get(job.name) is not job:
+                    heapq.heappop(self._queue)
+                    continue
+                wait = due - self.clock()
+                if wait > 0:
+                    return wait
+                heapq.heappop(self._queue)
+            next_poll = self._poll(job)
+            with self._lock:
+                if self.jobs.get(job.name) is job:
+                    heapq.heappush(self._queue, (next_poll, next(self._counter), job))
+
+    def run(self):
+        """Polls jobs as they are due until stop() is called or no jobs are left."""
+        self._stop.clear()
+        while not self._stop.is_set():
+            wait = self.run_pending()
+            if wait is None:
+                return
+            self._stop.wait(wait)
+
+    def stop(self):
+        """Makes run() return. Safe to call from another thread or a callback."""
+        self._stop.set()
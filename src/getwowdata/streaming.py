@@ -0,0 +1,144 @@
+"""This module contains a parser for reading one array out of streamed json.
+
+Auction responses are tens of megabytes. Decoding them with response.json()
+holds the whole body and every auction dict in memory at once. The functions
+here decode the 'auctions' array one item at a time as the body downloads, so
+memory use stays about the same no matter how big the auction house is.
+
+Typical usage example:
+
+from getwowdata import WowApi
+
+us_api = WowApi('us', 'en_US')
+with us_api.iter_auctions(4) as auctions:
+    for auction in auctions:
+        ...
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import codecs
+import json
+import re
+from getwowdata import exceptions
+
+_SEPARATORS = re.compile(r'[\s,]*')
+_DELIMITERS = frozenset(',] \t\r\n')
+# What can follow the part of a number raw_decode accepted, if the number is cut off.
+_NUMBER_TAIL = re.compile(r'[0-9eE.+-]*')
+
+def iter_json_array(chunks, key: str):
+    """Yields each item of the array stored under key from chunks of json.
+
+    Only the first '"key": [' found is read. Everything before it is skipped
+    and everything after the closing ']' is never read.
+
+    Args:
+        chunks (iterable): bytes of a utf-8 json document in order.
+            Ex: response.iter_content(65536)
+        key (str): The name of the array. Ex: 'auctions'
+
+    Yields:
+        Each decoded item of the array.
+
+    Raises:
+        exceptions.JSONChangedError: If key is not found or the json ends early.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    # The start of a match cut off at the end of the buffer, after the key's quotes.
+    partial_start = re.compile(r'"%s"\s*(?::\s*)?\Z' % re.escape(key))
+    chunks = iter(chunks)
+
+    buffer = ''
+    for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+        match = start.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        # Keep the end in case the match is split between chunks: the key and
+        # any whitespace after it, or enough characters for part of the key.
+        partial = partial_start.search(buffer)
+        buffer = buffer[partial.start():] if partial else buffer[-(len(key) + 2):]
+    else:
+        raise exceptions.JSONChangedError(
+            f"'{key}' array not found in the response."
+            "The Api's repsonse format may have changed."
+        )
+
+    position = 0
+    while True:
+        position = _SEPARATORS.match(buffer, position).end()
+        if position < len(buffer):
+            if buffer[position] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The item is cut off at the end of the buffer. Read more below.
+                pass
+            else:
+                # raw_decode accepts a number cut off at the end of the buffer,
+                # like 12 of 1234 or 1.5 of 1.5e3, so only items followed by a
+                # delimiter are whole.
+                if end < len(buffer) and buffer[end] in _DELIMITERS:
+                    yield item
+                    position = end
+                    continue
+                if not _NUMBER_TAIL.fullmatch(buffer, end):
+                    raise exceptions.JSONChangedError(
+                        f"Unexpected {buffer[end]!r} after an item of the '{key}' array."
+                    )
+        chunk = next(chunks, None)
+        if chunk is None:
+            raise exceptions.JSONChangedError(
+                f"The response ended before the '{key}' array was closed."
+            )
+        buffer = buffer[position:] + text_decoder.decode(chunk)
+        position = 0
+
+class JSONArrayStream:
+    """Iterates over one array of a streamed response without loading the whole body.
+
+    The response's connection is released once iteration finishes. Use close()
+    or a with statement to release it when stopping early.
+
+    Attributes:
+        response (requests.Response): The response, requested with stream=True.
+        key (str): The name of the array. Ex: 'auctions'
+        chunk_size (int): How many bytes are read from the response at a time.
+        date (str): The response's Date header.
+        last_modified (str): The response's Last-Modified header or None.
+        not_modified (bool): True if the response was 304 Not Modified. The
+            stream is then empty.
+    """
+
+    def __init__(self, response, key: str, chunk_size: int = 65536):
+        self.response = response
+        self.key = key
+        self.chunk_size = chunk_size
+        self.date = response.headers.get('Date')
+        self.last_modified = response.headers.get('Last-Modified')
+        self.not_modified = response.status_code == 304
+
+    def __iter__(self):
+        if self.not_modified:
+            self.close()
+            return
+        try:
+            yield from iter_json_array(self.response.iter_content(self.chunk_size), self.key)
+        finally:
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Releases the response's connection."""
+        self.response.close()
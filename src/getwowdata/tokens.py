@@ -0,0 +1,115 @@
+"""This module contains a cache of OAuth access tokens.
+
+Each WowApi requests an access token when created. Tokens last a day, so
+short lived processes can reuse one instead of asking for a new one each time.
+A TokenCache shared by WowApi objects hands out the same token until it is
+about to expire. With a path the tokens are saved to a file and reused by
+other processes too.
+
+Typical usage example:
+
+from getwowdata import WowApi, TokenCache
+
+tokens = TokenCache('~/.getwowdata_tokens.json')
+us_api = WowApi('us', 'en_US', token_cache=tokens) # Requests a token
+us_api = WowApi('us', 'en_US', token_cache=tokens) # Reuses it
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import json
+import os
+import threading
+import time
+from getwowdata.helpers import atomic_write
+
+class TokenCache:
+    """Access tokens and when they expire, keyed by client id and region.
+
+    Attributes:
+        path (str): The json file tokens are saved to or None.
+    """
+
+    def __init__(self, path: str = None):
+        """Creates an empty cache, or loads the tokens saved at path.
+
+        Args:
+            path (str, optional): A json file to save tokens to so other processes
+                can reuse them. Only readable by the current user.
+                Default = None which keeps them in memory.
+        """
+        self.path = os.path.expanduser(path) if path else None
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._tokens = {}
+        # {key: lock held while the token is being refreshed}
+        self._refresh_locks = {}
+
+    def _after_fork(self):
+        """Replaces the lock in a forked child, where it may have been copied while held."""
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._refresh_locks = {}
+            self._pid = os.getpid()
+
+    def _load(self):
+        """Merges the tokens saved at path into memory."""
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                self._tokens.update(json.load(file))
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        """Writes the tokens to path, replacing the file in one step."""
+        # Only the owner can read the tokens.
+        atomic_write(self.path, json.dumps(self._tokens).encode('utf-8'), mode=0o600)
+
+    @staticmethod
+    def _key(client_id: str, region: str) -> str:
+        return f"{client_id}:{region}"
+
+    def refresh_lock(self, client_id: str, region: str) -> threading.Lock:
+        """Returns the lock held while a token is refreshed, so only one thread requests it.
+
+        The lock only works within one process.
+        """
+        with self._lock:
+            return self._refresh_locks.setdefault(self._key(client_id, region), threading.Lock())
+
+    def get(self, client_id: str, region: str, margin: float = 0):
+        """Returns (access_token, expires_at) or None if missing or expiring.
+
+        Args:
+            client_id (str): The wow_api_id the token belongs to.
+            region (str): The region the token was requested from.
+            margin (float, optional): Tokens expiring within margin seconds are
+                treated as missing. Default = 0.
+        """
+        with self._lock:
+            if self.path is not None:
+                self._load()
+            token = self._tokens.get(self._key(client_id, region))
+        if token is None or token['expires_at'] - margin <= time.time():
+            return None
+        return token['access_token'], token['expires_at']
+
+    def set(self, client_id: str, region: str, access_token: str, expires_at: float):
+        """Saves a token.
+
+        Args:
+            client_id (str): The wow_api_id the token belongs to.
+            region (str): The region the token was requested from.
+            access_token (str): The token.
+            expires_at (float): When the token expires as a unix timestamp.
+        """
+        with self._lock:
+            if self.path is not None:
+                self._load()
+            self._tokens[self._key(client_id, region)] = {
+                'access_token': access_token,
+                'expires_at': expires_at,
+            }
+            if self.path is not None:
+                self._save()
@@ -4,6 +4,7 @@ urls = {
         "connected_realm_index": "https://{region}.api.blizzard.com/data/wow/connected-realm/index",
         "realm": "https://{region}.api.blizzard.com/data/wow/connected-realm/{connected_realm_id}",
         "auction": "https://{region}.api.blizzard.com/data/wow/connected-realm/{connected_realm_id}/auctions",
+        "commodities": "https://{region}.api.blizzard.com/data/wow/auctions/commodities",
         "profession_index": "https://{region}.api.blizzard.com/data/wow/profession/index",
         "profession_skill_tier": "https://{region}.api.blizzard.com/data/wow/profession/{profession_id}",
         "profession_tier_detail": "https://{region}.api.blizzard.com/data/wow/profession/{profession_id}/skill-tier/{skill_tier_id}",
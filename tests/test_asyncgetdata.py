@@ -0,0 +1,154 @@
+"""This module contains tests for AsyncWowApi.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import asyncio
+import re
+import unittest
+try:
+    from aioresponses import aioresponses
+except ImportError:
+    aioresponses = None
+import getwowdata
+from getwowdata import AsyncWowApi
+from getwowdata.exceptions import JSONChangedError
+from getwowdata.urls import urls
+
+
+@unittest.skipIf(aioresponses is None, "aiohttp and aioresponses are required")
+class TestAsyncWowApiMethods(unittest.IsolatedAsyncioTestCase):
+    """Test that AsyncWowApi methods return the same data as WowApi."""
+
+    region = "us"
+
+    def mock_token(self, mocked, json=None):
+        mocked.post(
+            urls["access_token"].format(region=self.region),
+            payload=json or {"access_token": "0000000000000000000000000000000000"},
+        )
+
+    def make_api(self):
+        return AsyncWowApi(
+            self.region,
+            locale="en_US",
+            wow_api_id="wow_api_id",
+            wow_api_secret="wow_api_secret",
+        )
+
+    async def test_get_access_token_raises_JSONChangedError(self):
+        """Test that a missing access_token raises JSONChangedError."""
+        with aioresponses() as mocked:
+            self.mock_token(mocked, {"access_token_not_found": "0"})
+            with self.assertRaises(JSONChangedError):
+                async with self.make_api():
+                    pass
+
+    async def test_get_auctions(self):
+        """Assert that get_auctions returns the proper value."""
+        with aioresponses() as mocked:
+            self.mock_token(mocked)
+            mocked.get(
+                re.compile(re.escape(urls["auction"].format(region=self.region, connected_realm_id=4))),
+                payload={"sucess": "Test worked"},
+                headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'},
+            )
+            async with self.make_api() as wow_api:
+                self.assertEqual(
+                    await wow_api.get_auctions(4),
+                    {"sucess": "Test worked", 'Date':'Mon, 27 Jun 2022 18:28:56 GMT'},
+                )
+
+    async def test_get_item_icon(self):
+        """Assert that get_item_icon returns the proper value."""
+        with aioresponses() as mocked:
+            self.mock_token(mocked)
+            mocked.get(
+                re.compile(re.escape(urls["item_icon"].format(region=self.region, item_id=1))),
+                payload={"assets": [{"value": urls["icon_test"]}]},
+                headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'},
+            )
+            mocked.get(urls["icon_test"], body=b"test")
+            async with self.make_api() as wow_api:
+                self.assertEqual(await wow_api.get_item_icon(1), b"test")
+
+    async def test_retries_server_errors(self):
+        """Assert that 5XX responses are retried."""
+        with aioresponses() as mocked:
+            self.mock_token(mocked)
+            url = re.compile(re.escape(urls["wow_token"].format(region=self.region)))
+            mocked.get(url, status=503)
+            mocked.get(
+                url,
+                payload={"price": 1},
+                headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'},
+            )
+            async with self.make_api() as wow_api:
+                self.assertEqual(
+                    await wow_api.get_wow_token(),
+                    {"price": 1, 'Date':'Mon, 27 Jun 2022 18:28:56 GMT'},
+                )
+
+    async def test_refreshes_expiring_token(self):
+        """Assert that a token about to expire is replaced before the next request."""
+        with aioresponses() as mocked:
+            self.mock_token(mocked, {"access_token": "first", "expires_in": 60})
+            self.mock_token(mocked, {"access_token": "second", "expires_in": 86400})
+            url = re.compile(re.escape(urls["wow_token"].format(region=self.region)))
+            for _ in range(2):
+                mocked.get(url, payload={"price": 1}, headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'})
+            async with self.make_api() as wow_api:
+                self.assertEqual(wow_api.access_token, "first")
+                await wow_api.get_wow_token()
+                self.assertEqual(wow_api.access_token, "second")
+                await wow_api.get_wow_token()
+                self.assertEqual(wow_api.access_token, "second")
+
+    async def test_get_connected_realm_index(self):
+        """Assert that get_connected_realm_index reads every page."""
+        with aioresponses() as mocked:
+            self.mock_token(mocked)
+            search_url = re.escape(urls["search_realm"].format(region=self.region))
+            for page in (1, 2):
+                mocked.get(
+                    re.compile(search_url + rf".*[?&]_page={page}(&|$)"),
+                    payload={
+                        "pageCount": 2,
+                        "results": [{"key": {"href": str(page)}, "data": {"realms": [{"slug": f"realm-{page}"}]}}],
+                    },
+                    headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'},
+                )
+            async with self.make_api() as wow_api:
+                self.assertEqual(
+                    await wow_api.get_connected_realm_index(),
+                    {"realm-1": "1", "realm-2": "2"},
+                )
+
+
+class TestAsyncWowApiImports(unittest.TestCase):
+    """Test that AsyncWowApi can be made outside an event loop and imports nothing publicly."""
+
+    def test_no_placeholders_exported(self):
+        """Assert that the lazily imported modules aren't exported by the package."""
+        self.assertFalse(hasattr(getwowdata, "asyncio"))
+        self.assertFalse(hasattr(getwowdata, "aiohttp"))
+
+    @unittest.skipIf(aioresponses is None, "aiohttp and aioresponses are required")
+    def test_created_outside_event_loop(self):
+        """Assert that an AsyncWowApi made before the event loop runs can be used in it."""
+        wow_api = AsyncWowApi("us", locale="en_US", wow_api_id="wow_api_id", wow_api_secret="wow_api_secret")
+
+        async def main():
+            with aioresponses() as mocked:
+                mocked.post(
+                    urls["access_token"].format(region="us"),
+                    payload={"access_token": "0000000000000000000000000000000000"},
+                )
+                async with wow_api:
+                    return wow_api.access_token
+
+        self.assertEqual(asyncio.run(main()), "0000000000000000000000000000000000")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,253 @@
+"""This module contains tests for auctions.py.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import json
+import os
+import struct
+import sys
+import tempfile
+import unittest
+from unittest import mock
+try:
+    import numpy
+except ImportError:
+    numpy = None
+from getwowdata import auctions
+from getwowdata.auctions import AuctionDiff, AuctionSnapshot, diff_snapshots, summarize_auctions
+
+AUCTIONS_JSON = {
+    "connected_realm": {"href": "https://us.api.blizzard.com/data/wow/connected-realm/4?namespace=dynamic-us"},
+    "auctions": [
+        {"id": 1, "item": {"id": 10}, "quantity": 20, "unit_price": 5, "time_left": "SHORT"},
+        {"id": 2, "item": {"id": 10}, "quantity": 5, "unit_price": 7, "time_left": "LONG"},
+        {"id": 3, "item": {"id": 11, "bonus_lists": [1]}, "quantity": 1, "buyout": 300, "bid": 200, "time_left": "VERY_LONG"},
+        {"id": 4, "item": {"id": 12}, "quantity": 2, "bid": 40, "time_left": "MEDIUM"},
+    ],
+    "Date": "Mon, 27 Jun 2022 18:28:56 GMT",
+}
+
+
+class TestAuctionSnapshot(unittest.TestCase):
+    """Test that AuctionSnapshot stores auctions as columns."""
+
+    def test_from_json(self):
+        """Assert that the columns and metadata match the json."""
+        snapshot = AuctionSnapshot.from_json(AUCTIONS_JSON)
+
+        self.assertEqual(len(snapshot), 4)
+        self.assertEqual(snapshot.connected_realm_id, 4)
+        self.assertEqual(snapshot.date, "Mon, 27 Jun 2022 18:28:56 GMT")
+        self.assertEqual(list(snapshot.item_id), [10, 10, 11, 12])
+        self.assertEqual(list(snapshot.buyout), [0, 0, 300, 0])
+        self.assertEqual(list(snapshot.time_left), [0, 2, 3, 1])
+        self.assertEqual(
+            next(iter(snapshot)),
+            {"id": 1, "item_id": 10, "quantity": 20, "unit_price": 5, "buyout": 0, "bid": 0, "time_left": 0},
+        )
+
+    def test_prices(self):
+        """Assert that prices fall back from unit_price to buyout to bid per item."""
+        snapshot = AuctionSnapshot.from_json(AUCTIONS_JSON)
+
+        self.assertEqual(list(snapshot.prices()), [5, 7, 300, 20])
+        self.assertEqual(list(snapshot.iter_items())[3], (12, 2, 20))
+
+    @unittest.skipIf(numpy is None, "numpy is required")
+    def test_to_numpy(self):
+        """Assert that to_numpy shares memory with the arrays."""
+        snapshot = AuctionSnapshot.from_json(AUCTIONS_JSON)
+        columns = snapshot.to_numpy()
+
+        self.assertEqual(columns["unit_price"].tolist(), [5, 7, 0, 0])
+        snapshot.unit_price[0] = 6
+        self.assertEqual(columns["unit_price"][0], 6)
+
+
+class TestSnapshotFiles(unittest.TestCase):
+    """Test saving and loading snapshots."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "4.snapshot")
+        self.snapshot = AuctionSnapshot.from_json(AUCTIONS_JSON)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_loaded(self, loaded):
+        self.assertEqual(list(loaded), list(self.snapshot))
+        self.assertEqual(loaded.date, self.snapshot.date)
+        self.assertEqual(loaded.connected_realm_id, 4)
+        self.assertEqual(summarize_auctions(loaded), summarize_auctions(self.snapshot))
+
+    def test_compressed(self):
+        """Assert that a compressed snapshot loads back into arrays."""
+        self.snapshot.save(self.path)
+        loaded = AuctionSnapshot.load(self.path)
+
+        self.assert_loaded(loaded)
+        self.assertEqual(loaded.time_left.typecode, "b")
+
+    def test_memory_mapped(self):
+        """Assert that an uncompressed snapshot loads back as memoryviews of the file."""
+        self.snapshot.save(self.path, compress=False)
+        loaded = AuctionSnapshot.load(self.path)
+
+        self.assert_loaded(loaded)
+        self.assertIsInstance(loaded.id, memoryview)
+
+    def test_little_endian(self):
+        """Assert that columns are saved little endian on any host and load back on it."""
+        self.snapshot.save(self.path, compress=False)
+        with open(self.path, "rb") as file:
+            file.seek(len(auctions._MAGIC))
+            (header_length,) = struct.unpack("<I", file.read(4))
+            header = json.loads(file.read(header_length))
+            name, typecode, offset, size = header["columns"][0]
+            file.seek(offset, os.SEEK_CUR)
+            ids = struct.unpack(f"<{size // 8}q", file.read(size))
+        self.assertEqual(header["byteorder"], "little")
+        self.assertEqual((name, list(ids)), ("id", [1, 2, 3, 4]))
+
+        # On a big endian host the columns are swapped when saved and loaded.
+        with mock.patch.object(sys, "byteorder", "big"):
+            for compress in (True, False):
+                with self.subTest(compress=compress):
+                    self.snapshot.save(self.path, compress=compress)
+                    self.assert_loaded(AuctionSnapshot.load(self.path))
+
+    @unittest.skipIf(os.name == "nt", "Windows has no umask permissions")
+    def test_permissions(self):
+        """Assert that saved snapshots get the permissions open() would give them."""
+        umask = os.umask(0o022)
+        try:
+            self.snapshot.save(self.path)
+        finally:
+            os.umask(umask)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o644)
+
+    def test_unknown_byte_order(self):
+        """Assert that a header with another byte order raises ValueError."""
+        self.snapshot.save(self.path)
+        with open(self.path, "rb") as file:
+            data = file.read()
+        with open(self.path, "wb") as file:
+            file.write(data.replace(b'"byteorder": "little"', b'"byteorder": "big!!!"'))
+        with self.assertRaises(ValueError):
+            AuctionSnapshot.load(self.path)
+
+    def test_not_a_snapshot(self):
+        """Assert that other files raise ValueError."""
+        with open(self.path, "wb") as file:
+            file.write(b"{}")
+        with self.assertRaises(ValueError):
+            AuctionSnapshot.load(self.path)
+
+class TestSummarizeAuctions(unittest.TestCase):
+    """Test that summarize_auctions returns the same statistics with and without numpy."""
+
+    expected = {
+        10: {"min": 5, "p50": 5, "p90": 7, "mean": 135 / 25, "volume": 25},
+        11: {"min": 300, "p50": 300, "p90": 300, "mean": 300.0, "volume": 1},
+        12: {"min": 20, "p50": 20, "p90": 20, "mean": 20.0, "volume": 2},
+    }
+
+    def test_summarize_python(self):
+        """Assert the statistics computed in python."""
+        snapshot = AuctionSnapshot.from_json(AUCTIONS_JSON)
+        self.assertEqual(auctions._summarize_python(snapshot, (50, 90)), self.expected)
+
+    @unittest.skipIf(numpy is None, "numpy is required")
+    def test_summarize_numpy(self):
+        """Assert the statistics computed with numpy."""
+        snapshot = AuctionSnapshot.from_json(AUCTIONS_JSON)
+        self.assertEqual(auctions._summarize_numpy(snapshot, (50, 90)), self.expected)
+
+    def test_summarize_dict(self):
+        """Assert that a get_auctions() dict is accepted and unpriced auctions are skipped."""
+        json = {"auctions": AUCTIONS_JSON["auctions"] + [{"id": 5, "item": {"id": 13}}]}
+        self.assertEqual(summarize_auctions(json, (50, 90)), self.expected)
+        self.assertEqual(summarize_auctions({"auctions": []}), {})
+
+    def test_zero_quantity(self):
+        """Assert that auctions with a quantity of 0 are skipped by both implementations."""
+        json = {"auctions": AUCTIONS_JSON["auctions"] + [
+            {"id": 6, "item": {"id": 10}, "quantity": 0, "buyout": 50},
+            {"id": 7, "item": {"id": 14}, "quantity": 0, "unit_price": 9},
+        ]}
+        snapshot = AuctionSnapshot.from_json(json)
+        self.assertEqual(list(snapshot.prices())[-2:], [0, 0])
+        self.assertEqual(auctions._summarize_python(snapshot, (50, 90)), self.expected)
+        if numpy is not None:
+            self.assertEqual(auctions._summarize_numpy(snapshot, (50, 90)), self.expected)
+
+class TestDiffSnapshots(unittest.TestCase):
+    """Test diffing two snapshots of the same auction house."""
+
+    def setUp(self):
+        self.old = AuctionSnapshot.from_json(AUCTIONS_JSON)
+        auctions_json = [dict(auction) for auction in AUCTIONS_JSON["auctions"]]
+        del auctions_json[0]
+        auctions_json[2]["bid"] = 45
+        auctions_json.append({"id": 5, "item": {"id": 10}, "quantity": 1, "unit_price": 6, "time_left": "LONG"})
+        self.new = AuctionSnapshot.from_json({"auctions": auctions_json, "Date": "Mon, 27 Jun 2022 19:28:56 GMT"})
+
+    def test_diff(self):
+        """Assert that auctions are sorted into added, removed and changed by id."""
+        diff = diff_snapshots(self.old, self.new)
+
+        self.assertEqual(list(diff.added.id), [5])
+        self.assertEqual(list(diff.removed.id), [1])
+        self.assertEqual(list(diff.changed.id), [4])
+        self.assertEqual(list(diff.changed.bid), [45])
+        self.assertEqual(diff.new_date, "Mon, 27 Jun 2022 19:28:56 GMT")
+
+    def test_apply(self):
+        """Assert that applying the diff to the old snapshot rebuilds the new one."""
+        rebuilt = diff_snapshots(self.old, self.new).apply(self.old)
+
+        self.assertEqual(sorted(rebuilt, key=lambda row: row["id"]), list(self.new))
+        self.assertEqual(rebuilt.date, self.new.date)
+
+    def test_apply_keeps_last_modified(self):
+        """Assert that apply() sets last_modified even when no auctions were added."""
+        self.new.last_modified = "Mon, 27 Jun 2022 19:20:00 GMT"
+        diff = diff_snapshots(self.new, self.new)
+        diff.added.last_modified = None
+
+        self.assertEqual(diff.apply(self.new).last_modified, "Mon, 27 Jun 2022 19:20:00 GMT")
+
+    def test_save_and_load(self):
+        """Assert that a saved diff loads back and still rebuilds the new snapshot."""
+        self.new.last_modified = "Mon, 27 Jun 2022 19:20:00 GMT"
+        diff = diff_snapshots(self.old, self.new)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "4.diff")
+            for compress in (True, False):
+                with self.subTest(compress=compress):
+                    diff.save(path, compress=compress)
+                    loaded = AuctionDiff.load(path)
+
+                    for name in ("added", "removed", "changed"):
+                        self.assertEqual(list(getattr(loaded, name)), list(getattr(diff, name)))
+                    self.assertEqual(loaded.removed.date, self.old.date)
+                    rebuilt = loaded.apply(self.old)
+                    self.assertEqual(sorted(rebuilt, key=lambda row: row["id"]), list(self.new))
+                    self.assertEqual(rebuilt.last_modified, self.new.last_modified)
+                    with self.assertRaises(ValueError):
+                        AuctionSnapshot.load(path)
+
+            self.old.save(path)
+            with self.assertRaises(ValueError):
+                AuctionDiff.load(path)
+
+    def test_same(self):
+        """Assert that identical snapshots have an empty diff."""
+        diff = diff_snapshots(AUCTIONS_JSON, AUCTIONS_JSON)
+        self.assertEqual((len(diff.added), len(diff.removed), len(diff.changed)), (0, 0, 0))
+
+if __name__ == "__main__":
+    unittest.main()
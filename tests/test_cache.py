@@ -0,0 +1,110 @@
+"""This module contains tests for the caches in cache.py.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from getwowdata.cache import LRUCache, SqliteCache
+
+
+class TestLRUCache(unittest.TestCase):
+    """Test that LRUCache counts hits and forgets the least recently used entry."""
+
+    def test_evicts_least_recently_used(self):
+        """Assert that reading an entry keeps it from being evicted."""
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_clear(self):
+        """Assert that clear() empties the cache and resets the counters."""
+        cache = LRUCache()
+        cache.set("a", 1)
+        cache.get("a")
+        cache.clear()
+
+        self.assertEqual(len(cache), 0)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+
+class TestSqliteCache(unittest.TestCase):
+    """Test that SqliteCache saves, expires and evicts entries."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_set_and_get(self):
+        """Assert that saved values persist after reopening the database."""
+        cache = SqliteCache(self.path)
+        cache.set("key", "value")
+        cache.set("key", "new value")
+        cache.close()
+
+        cache = SqliteCache(self.path)
+        self.assertEqual(cache.get("key"), "new value")
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get("missing"))
+        cache.close()
+
+    def test_ttl(self):
+        """Assert that entries older than ttl are missing."""
+        cache = SqliteCache(self.path, ttl=10)
+        with mock.patch("getwowdata.cache.time.time", return_value=100):
+            cache.set("key", "value")
+        with mock.patch("getwowdata.cache.time.time", return_value=109):
+            self.assertEqual(cache.get("key"), "value")
+        with mock.patch("getwowdata.cache.time.time", return_value=110):
+            self.assertIsNone(cache.get("key"))
+        self.assertEqual(len(cache), 0)
+        cache.close()
+
+    def test_evicts_least_recently_read(self):
+        """Assert that the least recently read entries are evicted when full."""
+        cache = SqliteCache(self.path, ttl=None, max_entries=10)
+        for number in range(10):
+            with mock.patch("getwowdata.cache.time.time", return_value=number):
+                cache.set(str(number), "value")
+        with mock.patch("getwowdata.cache.time.time", return_value=20):
+            cache.get("0")
+        with mock.patch("getwowdata.cache.time.time", return_value=21):
+            cache.set("10", "value")
+
+        self.assertEqual(len(cache), 9)
+        self.assertEqual(cache.get("0"), "value")
+        self.assertEqual(cache.get("10"), "value")
+        self.assertIsNone(cache.get("1"))
+        self.assertIsNone(cache.get("2"))
+        cache.close()
+    def test_after_fork(self):
+        """Assert that a forked child reopens the database and keeps its entries."""
+        cache = SqliteCache(self.path)
+        cache.set("key", "value")
+        connection, lock = cache._connection, cache._lock
+        lock.acquire()
+        with mock.patch("getwowdata.cache.os.getpid", return_value=cache._pid + 1):
+            cache._after_fork()
+            self.assertIsNot(cache._connection, connection)
+            self.assertIsNot(cache._lock, lock)
+            self.assertEqual(cache.get("key"), "value")
+            self.assertEqual(len(cache), 1)
+        lock.release()
+        cache.close()
+        connection.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""This module contains tests for crawler.py.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from getwowdata.crawler import RecipeCrawler
+
+
+def make_api(failing_recipe_ids=()):
+    """Returns a mock WowApi with one profession, two skill tiers and a shared recipe."""
+    api = mock.Mock()
+    api.get_profession_index.return_value = {
+        "_links": {}, "professions": [{"id": 164, "name": "Blacksmithing"}, {"id": 999, "name": "Other"}]
+    }
+    api.get_profession_tiers.return_value = {
+        "name": "Blacksmithing", "skill_tiers": [{"id": 1, "name": "Classic"}, {"id": 2, "name": "Outland"}]
+    }
+    api.get_profession_tier_categories.side_effect = lambda profession_id, skill_tier_id, timeout: {
+        "name": f"Tier {skill_tier_id}",
+        "categories": [{"name": "Armor", "recipes": [{"id": 10, "name": "Shared"}, {"id": 10 + skill_tier_id, "name": "Own"}]}],
+    }
+
+    def get_recipe(recipe_id, timeout):
+        if recipe_id in failing_recipe_ids:
+            raise ConnectionError
+        return {
+            "name": f"Recipe {recipe_id}",
+            "crafted_item": {"id": 100 + recipe_id, "name": "Crafted"},
+            "crafted_quantity": {"value": 1.0},
+            "reagents": [{"reagent": {"id": 500, "name": "Ore"}, "quantity": 2}],
+        }
+    api.get_recipe.side_effect = get_recipe
+    return api
+
+
+class TestRecipeCrawler(unittest.TestCase):
+    """Test that RecipeCrawler deduplicates recipes and resumes from a checkpoint."""
+
+    def test_crawl(self):
+        """Assert the graph of one profession with a recipe shared by two tiers."""
+        api = make_api()
+        graph = RecipeCrawler(api, profession_ids=[164], max_workers=2).crawl()
+
+        self.assertEqual(api.get_recipe.call_count, 3)
+        self.assertEqual(graph["professions"], {164: {"name": "Blacksmithing", "skill_tier_ids": [1, 2]}})
+        self.assertEqual(graph["skill_tiers"][2], {"name": "Tier 2", "profession_id": 164, "recipe_ids": [10, 12]})
+        self.assertEqual(graph["recipes"][10]["skill_tier_ids"], [1, 2])
+        self.assertEqual(graph["recipes"][11]["crafted_item_id"], 111)
+        self.assertEqual(graph["recipes"][11]["crafted_quantity"], 1.0)
+        self.assertEqual(graph["items"][500], {"name": "Ore"})
+        self.assertIn({"recipe_id": 12, "item_id": 500, "quantity": 2}, graph["reagents"])
+
+    def test_resume(self):
+        """Assert that a new crawler only requests what failed before."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "checkpoint.json")
+            crawler = RecipeCrawler(make_api(failing_recipe_ids={12}), profession_ids=[164], checkpoint_path=path)
+            crawler.crawl()
+            self.assertEqual(list(crawler.errors), [("recipes", (12,))])
+
+            api = make_api()
+            graph = RecipeCrawler(api, profession_ids=[164], checkpoint_path=path).crawl()
+            api.get_profession_index.assert_not_called()
+            api.get_profession_tier_categories.assert_not_called()
+            api.get_recipe.assert_called_once_with(12, timeout=30)
+            self.assertEqual(graph["recipes"][12]["crafted_item_id"], 112)
+
+if __name__ == "__main__":
+    unittest.main()
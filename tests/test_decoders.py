@@ -0,0 +1,37 @@
+"""This module contains tests for decoders.py.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import json
+import unittest
+from unittest import mock
+from getwowdata.decoders import get_json_decoder
+
+
+class TestGetJsonDecoder(unittest.TestCase):
+    """Test that get_json_decoder picks the requested or fastest installed decoder."""
+
+    def test_named(self):
+        """Assert that 'json' is json.loads and callables are returned as is."""
+        self.assertIs(get_json_decoder("json"), json.loads)
+        self.assertIs(get_json_decoder(len), len)
+
+    def test_unknown(self):
+        """Assert that unknown names raise ValueError."""
+        with self.assertRaises(ValueError):
+            get_json_decoder("yaml")
+
+    def test_auto_falls_back(self):
+        """Assert that missing decoders are skipped."""
+        with mock.patch("getwowdata.decoders.importlib.import_module", side_effect=ImportError):
+            self.assertIs(get_json_decoder(), json.loads)
+
+    def test_auto_decodes(self):
+        """Assert that the chosen decoder decodes bytes like json.loads."""
+        body = b'{"auctions": [{"id": 1, "unit_price": 5, "name": "\\u00e9"}]}'
+        self.assertEqual(get_json_decoder()(body), json.loads(body))
+
+if __name__ == "__main__":
+    unittest.main()
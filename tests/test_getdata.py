@@ -4,11 +4,21 @@ Copyright (c) 2022 JackBorah
 MIT License see LICENSE for more details
 """
 
+import gzip
+import subprocess
+import sys
 import unittest
 from unittest import mock
 import os
+import json as jsonlib
+import requests
 import responses
+from responses import matchers
+from urllib3.util import make_headers
 from getwowdata import WowApi
+from getwowdata.cache import SqliteCache
+from getwowdata.ratelimit import RateLimiter
+from getwowdata.tokens import TokenCache
 from getwowdata.exceptions import JSONChangedError
 from getwowdata.urls import urls
 
@@ -98,6 +108,30 @@ class TestWowApiMethods(unittest.TestCase):
             with self.assertRaises(NameError):
                 WowApi(self.region, locale="en_US")
 
+    @responses.activate
+    def test_token_cache(self):
+        """Assert that a token cache is reused and expired tokens are refreshed."""
+        token = responses.post(
+            urls["access_token"].format(region=self.region),
+            json={"access_token": "0000000000000000000000000000000000", "expires_in": 86399},
+        )
+        responses.get(
+            urls["wow_token"].format(region=self.region),
+            json={"sucess": "Test worked"},
+            headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'}
+        )
+        token_cache = TokenCache()
+        with mock.patch.dict(os.environ, {}, clear=True):
+            wow_api = WowApi(self.region, wow_api_id="wow_api_id", wow_api_secret="wow_api_secret", token_cache=token_cache)
+            WowApi(self.region, wow_api_id="wow_api_id", wow_api_secret="wow_api_secret", token_cache=token_cache)
+            self.assertEqual(token.call_count, 1)
+
+            wow_api.access_token_expires_at = 0
+            token_cache.set("wow_api_id", self.region, "expired", 0)
+            wow_api.get_wow_token()
+            self.assertEqual(token.call_count, 2)
+            self.assertGreater(wow_api.access_token_expires_at, 0)
+
     @responses.activate
     def test_connected_realm_search(self):
         """Assert that connected_realm_search returns the proper value."""
@@ -140,6 +174,38 @@ class TestWowApiMethods(unittest.TestCase):
 
         self.assertEqual(wow_api.item_search(), {"sucess": "Test worked", 'Date':'Mon, 27 Jun 2022 18:28:56 GMT'})
 
+    @responses.activate
+    def test_iter_item_search(self):
+        """Assert that iter_item_search yields every page in order and splits past the page limit."""
+        responses.post(
+            urls["access_token"].format(region=self.region),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+
+        def page(request):
+            # 9 items with ids 1-9, 2 per page, searchable by an id=[start,] range.
+            params = request.params
+            start = int(params.get("id", "[1,]")[1:-2])
+            ids = list(range(start, 10))
+            number = int(params["_page"])
+            results = [{"data": {"id": id}} for id in ids[(number - 1) * 2:number * 2]]
+            body = {"pageCount": (len(ids) + 1) // 2, "results": results}
+            return 200, {'Date':'Mon, 27 Jun 2022 18:28:56 GMT'}, jsonlib.dumps(body)
+
+        responses.add_callback(
+            responses.GET, urls["search_item"].format(region=self.region), callback=page
+        )
+        wow_api = WowApi(
+            self.region,
+            locale="en_US",
+            wow_api_id="wow_api_id",
+            wow_api_secret="wow_api_secret",
+        )
+        wow_api.search_page_limit = 2
+
+        ids = [result["data"]["id"] for result in wow_api.iter_item_search(max_workers=2, _pageSize=2)]
+        self.assertEqual(ids, list(range(1, 10)))
+
     @responses.activate
     def test_get_connected_realms_by_id(self):
         """Assert that get_connected_realms_by_id returns the proper value."""
@@ -184,6 +250,318 @@ class TestWowApiMethods(unittest.TestCase):
 
         self.assertEqual(wow_api.get_auctions(4), {"sucess": "Test worked", 'Date':'Mon, 27 Jun 2022 18:28:56 GMT'})
 
+    @responses.activate
+    def test_get_auctions_conditional(self):
+        """Assert that get_auctions sends If-Modified-Since and handles 304."""
+        last_modified = 'Mon, 27 Jun 2022 18:00:00 GMT'
+        responses.post(
+            urls["access_token"].format(region=self.region),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+        responses.get(
+            urls["auction"].format(region=self.region, connected_realm_id=4),
+            json={"sucess": "Test worked"},
+            headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT', 'Last-Modified': last_modified}
+        )
+        responses.get(
+            urls["auction"].format(region=self.region, connected_realm_id=4),
+            status=304,
+            headers={'Date':'Mon, 27 Jun 2022 18:29:56 GMT'},
+            match=[matchers.header_matcher({'If-Modified-Since': last_modified})],
+        )
+        wow_api = WowApi(
+            self.region,
+            locale="en_US",
+            wow_api_id="wow_api_id",
+            wow_api_secret="wow_api_secret",
+        )
+
+        self.assertEqual(
+            wow_api.get_auctions(4, conditional=True),
+            {"sucess": "Test worked", 'Date':'Mon, 27 Jun 2022 18:28:56 GMT', 'Last-Modified': last_modified}
+        )
+        self.assertEqual(
+            wow_api.get_auctions(4, conditional=True),
+            {'not_modified': True, 'Date':'Mon, 27 Jun 2022 18:29:56 GMT', 'Last-Modified': last_modified}
+        )
+
+    @responses.activate
+    def test_iter_auctions(self):
+        """Assert that iter_auctions yields each auction."""
+        auctions = [{"id": 1, "item": {"id": 2}, "buyout": 3}, {"id": 2, "item": {"id": 3}, "unit_price": 4}]
+        responses.post(
+            urls["access_token"].format(region=self.region),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+        responses.get(
+            urls["auction"].format(region=self.region, connected_realm_id=4),
+            json={"_links": {}, "auctions": auctions},
+            headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'}
+        )
+        wow_api = WowApi(
+            self.region,
+            locale="en_US",
+            wow_api_id="wow_api_id",
+            wow_api_secret="wow_api_secret",
+        )
+
+        with wow_api.iter_auctions(4, chunk_size=5) as stream:
+            self.assertEqual(stream.date, 'Mon, 27 Jun 2022 18:28:56 GMT')
+            self.assertEqual(list(stream), auctions)
+
+    @responses.activate
+    def test_iter_commodities_conditional(self):
+        """Assert that iter_commodities streams the commodities then is empty when not modified."""
+        last_modified = 'Mon, 27 Jun 2022 18:00:00 GMT'
+        auctions = [{"id": 1, "item": {"id": 2}, "quantity": 20, "unit_price": 4, "time_left": "SHORT"}]
+        responses.post(
+            urls["access_token"].format(region=self.region),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+        responses.get(
+            urls["commodities"].format(region=self.region),
+            json={"_links": {}, "auctions": auctions},
+            headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT', 'Last-Modified': last_modified}
+        )
+        responses.get(
+            urls["commodities"].format(region=self.region),
+            status=304,
+            headers={'Date':'Mon, 27 Jun 2022 18:29:56 GMT'},
+            match=[matchers.header_matcher({'If-Modified-Since': last_modified})],
+        )
+        wow_api = WowApi(
+            self.region,
+            locale="en_US",
+            wow_api_id="wow_api_id",
+            wow_api_secret="wow_api_secret",
+        )
+
+        with wow_api.iter_commodities(conditional=True) as stream:
+            self.assertFalse(stream.not_modified)
+            self.assertEqual(list(stream), auctions)
+        with wow_api.iter_commodities(conditional=True) as stream:
+            self.assertTrue(stream.not_modified)
+            self.assertEqual(list(stream), [])
+
+    @responses.activate
+    def test_get_wow_token_retries_429(self):
+        """Assert that 429 is retried and each attempt waits for the rate limiter."""
+        responses.post(
+            urls["access_token"].format(region=self.region),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+        responses.get(
+            urls["wow_token"].format(region=self.region),
+            status=429,
+            headers={'Retry-After': '0'},
+        )
+        responses.get(
+            urls["wow_token"].format(region=self.region),
+            json={"sucess": "Test worked"},
+            headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'}
+        )
+        rate_limiter = mock.Mock()
+        wow_api = WowApi(
+            self.region,
+            locale="en_US",
+            wow_api_id="wow_api_id",
+            wow_api_secret="wow_api_secret",
+            rate_limiter=rate_limiter,
+        )
+
+        self.assertEqual(wow_api.get_wow_token(), {"sucess": "Test worked", 'Date':'Mon, 27 Jun 2022 18:28:56 GMT'})
+        # The retry counts against the limit too.
+        self.assertEqual(rate_limiter.acquire.call_count, 2)
+
+    @responses.activate
+    def test_observers(self):
+        """Assert that observers get a record of each call, including cache hits."""
+        responses.post(
+            urls["access_token"].format(region=self.region),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+        responses.get(
+            urls["profession_index"].format(region=self.region),
+            status=503,
+        )
+        responses.get(
+            urls["profession_index"].format(region=self.region),
+            body='{"professions": []}',
+            headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'}
+        )
+        records = []
+        wow_api = WowApi(
+            self.region,
+            locale="en_US",
+            wow_api_id="wow_api_id",
+            wow_api_secret="wow_api_secret",
+            memory_cache_size=10,
+            rate_limiter=mock.Mock(),
+            observers=[records.append],
+        )
+
+        wow_api.get_profession_index()
+        wow_api.get_profession_index()
+
+        requested, cached = records
+        self.assertEqual((requested.endpoint, requested.status), ("profession_index", 200))
+        self.assertEqual(requested.bytes, len('{"professions": []}'))
+        self.assertIsNotNone(requested.wait_seconds)
+        self.assertIsNotNone(requested.decode_seconds)
+        self.assertEqual((cached.cache, cached.status), ("memory", None))
+
+    @responses.activate
+    def test_compressed_bytes(self):
+        """Assert that compression is negotiated and both body sizes are recorded."""
+        body = jsonlib.dumps({"auctions": [{"id": 1, "item": {"id": 2}}] * 100}).encode()
+        responses.post(
+            urls["access_token"].format(region=self.region),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+        responses.get(
+            urls["auction"].format(region=self.region, connected_realm_id=4),
+            body=gzip.compress(body),
+            headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT', 'Content-Encoding': 'gzip'},
+            match=[matchers.header_matcher(
+                {'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding']}, strict_match=False
+            )],
+        )
+        records = []
+        wow_api = WowApi(
+            self.region,
+            locale="en_US",
+            wow_api_id="wow_api_id",
+            wow_api_secret="wow_api_secret",
+            observers=[records.append],
+        )
+
+        self.assertEqual(len(wow_api.get_auctions(4)["auctions"]), 100)
+        (record,) = records
+        self.assertEqual(record.content_encoding, "gzip")
+        self.assertEqual(record.bytes, len(body))
+        self.assertEqual(record.compressed_bytes, len(gzip.compress(body)))
+
+    @responses.activate
+    def test_lazy_token(self):
+        """Assert that lazy clients request the token on the first request, not when created."""
+        token = responses.post(
+            urls["access_token"].format(region=self.region),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+        responses.get(
+            urls["wow_token"].format(region=self.region),
+            json={"price": 1},
+            headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'}
+        )
+        wow_api = WowApi(self.region, wow_api_id="wow_api_id", wow_api_secret="wow_api_secret", lazy=True)
+        self.assertEqual(token.call_count, 0)
+
+        wow_api.get_wow_token()
+        self.assertEqual(token.call_count, 1)
+        self.assertEqual(wow_api.session.params["access_token"], "0000000000000000000000000000000000")
+
+    def test_lazy_imports(self):
+        """Assert that importing getwowdata and creating a lazy client doesn't import requests or multiprocessing."""
+        code = (
+            "import sys, getwowdata\n"
+            "getwowdata.WowApi('us', lazy=True)\n"
+            "print(sorted({'requests', 'multiprocessing'} & set(sys.modules)))\n"
+        )
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), "[]")
+
+    @responses.activate
+    def test_supplied_token(self):
+        """Assert that a supplied access token is used without requesting one."""
+        responses.get(
+            urls["wow_token"].format(region=self.region),
+            json={"price": 1},
+            headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'},
+            match=[matchers.query_param_matcher({"namespace": "dynamic-us", "access_token": "supplied"})],
+        )
+        wow_api = WowApi(self.region, access_token="supplied")
+
+        self.assertEqual(wow_api.get_wow_token()["price"], 1)
+
+    @responses.activate
+    def test_after_fork(self):
+        """Assert that a forked child gets a new session, locks and cache connection."""
+        responses.post(
+            urls["access_token"].format(region=self.region),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+        responses.get(
+            urls["auction"].format(region=self.region, connected_realm_id=4),
+            body=b'{"auctions": []}',
+            headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'}
+        )
+        wow_api = WowApi(
+            self.region,
+            locale="en_US",
+            wow_api_id="wow_api_id",
+            wow_api_secret="wow_api_secret",
+            cache=SqliteCache(":memory:"),
+            memory_cache_size=8,
+            rate_limiter=RateLimiter(),
+            token_cache=TokenCache(),
+        )
+        parent_session = wow_api.session
+        parent_locks = [
+            wow_api.memory_cache._lock,
+            wow_api.token_cache._lock,
+            *(bucket._lock for bucket in wow_api.rate_limiter.buckets),
+        ]
+        parent_connection = wow_api.cache._connection
+
+        with mock.patch("getwowdata.getdata.os.getpid", return_value=wow_api._pid + 1):
+            body, date = wow_api.get_auctions_body(4)
+
+        self.assertEqual((body, date), (b'{"auctions": []}', 'Mon, 27 Jun 2022 18:28:56 GMT'))
+        self.assertIsNot(wow_api.session, parent_session)
+        self.assertEqual(wow_api.session.params, parent_session.params)
+        child_locks = [
+            wow_api.memory_cache._lock,
+            wow_api.token_cache._lock,
+            *(bucket._lock for bucket in wow_api.rate_limiter.buckets),
+        ]
+        for parent_lock, child_lock in zip(parent_locks, child_locks):
+            self.assertIsNot(child_lock, parent_lock)
+        self.assertIsNot(wow_api.cache._connection, parent_connection)
+        parent_connection.close()
+
+    @responses.activate
+    def test_get_auctions_many(self):
+        """Assert that get_auctions_many yields every realm and reports failures."""
+        responses.post(
+            urls["access_token"].format(region=self.region),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+        for connected_realm_id in (1, 2):
+            responses.get(
+                urls["auction"].format(region=self.region, connected_realm_id=connected_realm_id),
+                json={"sucess": connected_realm_id},
+                headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'}
+            )
+        responses.get(
+            urls["auction"].format(region=self.region, connected_realm_id=3),
+            status=404,
+        )
+        wow_api = WowApi(
+            self.region,
+            locale="en_US",
+            wow_api_id="wow_api_id",
+            wow_api_secret="wow_api_secret",
+        )
+
+        results = {
+            connected_realm_id: (auctions, error)
+            for connected_realm_id, auctions, error in wow_api.get_auctions_many([1, 2, 3], max_workers=2)
+        }
+        self.assertEqual(results[1], ({"sucess": 1, 'Date':'Mon, 27 Jun 2022 18:28:56 GMT'}, None))
+        self.assertEqual(results[2], ({"sucess": 2, 'Date':'Mon, 27 Jun 2022 18:28:56 GMT'}, None))
+        self.assertIsNone(results[3][0])
+        self.assertIsInstance(results[3][1], requests.exceptions.HTTPError)
+
     @responses.activate
     def test_get_profession_index(self):
         """Assert that get_profession_index returns the proper value."""
@@ -296,6 +674,59 @@ class TestWowApiMethods(unittest.TestCase):
 
         self.assertEqual(wow_api.get_recipe(1), {"sucess": "Test worked", 'Date':'Mon, 27 Jun 2022 18:28:56 GMT'})
 
+    @responses.activate
+    def test_get_recipe_cached(self):
+        """Assert that a cached get_recipe is only requested once."""
+        responses.post(
+            urls["access_token"].format(region=self.region),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+        recipe = responses.get(
+            urls["recipe_detail"].format(region=self.region, recipe_id=1),
+            json={"sucess": "Test worked"},
+            headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'}
+        )
+        wow_api = WowApi(
+            self.region,
+            locale="en_US",
+            wow_api_id="wow_api_id",
+            wow_api_secret="wow_api_secret",
+            cache=SqliteCache(":memory:"),
+        )
+
+        for _ in range(2):
+            self.assertEqual(wow_api.get_recipe(1), {"sucess": "Test worked", 'Date':'Mon, 27 Jun 2022 18:28:56 GMT'})
+        self.assertEqual(recipe.call_count, 1)
+
+    @responses.activate
+    def test_item_search_memory_cache(self):
+        """Assert that the memory cache is used until clear_cache()."""
+        responses.post(
+            urls["access_token"].format(region=self.region),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+        search = responses.get(
+            urls["search_item"].format(region=self.region),
+            json={"sucess": "Test worked"},
+            headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'}
+        )
+        wow_api = WowApi(
+            self.region,
+            locale="en_US",
+            wow_api_id="wow_api_id",
+            wow_api_secret="wow_api_secret",
+            memory_cache_size=10,
+        )
+
+        wow_api.item_search(id=1)
+        wow_api.item_search(id=1)
+        wow_api.item_search(id=2)
+        self.assertEqual(search.call_count, 2)
+        self.assertEqual((wow_api.memory_cache.hits, wow_api.memory_cache.misses), (1, 2))
+        wow_api.clear_cache()
+        wow_api.item_search(id=1)
+        self.assertEqual(search.call_count, 3)
+
     @responses.activate
     def test_get_recipe_icon(self):
         """Assert that get_recipe_icon returns the proper value."""
@@ -459,5 +890,31 @@ class TestWowApiMethods(unittest.TestCase):
 
         self.assertEqual(wow_api.get_connected_realm_index(), {"Test worked": "1"})
 
+    @responses.activate
+    def test_get_connected_realm_index_pages(self):
+        """Assert that get_connected_realm_index reads every page."""
+        responses.post(
+            urls["access_token"].format(region=self.region),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+        for page in (1, 2):
+            responses.get(
+                urls["search_realm"].format(region=self.region),
+                match=[matchers.query_param_matcher({"_page": str(page)}, strict_match=False)],
+                json={
+                    "pageCount": 2,
+                    "results": [{"key": {"href": str(page)}, "data": {"realms": [{"slug": f"realm-{page}"}]}}],
+                },
+                headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'},
+            )
+        wow_api = WowApi(
+            self.region,
+            locale="en_US",
+            wow_api_id="wow_api_id",
+            wow_api_secret="wow_api_secret",
+        )
+
+        self.assertEqual(wow_api.get_connected_realm_index(), {"realm-1": "1", "realm-2": "2"})
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,93 @@
+"""This module contains tests for media.py and WowApi.download_icons.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+import responses
+from getwowdata import WowApi
+from getwowdata.media import IconStore
+from getwowdata.urls import urls
+
+
+class TestIconStore(unittest.TestCase):
+    """Test that IconStore saves assets under the hash of their url."""
+
+    def test_put_and_get(self):
+        """Assert that a saved asset is found by its url and keeps its extension."""
+        with tempfile.TemporaryDirectory() as directory:
+            store = IconStore(directory)
+            url = "https://render.worldofwarcraft.com/us/icons/56/inv_sword_39.jpg"
+            self.assertNotIn(url, store)
+            path = store.put(url, b"icon")
+
+            self.assertIn(url, store)
+            self.assertEqual(store.get(url), b"icon")
+            self.assertTrue(path.endswith(".jpg"))
+            self.assertEqual(os.path.dirname(path), os.path.join(directory, os.path.basename(path)[:2]))
+
+    @unittest.skipIf(os.name == "nt", "Windows has no umask permissions")
+    def test_put_respects_umask(self):
+        """Assert that saved assets get the permissions open() would give them, without touching the umask."""
+        umask = os.umask(0o022)
+        try:
+            with tempfile.TemporaryDirectory() as directory, \
+                    mock.patch("getwowdata.helpers.os.umask", side_effect=AssertionError("umask changed")):
+                path = IconStore(directory).put("https://render.worldofwarcraft.com/us/icons/56/a.jpg", b"icon")
+                self.assertEqual(os.stat(path).st_mode & 0o777, 0o644)
+        finally:
+            os.umask(umask)
+
+
+class TestDownloadIcons(unittest.TestCase):
+    """Test that download_icons downloads shared and stored assets once."""
+
+    region = "us"
+
+    @responses.activate
+    def test_download_icons(self):
+        """Assert that each asset is downloaded once and failures are yielded."""
+        responses.post(
+            urls["access_token"].format(region=self.region),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+        shared = "https://render.worldofwarcraft.com/us/icons/56/shared.jpg"
+        stored = "https://render.worldofwarcraft.com/us/icons/56/stored.jpg"
+        for item_id, url in ((1, shared), (2, shared), (3, stored)):
+            responses.get(
+                urls["item_icon"].format(region=self.region, item_id=item_id),
+                json={"assets": [{"key": "icon", "value": url}]},
+                headers={'Date':'Mon, 27 Jun 2022 18:28:56 GMT'},
+            )
+        responses.get(urls["item_icon"].format(region=self.region, item_id=4), status=404)
+        shared_asset = responses.get(shared, body=b"shared")
+        stored_asset = responses.get(stored, body=b"stored")
+        wow_api = WowApi(
+            self.region,
+            locale="en_US",
+            wow_api_id="wow_api_id",
+            wow_api_secret="wow_api_secret",
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = IconStore(directory)
+            store.put(stored, b"stored")
+            results = {
+                item_id: (path, error)
+                for item_id, path, error in wow_api.download_icons("item", [1, 2, 3, 4], store, max_workers=4)
+            }
+
+            self.assertEqual(results[1], (store.path(shared), None))
+            self.assertEqual(results[2], (store.path(shared), None))
+            self.assertEqual(results[3], (store.path(stored), None))
+            self.assertIsNone(results[4][0])
+            self.assertEqual(store.get(shared), b"shared")
+            self.assertEqual(shared_asset.call_count, 1)
+            self.assertEqual(stored_asset.call_count, 0)
+
+if __name__ == "__main__":
+    unittest.main()
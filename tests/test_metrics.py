@@ -0,0 +1,39 @@
+"""This module contains tests for metrics.py.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import unittest
+from getwowdata.metrics import MetricsCollector, RequestRecord
+
+
+class TestMetricsCollector(unittest.TestCase):
+    """Test that MetricsCollector adds up records and renders them."""
+
+    def test_render(self):
+        """Assert the counters and histogram in the rendered text."""
+        collector = MetricsCollector(buckets=(0.1, 1))
+        record = RequestRecord("auction", "https://{region}.api.blizzard.com/...", "us")
+        record.status, record.bytes, record.retries = 200, 1000, 2
+        record.response_seconds, record.total_seconds = 0.05, 0.5
+        collector(record)
+        cached = RequestRecord("recipe_detail", "https://{region}.api.blizzard.com/...", "us")
+        cached.cache, cached.total_seconds = "memory", 0.001
+        collector(cached)
+        collector(cached)
+
+        lines = collector.render().splitlines()
+
+        self.assertIn('getwowdata_requests_total{endpoint="auction",region="us",status="200"} 1', lines)
+        self.assertIn('getwowdata_requests_total{endpoint="recipe_detail",region="us",status="cache"} 2', lines)
+        self.assertIn('getwowdata_retries_total{endpoint="auction",region="us"} 2', lines)
+        self.assertIn('getwowdata_response_bytes_total{endpoint="auction",region="us"} 1000', lines)
+        self.assertIn('getwowdata_request_seconds_bucket{endpoint="auction",region="us",phase="total",le="0.1"} 0', lines)
+        self.assertIn('getwowdata_request_seconds_bucket{endpoint="auction",region="us",phase="total",le="1"} 1', lines)
+        self.assertIn('getwowdata_request_seconds_bucket{endpoint="auction",region="us",phase="response",le="0.1"} 1', lines)
+        self.assertIn('getwowdata_request_seconds_count{endpoint="recipe_detail",region="us",phase="total"} 2', lines)
+        self.assertNotIn('phase="download"', collector.render())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""This module contains tests for pipeline.py.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import json
+import unittest
+from unittest import mock
+import requests
+from getwowdata.pipeline import process_auctions
+
+AUCTIONS = {
+    "auctions": [
+        {"id": 1, "item": {"id": 10}, "quantity": 20, "unit_price": 5, "time_left": "SHORT"},
+        {"id": 2, "item": {"id": 10}, "quantity": 5, "unit_price": 7, "time_left": "LONG"},
+    ],
+}
+
+
+class TestProcessAuctions(unittest.TestCase):
+    """Test that process_auctions summarizes downloaded bodies in worker processes."""
+
+    def test_process_auctions(self):
+        """Assert that each realm's summary or download error is yielded."""
+        def get_auctions_body(connected_realm_id, timeout):
+            if connected_realm_id == 3:
+                raise requests.exceptions.HTTPError("404")
+            return json.dumps(AUCTIONS).encode(), "Mon, 27 Jun 2022 18:28:56 GMT"
+
+        api = mock.Mock()
+        api.get_auctions_body.side_effect = get_auctions_body
+
+        results = {
+            connected_realm_id: (summary, error)
+            for connected_realm_id, summary, error in process_auctions(
+                api, [1, 2, 3], max_downloads=2, processes=1
+            )
+        }
+
+        self.assertEqual(set(results), {1, 2, 3})
+        self.assertIsInstance(results[3][1], requests.exceptions.HTTPError)
+        summary, error = results[2]
+        self.assertIsNone(error)
+        self.assertEqual(summary["connected_realm_id"], 2)
+        self.assertEqual(summary["auctions"], 2)
+        self.assertEqual(summary["items"][10]["volume"], 25)
+        self.assertEqual(summary["items"][10]["min"], 5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""This module contains tests for pool.py.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import unittest
+from unittest import mock
+import responses
+from getwowdata.pool import WowApiPool, _round_robin
+from getwowdata.urls import urls
+
+
+class TestWowApiPool(unittest.TestCase):
+    """Test that WowApiPool's clients share a token and connections."""
+
+    def mock_endpoints(self):
+        """Registers the token and auction responses. Call inside @responses.activate."""
+        responses.post(
+            urls["access_token"].format(region="us"),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+        for region, connected_realm_ids in (("us", (4, 5)), ("eu", (1080,))):
+            for connected_realm_id in connected_realm_ids:
+                responses.get(
+                    urls["auction"].format(region=region, connected_realm_id=connected_realm_id),
+                    json={"auctions": [connected_realm_id]},
+                    headers={"Date": "Mon, 27 Jun 2022 18:28:56 GMT"},
+                )
+        responses.get(
+            urls["auction"].format(region="eu", connected_realm_id=1081),
+            status=404,
+        )
+
+    @responses.activate
+    def test_shared(self):
+        """Assert that one token is requested and the adapter and limiter are shared."""
+        self.mock_endpoints()
+        pool = WowApiPool(("us", "eu"), wow_api_id="wow_api_id", wow_api_secret="wow_api_secret")
+
+        self.assertEqual([call.request.method for call in responses.calls], ["POST"])
+        self.assertEqual(list(pool), ["us", "eu"])
+        self.assertIs(pool["eu"].session.get_adapter("https://eu.api.blizzard.com"), pool.adapter)
+        self.assertIs(pool["eu"].rate_limiter, pool["us"].rate_limiter)
+        self.assertEqual(pool["eu"].session.params["access_token"], "0000000000000000000000000000000000")
+
+    @responses.activate
+    def test_get_auctions_all(self):
+        """Assert that every region's realms are yielded, failures included."""
+        self.mock_endpoints()
+        pool = WowApiPool(
+            ("us", "eu"), wow_api_id="wow_api_id", wow_api_secret="wow_api_secret", rate_limiter=mock.Mock()
+        )
+
+        results = {
+            (region, connected_realm_id): (auctions and auctions["auctions"], error is not None)
+            for region, connected_realm_id, auctions, error in pool.get_auctions_all(
+                {"us": [4, 5], "eu": [1080, 1081]}, max_workers=2
+            )
+        }
+
+        self.assertEqual(results, {
+            ("us", 4): ([4], False),
+            ("us", 5): ([5], False),
+            ("eu", 1080): ([1080], False),
+            ("eu", 1081): (None, True),
+        })
+
+    @responses.activate
+    def test_token_refresh_is_shared(self):
+        """Assert that one client refreshes in the background and the others reuse its token."""
+        self.mock_endpoints()
+        pool = WowApiPool(
+            ("us", "eu", "kr"),
+            wow_api_id="wow_api_id",
+            wow_api_secret="wow_api_secret",
+            background_token_refresh=True,
+        )
+        self.assertEqual([pool[region].background_token_refresh for region in pool], [True, False, False])
+        pool["us"]._token_timer.cancel()
+
+        # The refresher's timer and a request from another client near expiry both
+        # refresh through the shared token cache, so only one new token is requested.
+        for client in (pool["us"], pool["eu"]):
+            client._token_timer = None
+            client.access_token_expires_at = 0
+        pool.token_cache.set("wow_api_id", "us", "0000000000000000000000000000000000", 0)
+        pool["us"].background_token_refresh = False
+        pool["us"]._refresh_access_token(force=True)
+        pool["eu"]._refresh_access_token()
+        pool["kr"]._refresh_access_token(force=True)
+
+        self.assertEqual([call.request.method for call in responses.calls], ["POST", "POST"])
+
+    def test_round_robin(self):
+        """Assert that regions take turns until each runs out."""
+        self.assertEqual(
+            list(_round_robin({"us": [1, 2, 3], "eu": [4], "kr": [5, 6]})),
+            [("us", 1), ("eu", 4), ("kr", 5), ("us", 2), ("kr", 6), ("us", 3)],
+        )
+
+if __name__ == "__main__":
+    unittest.main()
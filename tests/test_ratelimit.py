@@ -0,0 +1,111 @@
+"""This module contains tests for ratelimit.py.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from getwowdata.ratelimit import RateLimiter, RollingWindow, TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test that TokenBucket allows bursts up to capacity then refills at rate."""
+
+    def test_burst_then_wait(self):
+        """Assert that tokens past capacity wait for the refill."""
+        with mock.patch("getwowdata.ratelimit.time.time", return_value=100):
+            bucket = TokenBucket(rate=10, capacity=2)
+            self.assertEqual(bucket.try_acquire(), 0)
+            self.assertEqual(bucket.try_acquire(), 0)
+            self.assertAlmostEqual(bucket.try_acquire(), 0.1)
+        with mock.patch("getwowdata.ratelimit.time.time", return_value=100.2):
+            self.assertEqual(bucket.try_acquire(), 0)
+
+    def test_acquire_sleeps(self):
+        """Assert that acquire() sleeps until a token is available."""
+        now = [100.0]
+        with mock.patch("getwowdata.ratelimit.time.time", side_effect=lambda: now[0]), \
+                mock.patch("getwowdata.ratelimit.time.sleep", side_effect=lambda s: now.__setitem__(0, now[0] + s)) as sleep:
+            bucket = TokenBucket(rate=4, capacity=1)
+            bucket.acquire()
+            bucket.acquire()
+            sleep.assert_called_once_with(0.25)
+
+    def test_shared_file(self):
+        """Assert that buckets with the same path share their tokens."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bucket")
+            with mock.patch("getwowdata.ratelimit.time.time", return_value=100):
+                first = TokenBucket(rate=1, capacity=1, path=path)
+                second = TokenBucket(rate=1, capacity=1, path=path)
+                self.assertEqual(first.try_acquire(), 0)
+                self.assertEqual(second.try_acquire(), 1)
+
+
+class TestRollingWindow(unittest.TestCase):
+    """Test that RollingWindow never lets more than limit through in any window."""
+
+    def test_wait_for_oldest_slot(self):
+        """Assert that a full window waits until its oldest slot stops being counted."""
+        with mock.patch("getwowdata.ratelimit.time.time", return_value=130):
+            window = RollingWindow(limit=2, window=600, resolution=60)
+            self.assertEqual(window.try_acquire(), 0)
+            self.assertEqual(window.try_acquire(), 0)
+            # Slot 2 (120-180) is counted until slot 13 starts at 780.
+            self.assertEqual(window.try_acquire(), 650)
+        with mock.patch("getwowdata.ratelimit.time.time", return_value=780):
+            self.assertEqual(window.try_acquire(), 0)
+
+    def test_shared_file(self):
+        """Assert that windows with the same path share their counts."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "window")
+            with mock.patch("getwowdata.ratelimit.time.time", return_value=100):
+                first = RollingWindow(limit=1, window=60, resolution=10, path=path)
+                second = RollingWindow(limit=1, window=60, resolution=10, path=path)
+                self.assertEqual(first.try_acquire(), 0)
+                self.assertEqual(second.try_acquire(), 70)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test that RateLimiter enforces both limits."""
+
+    def test_per_hour(self):
+        """Assert that the hourly limit is enforced even under the per second limit."""
+        with mock.patch("getwowdata.ratelimit.time.time", return_value=100):
+            limiter = RateLimiter(per_second=100, per_hour=2)
+            limiter.acquire()
+            limiter.acquire()
+            # Counted in the minute starting at 60 until 61 minutes later.
+            self.assertAlmostEqual(limiter.buckets[0].try_acquire(), 3620)
+
+    def test_requests_per_hour(self):
+        """Assert that requests as fast as allowed never exceed per_hour in any hour."""
+        now = [0.0]
+        times = []
+
+        def sleep(seconds):
+            # Rounding can leave a wait too small to move a fake clock this large.
+            now[0] += max(seconds, 1e-6)
+
+        with mock.patch("getwowdata.ratelimit.time.time", side_effect=lambda: now[0]), \
+                mock.patch("getwowdata.ratelimit.time.sleep", side_effect=sleep):
+            limiter = RateLimiter(per_second=10, per_hour=1000)
+            while now[0] < 3 * 3600:
+                limiter.acquire()
+                times.append(now[0])
+                now[0] += 0.01
+
+        start = 0
+        for end, moment in enumerate(times):
+            while times[start] <= moment - 3600:
+                start += 1
+            self.assertLessEqual(end - start + 1, 1000)
+        # Only the slot the window starts in is given up.
+        self.assertGreaterEqual(len(times), 3 * 1000 * 59 // 61)
+
+if __name__ == "__main__":
+    unittest.main()
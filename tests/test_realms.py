@@ -0,0 +1,114 @@
+"""This module contains tests for realms.py.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import os
+import tempfile
+import time
+import unittest
+import responses
+from getwowdata import WowApi
+from getwowdata.realms import RealmIndex
+from getwowdata.urls import urls
+
+
+def connected_realm(connected_realm_id, *realms):
+    return {
+        "key": {"href": f"https://us.api.blizzard.com/data/wow/connected-realm/{connected_realm_id}"},
+        "data": {
+            "id": connected_realm_id,
+            "population": {"type": "HIGH"},
+            "status": {"type": "UP"},
+            "realms": [
+                {
+                    "id": realm_id,
+                    "slug": slug,
+                    "name": name,
+                    "locale": "enUS",
+                    "timezone": "America/Chicago",
+                    "type": {"type": "NORMAL"},
+                    "category": "United States",
+                }
+                for realm_id, slug, name in realms
+            ],
+        },
+    }
+
+
+class TestRealmIndex(unittest.TestCase):
+    """Test that RealmIndex indexes every page and is only rebuilt when stale."""
+
+    def setUp(self):
+        self.api = WowApi("us", wow_api_id="wow_api_id", wow_api_secret="wow_api_secret", lazy=True)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "realms-us.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def mock_search(self):
+        """Registers the token and a one page connected realm search. Call inside @responses.activate."""
+        responses.post(
+            urls["access_token"].format(region="us"),
+            json={"access_token": "0000000000000000000000000000000000"},
+        )
+        responses.get(
+            urls["search_realm"].format(region="us"),
+            json={
+                "pageCount": 1,
+                "results": [
+                    connected_realm(4, (1, "winterhoof", {"en_US": "Winterhoof", "de_DE": "Winterhuf"}),
+                                    (2, "kilrogg", {"en_US": "Kilrogg"})),
+                    connected_realm(57, (57, "illidan", {"en_US": "Illidan"})),
+                ],
+            },
+            headers={"Date": "Mon, 27 Jun 2022 18:28:56 GMT"},
+        )
+
+    def searches(self):
+        """Returns how many searches were requested."""
+        return sum(call.request.method == "GET" for call in responses.calls)
+
+    @responses.activate
+    def test_lookups(self):
+        """Assert that realms are found by slug, name, realm id and connected realm id."""
+        self.mock_search()
+        index = RealmIndex.build(self.api)
+        self.assertEqual(len(index), 3)
+        self.assertIn("illidan", index)
+        self.assertEqual(index.by_slug["illidan"]["connected_realm_id"], 57)
+        self.assertEqual(index.by_name["winterhuf"]["slug"], "winterhoof")
+        self.assertEqual(index.by_realm_id[2]["slug"], "kilrogg")
+        self.assertEqual([realm["slug"] for realm in index.by_connected_realm_id[4]], ["winterhoof", "kilrogg"])
+        self.assertEqual(index.by_slug["kilrogg"]["population"], "HIGH")
+
+    @responses.activate
+    def test_save_and_load(self):
+        """Assert that a saved index loads with the same realms."""
+        self.mock_search()
+        index = RealmIndex.build(self.api)
+        index.save(self.path)
+        loaded = RealmIndex.load(self.path)
+        self.assertEqual(loaded.region, "us")
+        self.assertEqual(loaded.built_at, index.built_at)
+        self.assertEqual(loaded.realms, index.realms)
+        self.assertEqual(loaded.by_realm_id[57]["slug"], "illidan")
+
+    @responses.activate
+    def test_load_or_build_only_rebuilds_when_stale(self):
+        """Assert that a saved index is reused until it is older than max_age."""
+        self.mock_search()
+        RealmIndex.load_or_build(self.api, self.path)
+        RealmIndex.load_or_build(self.api, self.path)
+        self.assertEqual(self.searches(), 1)
+
+        RealmIndex("us", [], built_at=time.time() - 10).save(self.path)
+        self.assertEqual(len(RealmIndex.load_or_build(self.api, self.path, max_age=60)), 0)
+        self.assertEqual(len(RealmIndex.load_or_build(self.api, self.path, max_age=5)), 3)
+        self.assertEqual(self.searches(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
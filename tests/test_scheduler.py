@@ -0,0 +1,115 @@
+"""This module contains tests for scheduler.py.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import unittest
+from email.utils import formatdate
+from getwowdata.scheduler import PollingScheduler
+
+
+class FakeEndpoint:
+    """Updates every period seconds of the fake clock, like a conditional get_auctions."""
+
+    def __init__(self, clock, period):
+        self.clock = clock
+        self.period = period
+        self.requests = []
+
+    def __call__(self, connected_realm_id, conditional=False):
+        now = self.clock()
+        self.requests.append(now)
+        modified_at = now - now % self.period
+        json = {'Date': formatdate(now, usegmt=True), 'Last-Modified': formatdate(modified_at, usegmt=True)}
+        if self.requests[:-1] and modified_at <= self.requests[-2] - self.requests[-2] % self.period:
+            return {'not_modified': True, **json}
+        return {'auctions': [connected_realm_id], **json}
+
+
+class TestPollingScheduler(unittest.TestCase):
+    """Test that PollingScheduler learns the update period and only calls back on changes."""
+
+    def setUp(self):
+        self.now = 1_656_350_000.0
+        self.scheduler = PollingScheduler(min_interval=60, max_interval=3600, margin=15, clock=lambda: self.now)
+
+    def run_until(self, end):
+        while self.now < end:
+            wait = self.scheduler.run_pending()
+            self.now += wait if wait and wait > 0 else 0
+
+    def test_learns_period(self):
+        """Assert that once the period is learned each update costs one request."""
+        endpoint = FakeEndpoint(lambda: self.now, 3600)
+        changes = []
+        self.scheduler.add('auctions-4', endpoint, lambda name, json: changes.append(self.now), 4)
+
+        self.run_until(self.now + 6 * 3600)
+        learned = len(endpoint.requests)
+        self.run_until(self.now + 10 * 3600)
+
+        self.assertEqual(len(changes), 17)
+        self.assertEqual(len(endpoint.requests) - learned, 10)
+        # Each update is found margin seconds after it happens.
+        self.assertTrue(all(change % 3600 == 15 for change in changes[-10:]))
+
+    def test_errors_are_retried(self):
+        """Assert that errors go to on_error and the job is polled again."""
+        calls, errors = [], []
+        def failing(conditional):
+            calls.append(self.now)
+            raise ConnectionError()
+        self.scheduler.add('token', failing, None, on_error=lambda name, error: errors.append(name))
+
+        self.run_until(self.now + 200)
+
+        self.assertEqual(calls, [1_656_350_000.0, 1_656_350_060.0, 1_656_350_180.0])
+        self.assertEqual(errors, ['token'] * 3)
+
+    def test_callback_errors(self):
+        """Assert that a callback that raises doesn't stop its job."""
+        endpoint = FakeEndpoint(lambda: self.now, 3600)
+        errors = []
+        def callback(name, json):
+            raise ValueError()
+        self.scheduler.add(
+            'auctions-4', endpoint, callback, 4, on_error=lambda name, error: errors.append(type(error))
+        )
+
+        self.run_until(self.now + 3 * 3600)
+
+        self.assertEqual(errors, [ValueError] * 4)
+        self.assertIsInstance(self.scheduler.jobs['auctions-4'].error, ValueError)
+
+    def test_callback_errors_are_logged(self):
+        """Assert that errors are logged without an on_error."""
+        def callback(name, json):
+            raise ValueError()
+        self.scheduler.add('auctions-4', FakeEndpoint(lambda: self.now, 3600), callback, 4)
+
+        with self.assertLogs('getwowdata.scheduler', 'ERROR'):
+            self.scheduler.run_pending()
+        self.assertIsNotNone(self.scheduler.run_pending())
+
+    def test_remove_and_add_again(self):
+        """Assert that a job removed and added again is only polled on its own schedule."""
+        first, second = FakeEndpoint(lambda: self.now, 3600), FakeEndpoint(lambda: self.now, 3600)
+        self.scheduler.add('auctions-4', first, lambda name, json: None, 4)
+        self.scheduler.run_pending()
+        self.scheduler.remove('auctions-4')
+        self.scheduler.add('auctions-4', second, lambda name, json: None, 4)
+
+        self.run_until(self.now + 3600)
+
+        self.assertEqual(len(first.requests), 1)
+        self.assertEqual(len(self.scheduler._queue), 1)
+
+    def test_duplicate_name(self):
+        """Assert that names must be unique."""
+        self.scheduler.add('token', print, print)
+        with self.assertRaises(ValueError):
+            self.scheduler.add('token', print, print)
+
+if __name__ == "__main__":
+    unittest.main()
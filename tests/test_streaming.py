@@ -0,0 +1,77 @@
+"""This module contains tests for the streaming json parser.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import json
+import unittest
+from getwowdata.exceptions import JSONChangedError
+from getwowdata.streaming import iter_json_array
+
+
+def split(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestIterJsonArray(unittest.TestCase):
+    """Test that iter_json_array decodes the array no matter how it is chunked."""
+
+    document = {
+        "_links": {"self": {"href": "https://us.api.blizzard.com/data/wow/connected-realm/4/auctions"}},
+        "connected_realm": {"href": "https://us.api.blizzard.com/data/wow/connected-realm/4"},
+        "auctions": [
+            {"id": 1, "item": {"id": 35, "name": "Überstab"}, "buyout": 100, "quantity": 1},
+            {"id": 2, "item": {"id": 36, "bonus_lists": [6654, 1691]}, "unit_price": 5, "quantity": 20},
+            {"id": 3, "item": {"id": 37}, "bid": 7, "quantity": 1, "time_left": "SHORT"},
+        ],
+        "commodities": {"href": "https://us.api.blizzard.com/data/wow/auctions/commodities"},
+    }
+
+    def test_chunk_sizes(self):
+        """Assert that the items are the same for every chunk size."""
+        for indent in (None, 2):
+            data = json.dumps(self.document, indent=indent, ensure_ascii=False).encode()
+            for size in (1, 3, 7, 64, len(data)):
+                with self.subTest(indent=indent, size=size):
+                    self.assertEqual(
+                        list(iter_json_array(split(data, size), "auctions")),
+                        self.document["auctions"],
+                    )
+
+    def test_whitespace_after_key(self):
+        """Assert that whitespace of any length around the key's colon is kept between chunks."""
+        data = b'{"auctions"' + b' ' * 100 + b':' + b'\n' * 100 + b'[1, 2]}'
+        for size in (1, 7, 64):
+            with self.subTest(size=size):
+                self.assertEqual(list(iter_json_array(split(data, size), "auctions")), [1, 2])
+
+    def test_empty_array(self):
+        """Assert that an empty array yields nothing."""
+        self.assertEqual(list(iter_json_array([b'{"auctions": []}'], "auctions")), [])
+
+    def test_missing_key(self):
+        """Assert that a missing array raises JSONChangedError."""
+        with self.assertRaises(JSONChangedError):
+            list(iter_json_array([b'{"not_auctions": []}'], "auctions"))
+
+    def test_split_tokens(self):
+        """Assert that numbers, strings and literals split between chunks are decoded whole."""
+        cases = (
+            ([b'{"a": [12', b'34, 5]}'], [1234, 5]),
+            ([b'{"a": [1.', b'5e', b'3]}'], [1500.0]),
+            ([b'{"a": ["ab', b'cd", 5]}'], ["abcd", 5]),
+            ([b'{"a": [tr', b'ue, nu', b'll]}'], [True, None]),
+            ([b'{"a": [-', b'7', b'\n]}'], [-7]),
+        )
+        for chunks, expected in cases:
+            with self.subTest(chunks=chunks):
+                self.assertEqual(list(iter_json_array(chunks, "a")), expected)
+
+    def test_truncated(self):
+        """Assert that json which ends inside the array raises JSONChangedError."""
+        with self.assertRaises(JSONChangedError):
+            list(iter_json_array([b'{"auctions": [{"id": 1}, {"id"'], "auctions"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+"""This module contains tests for tokens.py.
+
+Copyright (c) 2022 JackBorah
+MIT License see LICENSE for more details
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from getwowdata.tokens import TokenCache
+
+
+class TestTokenCache(unittest.TestCase):
+    """Test that TokenCache returns tokens until they expire."""
+
+    def test_expiry_and_margin(self):
+        """Assert that expired and expiring tokens are missing."""
+        cache = TokenCache()
+        with mock.patch("getwowdata.tokens.time.time", return_value=100):
+            cache.set("id", "us", "token", 200)
+            self.assertEqual(cache.get("id", "us"), ("token", 200))
+            self.assertIsNone(cache.get("id", "eu"))
+            self.assertIsNone(cache.get("id", "us", margin=100))
+        with mock.patch("getwowdata.tokens.time.time", return_value=200):
+            self.assertIsNone(cache.get("id", "us"))
+
+    def test_shared_file(self):
+        """Assert that caches with the same path share tokens."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tokens.json")
+            with mock.patch("getwowdata.tokens.time.time", return_value=100):
+                TokenCache(path).set("id", "us", "token", 200)
+                self.assertEqual(TokenCache(path).get("id", "us"), ("token", 200))
+
+if __name__ == "__main__":
+    unittest.main()